@@ -0,0 +1,114 @@
+import argparse
+import random
+import sys
+import time
+
+import escaneo
+import lote_qr
+import sinteticos
+
+# --- 1. ESCENARIOS DE LECTURA ---
+#
+# Cada perfil de lote_qr.PERFILES_QR se dibuja con un contenido representativo y se pasa por
+# cuadros sintéticos que imitan un teléfono frente a la cámara del ingreso: distintos tamaños
+# aparentes (distancia), inclinación, desenfoque, reflejo y ruido. Cada cuadro se decodifica con
+# el mismo decodificador del lector y se mide éxito y latencia.
+
+# Ancho aparente del código (con su borde) en un cuadro de 640x480: de lejos a cerca
+ANCHOS_PX = (70, 90, 120, 160, 220)
+
+# Contenido de ejemplo con el largo de un QR firmado (firma_qr); uno sin firmar es más corto
+CONTENIDO_EJEMPLO = "QA1:EST-000123:55xa:1:VS247T4N4OJ4M"
+
+CUADROS_POR_SEGUNDO = 30
+
+def escenario(rng):
+    """Condiciones al azar de un intento de lectura."""
+    return {
+        'ancho_px': rng.choice(ANCHOS_PX),
+        'angulo': rng.uniform(-30, 30),
+        'inclinacion': rng.uniform(0.0, 0.25),
+        'desenfoque': rng.choice((0.0, 0.0, 0.7, 1.2, 1.8)),
+        'brillo_reflejo': rng.choice((0.0, 0.0, 0.0, 90.0, 160.0)),
+        'sigma_ruido': rng.uniform(0.0, 8.0),
+    }
+
+def evaluar_perfil(parametros, contenido, decodificar, pruebas, semilla):
+    """Decodifica 'pruebas' cuadros degradados. Devuelve un dict con éxitos y latencias."""
+    qr = sinteticos.imagen_qr(contenido, parametros)
+    esperado = contenido.encode('utf-8')
+    rng = random.Random(semilla)  # misma semilla para todos los perfiles: mismos escenarios
+    latencias = []
+    exitos_por_ancho = {ancho: [0, 0] for ancho in ANCHOS_PX}
+    for _ in range(pruebas):
+        condiciones = escenario(rng)
+        cuadro = sinteticos.cuadro_con_qr(qr, rng, **condiciones)
+        inicio = time.perf_counter()
+        codigos = decodificar(cuadro)
+        latencias.append(time.perf_counter() - inicio)
+        acumulado = exitos_por_ancho[condiciones['ancho_px']]
+        acumulado[0] += any(codigo.data == esperado for codigo in codigos)
+        acumulado[1] += 1
+
+    latencias.sort()
+    exitos = sum(e for e, _ in exitos_por_ancho.values())
+    tasa = exitos / pruebas
+    p50 = latencias[len(latencias) // 2]
+    # Tiempo esperado hasta la primera lectura: cuadros necesarios (1 / tasa) por lo que dura cada
+    # cuadro, que es el mayor entre el período de la cámara y la latencia del decodificador
+    por_cuadro = max(1.0 / CUADROS_POR_SEGUNDO, p50)
+    return {
+        'modulos': sinteticos.modulos_qr(contenido, parametros),
+        'tasa': tasa,
+        'tasa_por_ancho': {ancho: e / n if n else 0.0 for ancho, (e, n) in exitos_por_ancho.items()},
+        'p50_ms': p50 * 1000,
+        'p99_ms': latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000,
+        'tiempo_esperado_ms': por_cuadro / tasa * 1000 if tasa else float('inf'),
+    }
+
+# --- 2. MODO CMD ---
+
+def main(argv=None):
+    """Compara los perfiles de generación de QR por tasa de lectura y tiempo hasta leer."""
+    parser = argparse.ArgumentParser(prog="ajustar-qr", description="Comparar perfiles de QR con cuadros sintéticos.")
+    parser.add_argument('--perfiles', default=",".join(lote_qr.PERFILES_QR),
+                        help="Perfiles a comparar, separados por coma")
+    parser.add_argument('--contenido', default=CONTENIDO_EJEMPLO, help="Contenido del QR a evaluar")
+    parser.add_argument('--pruebas', type=int, default=300, help="Cuadros por perfil")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--decodificador', choices=escaneo.DECODIFICADORES, default=escaneo.DECODIFICADOR_POR_DEFECTO,
+                        help="Decodificador (por defecto, el del lector)")
+    args = parser.parse_args(argv)
+
+    perfiles = [p.strip() for p in args.perfiles.split(',') if p.strip()]
+    for perfil in perfiles:
+        if perfil not in lote_qr.PERFILES_QR:
+            print(f"Perfil desconocido: {perfil}. Opciones: {', '.join(lote_qr.PERFILES_QR)}")
+            return 1
+    try:
+        nombre_decodificador, decodificar = escaneo.obtener_decodificador(args.decodificador, alternativa='opencv')
+    except ImportError as e:
+        print(f"Error: no se pudo cargar el decodificador ({e}).")
+        return 1
+
+    print(f"=== {len(perfiles)} perfiles, {args.pruebas} cuadros cada uno, decodificador '{nombre_decodificador}' ===")
+    print(f"Contenido: {args.contenido} ({len(args.contenido)} caracteres)\n")
+    encabezado_anchos = " ".join(f"{ancho:>5}px" for ancho in ANCHOS_PX)
+    print(f"{'perfil':<24} {'mód.':>4} {'éxito':>6}  {encabezado_anchos}  {'p50':>7} {'p99':>7} {'t. esperado':>11}")
+    print("-" * (70 + 8 * len(ANCHOS_PX)))
+
+    resultados = {}
+    for perfil in perfiles:
+        r = evaluar_perfil(lote_qr.PERFILES_QR[perfil], args.contenido, decodificar, args.pruebas, args.semilla)
+        resultados[perfil] = r
+        por_ancho = " ".join(f"{r['tasa_por_ancho'][ancho]:>6.0%}" for ancho in ANCHOS_PX)
+        print(f"{perfil:<24} {r['modulos']:>4} {r['tasa']:>6.1%}  {por_ancho}  {r['p50_ms']:>5.1f}ms {r['p99_ms']:>5.1f}ms "
+              f"{r['tiempo_esperado_ms']:>9.0f}ms")
+
+    mejor = min(resultados, key=lambda p: resultados[p]['tiempo_esperado_ms'])
+    print(f"\nPerfil más rápido en el ingreso: '{mejor}'.")
+    print(f"Para usarlo: ASISTENCIA_PERFIL_QR={mejor}  o  python tomadeasistencia.py qr --perfil {mejor}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
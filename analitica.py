@@ -0,0 +1,270 @@
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError as e:
+    print(f"Error: Falta una librería esencial. Instala las dependencias con:\npip install numpy\nDetalle: {e}")
+    exit(1)
+
+# --- 1. MATRIZ ESTUDIANTE x DÍA ---
+
+# Porcentaje de inasistencia a partir del cual un estudiante se considera ausente crónico
+UMBRAL_AUSENCIA_CRONICA = 10.0
+# Curso de los estudiantes que no tienen uno cargado (la columna admite NULL)
+SIN_CURSO = "-"
+
+def _cursos(cursos):
+    return np.asarray([SIN_CURSO if curso is None else curso for curso in cursos], dtype=object)
+
+class MatrizAsistencia:
+    """Matriz booleana compacta (estudiante x día hábil) construida a partir de la tabla asistencia.
+
+    Las filas siguen el orden de estudiantes.id y las columnas los días hábiles en orden
+    cronológico. Un día hábil es cualquier fecha con al menos un registro de asistencia.
+    """
+
+    def __init__(self, ids, nombres, cursos, capacidad_dias=64):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.nombres = np.asarray(nombres, dtype=object)
+        self.cursos = _cursos(cursos)
+        self.dias = []
+        # Índice del primer día que cuenta para cada estudiante. La tabla estudiantes no guarda la
+        # fecha de alta, así que es 0 para todos, también para los que llegan en una actualización
+        # incremental: así la matriz da lo mismo que una carga completa de la misma BD
+        self.inicio = np.zeros(len(self.ids), dtype=np.int32)
+        self._datos = np.zeros((len(self.ids), capacidad_dias), dtype=bool)
+
+    @property
+    def n_dias(self):
+        return len(self.dias)
+
+    @property
+    def presentes(self):
+        """Vista (sin copia) de la matriz con solo los días cargados."""
+        return self._datos[:, :self.n_dias]
+
+    def _asegurar_capacidad(self, dias_extra):
+        necesarios = self.n_dias + dias_extra
+        if necesarios <= self._datos.shape[1]:
+            return
+        capacidad = max(necesarios, self._datos.shape[1] * 2)
+        nuevos = np.zeros((len(self.ids), capacidad), dtype=bool)
+        nuevos[:, :self.n_dias] = self.presentes
+        self._datos = nuevos
+
+    def _filas(self, student_ids):
+        """Traduce student_id a índices de fila. Devuelve (filas, validos) para descartar ids desconocidos."""
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+        if not len(self.ids):
+            return student_ids[:0], np.zeros(len(student_ids), dtype=bool)
+        filas = np.minimum(np.searchsorted(self.ids, student_ids), len(self.ids) - 1)
+        validos = self.ids[filas] == student_ids
+        return filas, validos
+
+    # --- Actualización incremental ---
+
+    def agregar_estudiantes(self, ids, nombres, cursos):
+        """Agrega filas para estudiantes nuevos (ids mayores a los existentes).
+
+        Cuentan desde el primer día cargado, como en cargar_matriz.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        if len(self.ids) and ids.min() <= self.ids.max():
+            raise ValueError("Los estudiantes nuevos deben tener ids mayores a los existentes")
+        self.ids = np.concatenate([self.ids, ids])
+        self.nombres = np.concatenate([self.nombres, np.asarray(nombres, dtype=object)])
+        self.cursos = np.concatenate([self.cursos, _cursos(cursos)])
+        self.inicio = np.concatenate([self.inicio, np.zeros(len(ids), dtype=np.int32)])
+        self._datos = np.concatenate([self._datos, np.zeros((len(ids), self._datos.shape[1]), dtype=bool)])
+
+    def agregar_dia(self, fecha, student_ids):
+        """Agrega la columna de un día cerrado con los student_id presentes."""
+        fecha = str(fecha)
+        if self.dias and fecha <= self.dias[-1]:
+            raise ValueError(f"El día {fecha} no es posterior al último día cargado ({self.dias[-1]})")
+        self._asegurar_capacidad(1)
+        filas, validos = self._filas(student_ids)
+        self._datos[filas[validos], self.n_dias] = True
+        self.dias.append(fecha)
+
+    def agregar_registros(self, fechas, student_ids):
+        """Agrega varios días a la vez a partir de pares (fecha, student_id) ordenados o no."""
+        nuevos_dias, columnas = np.unique(np.asarray(fechas, dtype=str), return_inverse=True)
+        if not len(nuevos_dias):
+            return
+        if self.dias and nuevos_dias[0] <= self.dias[-1]:
+            raise ValueError(f"El día {nuevos_dias[0]} no es posterior al último día cargado ({self.dias[-1]})")
+
+        self._asegurar_capacidad(len(nuevos_dias))
+        filas, validos = self._filas(student_ids)
+        self._datos[filas[validos], self.n_dias + columnas[validos]] = True
+        self.dias.extend(nuevos_dias.tolist())
+
+    # --- Consultas vectorizadas ---
+
+    def dias_habilitados(self):
+        """Cantidad de días que cuentan para cada estudiante (desde su alta)."""
+        return self.n_dias - self.inicio
+
+    def porcentaje_asistencia(self):
+        """Porcentaje de asistencia por estudiante (NaN si todavía no tuvo días hábiles)."""
+        dias = self.dias_habilitados()
+        asistidos = self.presentes.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(dias > 0, asistidos * 100.0 / dias, np.nan)
+
+    def racha_ausencias_actual(self):
+        """Días consecutivos de ausencia hasta el último día cargado, por estudiante."""
+        if not self.n_dias:
+            return np.zeros(len(self.ids), dtype=np.int32)
+        invertida = self.presentes[:, ::-1]
+        alguna = invertida.any(axis=1)
+        racha = np.where(alguna, invertida.argmax(axis=1), self.n_dias)
+        return np.minimum(racha, self.dias_habilitados()).astype(np.int32)
+
+    def racha_ausencias_maxima(self):
+        """Racha más larga de ausencias consecutivas por estudiante."""
+        actual = np.zeros(len(self.ids), dtype=np.int32)
+        maxima = np.zeros(len(self.ids), dtype=np.int32)
+        for d in range(self.n_dias):
+            habilitado = self.inicio <= d
+            ausente = habilitado & ~self._datos[:, d]
+            actual = np.where(ausente, actual + 1, 0)
+            np.maximum(maxima, actual, out=maxima)
+        return maxima
+
+    def ausentes_cronicos(self, umbral=UMBRAL_AUSENCIA_CRONICA, curso=None):
+        """Estudiantes cuyo porcentaje de inasistencia supera el umbral, agrupados por curso.
+
+        Devuelve {curso: [(student_id, nombre, porcentaje_asistencia), ...]} ordenado de menor a
+        mayor asistencia.
+        """
+        porcentaje = self.porcentaje_asistencia()
+        mascara = (100.0 - porcentaje) >= umbral
+        if curso is not None:
+            mascara &= self.cursos == curso
+
+        resultado = {}
+        indices = np.flatnonzero(mascara)
+        indices = indices[np.argsort(porcentaje[indices], kind='stable')]
+        for i in indices:
+            resultado.setdefault(self.cursos[i], []).append(
+                (int(self.ids[i]), self.nombres[i], float(porcentaje[i]))
+            )
+        return resultado
+
+    def resumen_por_curso(self):
+        """Porcentaje de asistencia promedio y cantidad de estudiantes por curso."""
+        cursos, grupo = np.unique(self.cursos.astype(str), return_inverse=True)
+        porcentaje = self.porcentaje_asistencia()
+        validos = ~np.isnan(porcentaje)
+        suma = np.bincount(grupo[validos], weights=porcentaje[validos], minlength=len(cursos))
+        cantidad = np.bincount(grupo[validos], minlength=len(cursos))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            promedio = suma / cantidad
+        return {c: (float(promedio[i]), int(cantidad[i])) for i, c in enumerate(cursos)}
+
+# --- 2. CARGA DESDE LA BASE DE DATOS ---
+
+def _fecha_corte(incluir_hoy):
+    """Los días se consideran cerrados cuando ya pasaron; hoy solo se incluye si se pide."""
+    hoy = str(datetime.now().date())
+    return ("<=", hoy) if incluir_hoy else ("<", hoy)
+
+def cargar_matriz(db_path="asistencia.db", incluir_hoy=False):
+    """Construye la matriz completa a partir de estudiantes y asistencia."""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nombre_y_apellido, curso FROM estudiantes ORDER BY id")
+        estudiantes = cursor.fetchall()
+        ids, nombres, cursos = zip(*estudiantes) if estudiantes else ((), (), ())
+        matriz = MatrizAsistencia(ids, nombres, cursos)
+
+        operador, corte = _fecha_corte(incluir_hoy)
+        cursor.execute(f"SELECT fecha, student_id FROM asistencia WHERE fecha {operador} ?", (corte,))
+        registros = cursor.fetchall()
+        if registros:
+            fechas, student_ids = zip(*registros)
+            matriz.agregar_registros(fechas, student_ids)
+    return matriz
+
+def actualizar_matriz(matriz, db_path="asistencia.db", incluir_hoy=False):
+    """Incorpora estudiantes nuevos y los días cerrados desde la última actualización.
+
+    Devuelve la cantidad de días agregados.
+    """
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        ultimo_id = int(matriz.ids.max()) if len(matriz.ids) else 0
+        cursor.execute("SELECT id, nombre_y_apellido, curso FROM estudiantes WHERE id > ? ORDER BY id", (ultimo_id,))
+        nuevos = cursor.fetchall()
+        if nuevos:
+            matriz.agregar_estudiantes(*zip(*nuevos))
+
+        operador, corte = _fecha_corte(incluir_hoy)
+        ultimo_dia = matriz.dias[-1] if matriz.dias else ""
+        cursor.execute(f"SELECT fecha, student_id FROM asistencia WHERE fecha > ? AND fecha {operador} ?",
+                       (ultimo_dia, corte))
+        registros = cursor.fetchall()
+
+    dias_antes = matriz.n_dias
+    if registros:
+        fechas, student_ids = zip(*registros)
+        matriz.agregar_registros(fechas, student_ids)
+    return matriz.n_dias - dias_antes
+
+# --- 3. MODO CMD ---
+
+def main(argv=None):
+    """Reportes de asistencia por estudiante y por curso desde la línea de comandos."""
+    parser = argparse.ArgumentParser(prog="analitica", description="Analítica de asistencia.")
+    parser.add_argument('consulta', choices=['cursos', 'cronicos', 'rachas'], help="Consulta a ejecutar")
+    parser.add_argument('--curso', help="Filtrar por curso")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_AUSENCIA_CRONICA,
+                        help="Porcentaje de inasistencia para ausentismo crónico (por defecto 10)")
+    parser.add_argument('--minimo', type=int, default=3, help="Racha mínima a listar (rachas)")
+    parser.add_argument('--incluir-hoy', action='store_true', help="Incluir el día en curso")
+    args = parser.parse_args(argv)
+
+    matriz = cargar_matriz(incluir_hoy=args.incluir_hoy)
+    print(f"Matriz: {len(matriz.ids)} estudiantes x {matriz.n_dias} días hábiles")
+
+    if args.consulta == 'cursos':
+        print(f"\n{'Curso':<15} {'Estudiantes':>12} {'Asistencia %':>13}")
+        print("-" * 42)
+        for curso, (promedio, cantidad) in matriz.resumen_por_curso().items():
+            if args.curso and curso != args.curso:
+                continue
+            print(f"{curso[:14]:<15} {cantidad:>12} {promedio:>13.1f}")
+
+    elif args.consulta == 'cronicos':
+        cronicos = matriz.ausentes_cronicos(args.umbral, args.curso)
+        if not cronicos:
+            print("No hay estudiantes con ausentismo crónico.")
+        for curso, estudiantes in sorted(cronicos.items()):
+            print(f"\n=== {curso} ({len(estudiantes)} estudiantes) ===")
+            for student_id, nombre, porcentaje in estudiantes:
+                print(f"{student_id:<6} {(nombre or '-')[:30]:<31} {porcentaje:>6.1f}%")
+
+    elif args.consulta == 'rachas':
+        actual = matriz.racha_ausencias_actual()
+        maxima = matriz.racha_ausencias_maxima()
+        mascara = actual >= args.minimo
+        if args.curso:
+            mascara &= matriz.cursos == args.curso
+        indices = np.flatnonzero(mascara)
+        indices = indices[np.argsort(-actual[indices], kind='stable')]
+        print(f"\n{'ID':<6} {'Nombre y Apellido':<31} {'Curso':<12} {'Actual':>7} {'Máxima':>7}")
+        print("-" * 66)
+        for i in indices:
+            print(f"{matriz.ids[i]:<6} {(matriz.nombres[i] or '-')[:30]:<31} {matriz.cursos[i][:11]:<12} "
+                  f"{actual[i]:>7} {maxima[i]:>7}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# Benchmark de la matriz de asistencia (analitica.py).
+#
+# Uso:
+#   python benchmarks/bench_analitica.py                      # 20.000 estudiantes x 200 días
+#   python benchmarks/bench_analitica.py --estudiantes 5000 --dias 100 --con-db
+#
+# --con-db además arma una asistencia.db temporal y mide la carga completa desde SQLite.
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import analitica
+
+def medir(nombre, funcion, repeticiones=3):
+    """Ejecuta la función varias veces e imprime el mejor tiempo en milisegundos."""
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    print(f"{nombre:<40} {mejor * 1000:>10.1f} ms")
+    return resultado
+
+def datos_sinteticos(n_estudiantes, n_dias, tasa_asistencia, semilla=42):
+    rng = np.random.default_rng(semilla)
+    ids = np.arange(1, n_estudiantes + 1)
+    nombres = [f"Estudiante {i}" for i in ids]
+    cursos = [f"Curso {i % 40}" for i in ids]
+    # Cada estudiante tiene su propia probabilidad de asistir, para que haya ausentes crónicos
+    probabilidad = np.clip(rng.normal(tasa_asistencia, 0.08, n_estudiantes), 0, 1)
+    presentes = rng.random((n_estudiantes, n_dias)) < probabilidad[:, None]
+    inicio = date(2024, 3, 1)
+    dias = [str(inicio + timedelta(days=d)) for d in range(n_dias)]
+    return ids, nombres, cursos, dias, presentes
+
+def bench_memoria(n_estudiantes, n_dias, tasa):
+    ids, nombres, cursos, dias, presentes = datos_sinteticos(n_estudiantes, n_dias, tasa)
+    columnas = [ids[presentes[:, d]] for d in range(n_dias)]
+
+    def construir_incremental():
+        matriz = analitica.MatrizAsistencia(ids, nombres, cursos)
+        for d, fecha in enumerate(dias):
+            matriz.agregar_dia(fecha, columnas[d])
+        return matriz
+
+    matriz = medir(f"agregar_dia x {n_dias} (incremental)", construir_incremental)
+    print(f"{'  memoria de la matriz':<40} {matriz._datos.nbytes / 1e6:>10.1f} MB")
+
+    filas, cols = np.nonzero(presentes)
+    fechas = np.asarray(dias)[cols]
+    student_ids = ids[filas]
+
+    def construir_lote():
+        m = analitica.MatrizAsistencia(ids, nombres, cursos, capacidad_dias=n_dias)
+        m.agregar_registros(fechas, student_ids)
+        return m
+
+    medir(f"agregar_registros ({len(student_ids)} filas)", construir_lote)
+    medir("porcentaje_asistencia", matriz.porcentaje_asistencia)
+    medir("racha_ausencias_actual", matriz.racha_ausencias_actual)
+    medir("racha_ausencias_maxima", matriz.racha_ausencias_maxima)
+    cronicos = medir("ausentes_cronicos (umbral 10%)", matriz.ausentes_cronicos)
+    medir("resumen_por_curso", matriz.resumen_por_curso)
+    print(f"{'  ausentes crónicos':<40} {sum(len(v) for v in cronicos.values()):>10}")
+
+def bench_db(n_estudiantes, n_dias, tasa):
+    ids, nombres, cursos, dias, presentes = datos_sinteticos(n_estudiantes, n_dias, tasa)
+    with tempfile.TemporaryDirectory() as carpeta:
+        db_path = os.path.join(carpeta, "asistencia.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE estudiantes (id INTEGER PRIMARY KEY, nombre_y_apellido TEXT, curso TEXT)")
+            conn.execute("CREATE TABLE asistencia (id INTEGER PRIMARY KEY, student_id INTEGER, fecha TEXT, hora_ingreso TEXT)")
+            conn.executemany("INSERT INTO estudiantes VALUES (?, ?, ?)", zip(ids.tolist(), nombres, cursos))
+            filas, cols = np.nonzero(presentes)
+            conn.executemany("INSERT INTO asistencia (student_id, fecha, hora_ingreso) VALUES (?, ?, '07:30:00')",
+                             zip(ids[filas].tolist(), np.asarray(dias)[cols].tolist()))
+            conn.commit()
+
+        matriz = medir("cargar_matriz (desde SQLite)", lambda: analitica.cargar_matriz(db_path), repeticiones=1)
+
+        # Simula el cierre de un día nuevo y mide solo la actualización incremental
+        siguiente = str(date.fromisoformat(dias[-1]) + timedelta(days=1))
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany("INSERT INTO asistencia (student_id, fecha, hora_ingreso) VALUES (?, ?, '07:30:00')",
+                             ((int(i), siguiente) for i in ids[presentes[:, -1]]))
+            conn.commit()
+        medir("actualizar_matriz (1 día nuevo)", lambda: analitica.actualizar_matriz(matriz, db_path), repeticiones=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la matriz de asistencia")
+    parser.add_argument('--estudiantes', type=int, default=20_000)
+    parser.add_argument('--dias', type=int, default=200)
+    parser.add_argument('--tasa', type=float, default=0.9, help="Tasa media de asistencia")
+    parser.add_argument('--con-db', action='store_true', help="Medir también la carga desde SQLite")
+    args = parser.parse_args()
+
+    print(f"=== Matriz de asistencia: {args.estudiantes} estudiantes x {args.dias} días ===")
+    bench_memoria(args.estudiantes, args.dias, args.tasa)
+    if args.con_db:
+        bench_db(args.estudiantes, args.dias, args.tasa)
+
+if __name__ == "__main__":
+    main()
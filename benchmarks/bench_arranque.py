@@ -0,0 +1,130 @@
+# Benchmark del tiempo de arranque de cada punto de entrada y subcomando.
+#
+# Uso:
+#   python benchmarks/bench_arranque.py                 # 7 repeticiones por caso
+#   python benchmarks/bench_arranque.py --factor 2      # umbrales x2 (máquinas lentas)
+#
+# Cada caso se ejecuta en un proceso nuevo, en una carpeta temporal con su propia asistencia.db
+# y HOME, y se informa la mediana descontando el arranque del intérprete solo ("python -c pass").
+# Además se verifica qué librerías pesadas quedaron importadas. Sale con código 1 si algún caso
+# supera su umbral o importa una librería que no le corresponde (regresión de arranque).
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADAS = ['cv2', 'pandas', 'numpy', 'openpyxl', 'qrcode', 'PIL', 'pyzbar', 'pyarrow']
+
+# (nombre, argumentos de python, umbral en ms sobre el intérprete solo, librerías pesadas permitidas)
+CASOS = [
+    ("import tomadeasistencia", ['-c', 'import tomadeasistencia'], 60, []),
+    ("import pruebadeqr", ['-c', 'import pruebadeqr'], 80, []),
+    ("import lectorqr", ['-c', 'import lectorqr'], 60, []),
+    ("import lote_qr", ['-c', 'import lote_qr'], 30, []),
+    ("import reportes", ['-c', 'import reportes'], 30, []),
+    ("import llegadas", ['-c', 'import llegadas'], 30, []),
+    ("import credenciales", ['-c', 'import credenciales'], 60, []),
+    ("tomadeasistencia (ayuda)", ['tomadeasistencia.py', 'ayuda'], 60, []),
+    ("tomadeasistencia list", ['tomadeasistencia.py', 'list'], 80, []),
+    ("tomadeasistencia search", ['tomadeasistencia.py', 'search', 'ana'], 80, []),
+    ("tomadeasistencia export csv", ['tomadeasistencia.py', 'export', 'csv', '-o', 'historial.csv'], 80, []),
+    ("tomadeasistencia credenciales -h", ['tomadeasistencia.py', 'credenciales', '-h'], 100, []),
+    ("llegadas resumen", ['llegadas.py', 'resumen'], 200, ['numpy']),
+    ("analitica cursos", ['analitica.py', 'cursos'], 200, ['numpy']),
+]
+
+# Se agrega al final del caso para informar qué librerías pesadas quedaron en sys.modules
+SONDA = ("import atexit, sys\n"
+         "atexit.register(lambda: sys.stderr.write('PESADAS=' + ','.join("
+         f"m for m in {PESADAS!r} if m in sys.modules) + '\\n'))\n")
+
+def preparar_carpeta(carpeta):
+    """Copia los módulos a una carpeta temporal y crea una base chica para los subcomandos."""
+    for nombre in os.listdir(RAIZ):
+        if nombre.endswith('.py'):
+            shutil.copy(os.path.join(RAIZ, nombre), carpeta)
+    entorno = dict(os.environ, HOME=carpeta, USERPROFILE=carpeta, PYTHONDONTWRITEBYTECODE='')
+    subprocess.run([sys.executable, '-c', 'import tomadeasistencia; tomadeasistencia.init_db()'],
+                   cwd=carpeta, env=entorno, check=True, capture_output=True)
+    script = ("import sqlite3\n"
+              "conn = sqlite3.connect('asistencia.db')\n"
+              "conn.execute('CREATE TABLE IF NOT EXISTS asistencia (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+              "student_id INTEGER NOT NULL, fecha TEXT NOT NULL, hora_ingreso TEXT NOT NULL, puerta TEXT)')\n"
+              "conn.executemany('INSERT INTO estudiantes (nombre_y_apellido, id_unico_qr, curso, carrera) "
+              "VALUES (?, ?, ?, ?)', [(f'Ana Estudiante {i}', f'est{i}', '1A', 'Informática') for i in range(500)])\n"
+              "conn.execute(\"INSERT INTO asistencia (student_id, fecha, hora_ingreso) VALUES (1, date('now'), '07:30:00')\")\n"
+              "conn.commit()\n"
+              "import llegadas\n"
+              "llegadas.instalar_histograma(conn)\n")
+    subprocess.run([sys.executable, '-c', script], cwd=carpeta, env=entorno, check=True, capture_output=True)
+    return entorno
+
+def ejecutar(argumentos, carpeta, entorno):
+    """Corre un caso en un proceso nuevo. Devuelve (milisegundos, librerías pesadas importadas)."""
+    if argumentos[0] == '-c':
+        comando = [sys.executable, '-c', SONDA + argumentos[1]]
+    else:
+        # Se ejecuta el script como __main__ con la sonda instalada antes
+        codigo = SONDA + ("import runpy, sys\n"
+                          f"sys.argv = {argumentos!r}\n"
+                          "try:\n"
+                          f"    runpy.run_path({argumentos[0]!r}, run_name='__main__')\n"
+                          "except SystemExit:\n"
+                          "    pass\n")
+        comando = [sys.executable, '-c', codigo]
+    inicio = time.perf_counter()
+    resultado = subprocess.run(comando, cwd=carpeta, env=entorno, capture_output=True, text=True)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+    pesadas = []
+    for linea in resultado.stderr.splitlines():
+        if linea.startswith('PESADAS='):
+            pesadas = [m for m in linea[len('PESADAS='):].split(',') if m]
+    return milisegundos, pesadas
+
+def mediana(argumentos, carpeta, entorno, repeticiones):
+    tiempos, pesadas = [], []
+    for _ in range(repeticiones):
+        milisegundos, pesadas = ejecutar(argumentos, carpeta, entorno)
+        tiempos.append(milisegundos)
+    return statistics.median(tiempos), pesadas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque")
+    parser.add_argument('--repeticiones', type=int, default=7)
+    parser.add_argument('--factor', type=float, default=1.0, help="Multiplica todos los umbrales")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        entorno = preparar_carpeta(carpeta)
+        base, _ = mediana(['-c', 'pass'], carpeta, entorno, args.repeticiones)
+        print(f"=== Arranque (mediana de {args.repeticiones}); intérprete solo: {base:.1f} ms ===")
+        print(f"{'caso':<36} {'total':>9} {'propio':>9} {'umbral':>8}  librerías pesadas")
+
+        regresiones = 0
+        for nombre, argumentos, umbral, permitidas in CASOS:
+            total, pesadas = mediana(argumentos, carpeta, entorno, args.repeticiones)
+            propio = total - base
+            umbral *= args.factor
+            sobrantes = [m for m in pesadas if m not in permitidas]
+            estado = "OK"
+            if propio > umbral or sobrantes:
+                estado = "REGRESIÓN"
+                regresiones += 1
+            print(f"{nombre:<36} {total:>7.1f}ms {propio:>7.1f}ms {umbral:>6.0f}ms  "
+                  f"{','.join(pesadas) or '-':<14} {estado}")
+
+    if regresiones:
+        print(f"\n{regresiones} caso(s) con regresión de arranque.")
+        return 1
+    print("\nTodos los casos dentro de los umbrales.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# Benchmark del costo por escaneo de los diagnósticos del lector: los print de antes contra la
+# bitácora (bitacora.py) apagada y encendida.
+#
+# Uso:
+#   python benchmarks/bench_bitacora.py
+#   python benchmarks/bench_bitacora.py --escaneos 5000 --latencia-consola-us 200
+#
+# Mide el tiempo que pierde el hilo que escanea (el de Tk) por cada escaneo exitoso. La consola
+# lenta se simula con un flujo que demora cada write (como la consola de Windows o un archivo en
+# un disco de red); con la bitácora esa demora la paga el hilo de fondo, no el que registra.
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitacora
+
+ESTUDIANTE = (123, "Ana Pérez", "EST-000123", "3A", "Informática", "2005-04-01", "ana@ejemplo.com", "F")
+
+class ConsolaLenta(io.TextIOBase):
+    """Flujo que descarta lo escrito pero demora cada write (como una escritura bloqueante, suelta el GIL)."""
+
+    def __init__(self, demora_s):
+        self.demora_s = demora_s
+
+    def writable(self):
+        return True
+
+    def write(self, texto):
+        time.sleep(self.demora_s)
+        return len(texto)
+
+def escaneo_con_prints(qr_data, hora_inicio, hora_fin):
+    """Los print que hacían process_qr_code, buscar_estudiante, ya_marco_asistencia_hoy y
+    registrar_asistencia en un escaneo exitoso."""
+    estudiante = ESTUDIANTE
+    print(f"\n🔍 PROCESANDO QR: {qr_data}")
+    hora_actual = datetime.now().time()
+    print(f"⏰ Hora actual: {hora_actual}")
+    print(f"⏰ Horario permitido: {hora_inicio} - {hora_fin}")
+    print(f"🔍 Búsqueda estudiante con QR '{qr_data}': {estudiante}")
+    print(f"👤 Estudiante encontrado: {estudiante}")
+    fecha_hoy_str = str(datetime.now().date())
+    print(f"🔍 Verificando asistencia para student_id {estudiante[0]} en fecha {fecha_hoy_str}")
+    print(f"📋 Resultado verificación: {None}")
+    print(f"📅 Ya marcó hoy: {False}")
+    print("✅ Procediendo a registrar asistencia...")
+    print(f"📝 Iniciando registro de asistencia para student_id: {estudiante[0]}")
+    hora_actual_str = datetime.now().time().strftime('%H:%M:%S')
+    print(f"📅 Fecha: {fecha_hoy_str}")
+    print(f"⏰ Hora: {hora_actual_str}")
+    print(f"✅ Registro insertado: {(1, estudiante[0], fecha_hoy_str, hora_actual_str, 'principal')}")
+    print("✅ Asistencia registrada exitosamente en la base de datos")
+    print("✅ Asistencia registrada exitosamente")
+
+def escaneo_con_bitacora(log, qr_data):
+    """Los eventos que registra el lector ahora en el mismo escaneo."""
+    estudiante = ESTUDIANTE
+    hora_actual = datetime.now().time()
+    log.debug("qr_leido", contenido=qr_data, hora=hora_actual)
+    log.debug("busqueda_estudiante", id_qr=qr_data, encontrado=True)
+    fecha_hoy_str = str(datetime.now().date())
+    log.debug("verificacion_duplicado", student_id=estudiante[0], fecha=fecha_hoy_str, ya_marco=False)
+    hora_actual_str = datetime.now().time().strftime('%H:%M:%S')
+    log.debug("asistencia_insertada", student_id=estudiante[0], fecha=fecha_hoy_str, hora=hora_actual_str,
+              puerta="principal", verificado=True)
+    log.info("asistencia_registrada", student_id=estudiante[0], id_qr=qr_data)
+
+def medir(funcion, escaneos):
+    """Microsegundos por escaneo: mediana y p99 de lotes de 50."""
+    lote = 50
+    tiempos = []
+    for _ in range(max(escaneos // lote, 1)):
+        inicio = time.perf_counter()
+        for _ in range(lote):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) / lote * 1e6)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo por escaneo de los diagnósticos del lector")
+    parser.add_argument('--escaneos', type=int, default=2000)
+    parser.add_argument('--latencia-consola-us', type=float, default=100.0,
+                        help="Demora de cada write en la consola simulada (microsegundos)")
+    args = parser.parse_args()
+
+    hora_inicio, hora_fin = datetime.strptime("00:00", "%H:%M").time(), datetime.strptime("23:59", "%H:%M").time()
+    lenta = ConsolaLenta(args.latencia_consola_us / 1e6)
+    nula = open(os.devnull, 'w', encoding='utf-8')
+    consola_real = sys.stdout
+    resultados = []
+
+    def caso(nombre, funcion):
+        p50, p99 = medir(funcion, args.escaneos)
+        resultados.append((nombre, p50, p99))
+
+    def escaneo_print():
+        escaneo_con_prints("EST-000123", hora_inicio, hora_fin)
+
+    sys.stdout = nula
+    caso("print a archivo (nulo)", escaneo_print)
+    sys.stdout = lenta
+    caso(f"print a consola lenta ({args.latencia_consola_us:.0f} µs/write)", escaneo_print)
+    sys.stdout = consola_real
+
+    # La bitácora escribe en sys.stderr: se apunta a la consola lenta antes de configurarla
+    stderr_real = sys.stderr
+    sys.stderr = lenta
+    bitacora.configurar(nivel="WARNING")
+    log = bitacora.Bitacora("lector")
+
+    def escaneo_bitacora():
+        escaneo_con_bitacora(log, "EST-000123")
+
+    caso("bitácora apagada (WARNING, por defecto)", escaneo_bitacora)
+    bitacora.configurar(nivel="INFO")
+    caso("bitácora INFO a consola lenta", escaneo_bitacora)
+    bitacora.configurar(nivel="DEBUG")
+    caso("bitácora DEBUG a consola lenta", escaneo_bitacora)
+    inicio = time.perf_counter()
+    bitacora.detener()  # espera a que el hilo de fondo termine de escribir lo encolado
+    vaciado = time.perf_counter() - inicio
+    sys.stderr = stderr_real
+    nula.close()
+
+    print(f"=== Costo de diagnósticos por escaneo en el hilo del lector ({args.escaneos} escaneos) ===")
+    print(f"{'caso':<46} {'p50':>10} {'p99':>10}")
+    for nombre, p50, p99 in resultados:
+        print(f"{nombre:<46} {p50:>8.1f}µs {p99:>8.1f}µs")
+    print(f"\nVaciado de la cola al cerrar (hilo de fondo): {vaciado * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# Benchmark de la búsqueda de estudiantes (FTS5 en tomadeasistencia.py).
+#
+# Uso:
+#   python benchmarks/bench_busqueda.py                    # 100.000 estudiantes
+#   python benchmarks/bench_busqueda.py --estudiantes 20000
+#
+# Arma una asistencia.db temporal con init_db() (tabla, índices, FTS5 y triggers), la llena y
+# mide consultas de prefijo como las que genera el cuadro de búsqueda al tipear.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import tomadeasistencia
+
+NOMBRES = ["Ana", "Juan", "María", "José", "Lucía", "Martín", "Sofía", "Diego", "Valentina", "Mateo",
+           "Camila", "Santiago", "Julieta", "Tomás", "Agustina", "Nicolás", "Florencia", "Facundo"]
+APELLIDOS = ["Gómez", "Rodríguez", "Fernández", "López", "Martínez", "González", "Pérez", "Sánchez",
+             "Romero", "Díaz", "Álvarez", "Torres", "Ruiz", "Ramírez", "Flores", "Benítez", "Acosta"]
+CARRERAS = ["Informática", "Administración", "Enfermería", "Diseño Gráfico", "Turismo", "Electrónica"]
+
+CONSULTAS = ["a", "go", "gom", "gomez", "ana gom", "maria lopez", "inform", "enfer 3b", "zzz", "est12"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda FTS5")
+    parser.add_argument('--estudiantes', type=int, default=100_000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as carpeta:
+        os.chdir(carpeta)
+        tomadeasistencia.init_db()
+
+        conn = tomadeasistencia.sqlite3.connect("asistencia.db")
+        inicio = time.perf_counter()
+        conn.executemany(
+            "INSERT INTO estudiantes (nombre_y_apellido, id_unico_qr, curso, carrera, correo_electronico, genero) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}", f"est{i}",
+              f"{rng.randint(1, 6)}{rng.choice('ABC')}", rng.choice(CARRERAS), f"est{i}@escuela.edu", 'O')
+             for i in range(args.estudiantes)))
+        conn.commit()
+        print(f"=== {args.estudiantes} estudiantes cargados (con triggers FTS) en {time.perf_counter() - inicio:.2f} s ===")
+
+        print(f"{'consulta':<15} {'resultados':>10} {'mediana':>10} {'máximo':>10}")
+        for texto in CONSULTAS:
+            tiempos = []
+            for _ in range(args.repeticiones):
+                t0 = time.perf_counter()
+                filas = tomadeasistencia.buscar_estudiantes(texto, conn=conn)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+            tiempos.sort()
+            print(f"{texto:<15} {len(filas):>10} {tiempos[len(tiempos) // 2]:>8.2f}ms {tiempos[-1]:>8.2f}ms")
+        conn.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
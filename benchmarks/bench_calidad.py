@@ -0,0 +1,133 @@
+# Filtro de calidad del escaneo (escaneo.FiltroCalidad): cuántos cuadros se saltean y cuánto
+# sube la tasa de lectura por cuadro decodificado.
+#
+# Uso:
+#   python benchmarks/bench_calidad.py                       # sale con 1 si el filtro pierde lecturas
+#   python benchmarks/bench_calidad.py --ajustar             # además busca los umbrales
+#   python benchmarks/bench_calidad.py --decodificador opencv --cuadros 1000 --resolucion 720p
+#
+# Los cuadros son sintéticos (sinteticos.py) con las fallas que el filtro tiene que reconocer:
+# movimiento, desenfoque, sub y sobreexposición (con el negro levantado) y ruido, con o sin QR
+# (semilla fija). Cada cuadro se decodifica siempre, para saber cuáles se podían leer, y se mide
+# su calidad; después se calcula qué habría pasado con el filtro: cuadros salteados, cuadros
+# legibles perdidos, éxito por cuadro intentado y tiempo de decodificación ahorrado.
+# --ajustar recorre umbrales y sugiere los que más cuadros saltean sin perder más de --perdida-max
+# de los legibles (los valores por defecto de escaneo.py salen de acá).
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import escaneo
+import sinteticos
+
+RESOLUCIONES = {'480p': (480, 640), '720p': (720, 1280)}
+# (ganancia, piso) de la exposición: normal, oscuro, algo lavado y sobreexpuesto
+EXPOSICIONES = ((1.0, 0.0), (1.0, 0.0), (1.0, 0.0), (0.12, 0.0), (1.5, 25.0), (2.2, 110.0))
+
+def generar_cuadro(rng, qrs, alto, ancho):
+    """Un cuadro degradado al azar. Devuelve (cuadro BGR, contenido esperado o None)."""
+    escala = alto / sinteticos.ALTO_CUADRO
+    cuadro = sinteticos.fondo(rng, alto, ancho)
+    contenido = None
+    if rng.random() < 0.75:
+        contenido, qr = rng.choice(qrs)
+        lado = rng.uniform(0.15, 0.45) * alto
+        centro = (rng.uniform(lado, ancho - lado), rng.uniform(lado * 0.75, alto - lado * 0.75))
+        sinteticos.colocar(cuadro, qr, lado, centro, rng.uniform(-30, 30))
+    cuadro = sinteticos.movimiento(cuadro, rng.choice((0, 0, 0, 4, 8, 14, 24)) * escala, rng.uniform(0, 180))
+    cuadro = sinteticos.desenfocar(cuadro, rng.choice((0.0, 0.0, 0.8, 1.5, 3.0)) * escala)
+    cuadro = sinteticos.exposicion(cuadro, *rng.choice(EXPOSICIONES))
+    cuadro = sinteticos.ruido(cuadro, rng, rng.uniform(0, 8))
+    return sinteticos.a_bgr(cuadro), contenido
+
+def medir_cuadros(cantidad, alto, ancho, decodificador, rng):
+    """Por cuadro: (nitidez, brillo, legible, segundos de decodificación, segundos de medición)."""
+    qrs = [(f"EST-{i:06d}", sinteticos.imagen_qr(f"EST-{i:06d}")) for i in range(8)]
+    filas = []
+    for _ in range(cantidad):
+        cuadro, contenido = generar_cuadro(rng, qrs, alto, ancho)
+        inicio = time.perf_counter()
+        nitidez, brillo = escaneo.medir_calidad(cuadro)
+        medido = time.perf_counter()
+        codigos = decodificador(cuadro)
+        decodificado = time.perf_counter()
+        legible = contenido is not None and [c.data for c in codigos] == [contenido.encode('utf-8')]
+        filas.append((nitidez, brillo, legible, decodificado - medido, medido - inicio))
+    return filas
+
+def evaluar(filas, nitidez_minima, brillo_minimo, brillo_maximo):
+    admitidos = [f for f in filas if brillo_minimo <= f[1] <= brillo_maximo and f[0] >= nitidez_minima]
+    legibles = sum(f[2] for f in filas)
+    return {
+        'salteados': 1 - len(admitidos) / len(filas),
+        'perdidos': (legibles - sum(f[2] for f in admitidos)) / legibles if legibles else 0.0,
+        'exito_sin_filtro': legibles / len(filas),
+        'exito_con_filtro': sum(f[2] for f in admitidos) / len(admitidos) if admitidos else 0.0,
+        'decodificacion_sin_filtro': sum(f[3] for f in filas),
+        'decodificacion_con_filtro': sum(f[3] for f in admitidos) + sum(f[4] for f in filas),
+    }
+
+def ajustar(filas, perdida_max):
+    """Umbrales que más cuadros saltean perdiendo como mucho perdida_max de los legibles."""
+    nitideces = sorted(f[0] for f in filas if f[2])
+    candidatos_nitidez = [0.0] + nitideces[:max(int(len(nitideces) * 0.1), 1)]
+    mejor = None
+    for brillo_minimo in range(0, 65, 5):
+        for brillo_maximo in range(255, 175, -5):
+            for nitidez_minima in candidatos_nitidez:
+                r = evaluar(filas, nitidez_minima, brillo_minimo, brillo_maximo)
+                if r['perdidos'] > perdida_max:
+                    break
+                # A igual cantidad de salteados, preferir umbrales con más margen
+                clave = (round(r['salteados'], 3), -nitidez_minima, -brillo_minimo, brillo_maximo)
+                if mejor is None or clave > mejor[0]:
+                    mejor = (clave, nitidez_minima, brillo_minimo, brillo_maximo)
+    return mejor[1:]
+
+def imprimir(titulo, r):
+    print(f"{titulo:<28} {r['salteados']:>10.1%} {r['perdidos']:>9.1%} {r['exito_sin_filtro']:>12.1%} "
+          f"{r['exito_con_filtro']:>12.1%} {r['decodificacion_sin_filtro']:>8.2f}s -> {r['decodificacion_con_filtro']:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtro de calidad de cuadros con cuadros sintéticos")
+    parser.add_argument('--cuadros', type=int, default=600)
+    parser.add_argument('--resolucion', choices=RESOLUCIONES, default='480p')
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--decodificador', choices=escaneo.DECODIFICADORES, default=escaneo.DECODIFICADOR_POR_DEFECTO)
+    parser.add_argument('--perdida-max', type=float, default=0.02, help="Fracción de cuadros legibles que se acepta perder")
+    parser.add_argument('--ajustar', action='store_true', help="Buscar los umbrales con estos cuadros")
+    args = parser.parse_args()
+
+    nombre_decodificador, decodificador = escaneo.obtener_decodificador(args.decodificador, alternativa='opencv')
+    alto, ancho = RESOLUCIONES[args.resolucion]
+    filas = medir_cuadros(args.cuadros, alto, ancho, decodificador, random.Random(args.semilla))
+    medicion_ms = sum(f[4] for f in filas) / len(filas) * 1000
+    decodificacion_ms = sum(f[3] for f in filas) / len(filas) * 1000
+
+    print(f"=== {args.cuadros} cuadros {args.resolucion}, decodificador '{nombre_decodificador}': "
+          f"{sum(f[2] for f in filas)} legibles; medir calidad {medicion_ms:.2f} ms/cuadro, "
+          f"decodificar {decodificacion_ms:.1f} ms/cuadro ===")
+    print(f"{'umbrales':<28} {'salteados':>10} {'perdidos':>9} {'éxito antes':>12} {'éxito ahora':>12} "
+          f"{'tiempo de decodificación':>24}")
+    actuales = (escaneo.NITIDEZ_MINIMA, escaneo.BRILLO_MINIMO, escaneo.BRILLO_MAXIMO)
+    resultado = evaluar(filas, *actuales)
+    imprimir("nitidez {:g}, brillo {:g}-{:g}".format(*actuales), resultado)
+    if args.ajustar:
+        sugeridos = ajustar(filas, args.perdida_max)
+        imprimir("nitidez {:.0f}, brillo {:g}-{:g}".format(*sugeridos), evaluar(filas, *sugeridos))
+        print(f"\nUmbrales sugeridos (perdiendo como mucho {args.perdida_max:.0%} de los legibles): "
+              f"NITIDEZ_MINIMA = {sugeridos[0]:.0f}, BRILLO_MINIMO = {sugeridos[1]:g}, BRILLO_MAXIMO = {sugeridos[2]:g}")
+
+    if resultado['perdidos'] > args.perdida_max:
+        print(f"\nFALLA: el filtro con los umbrales de escaneo.py pierde {resultado['perdidos']:.1%} de los cuadros "
+              f"legibles (máximo {args.perdida_max:.0%}).")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# Benchmark de impresión de credenciales (credenciales.py).
+#
+# Uso:
+#   python benchmarks/bench_credenciales.py                     # 5.000 estudiantes, PDF y PNG
+#   python benchmarks/bench_credenciales.py --estudiantes 600 --procesos 1
+#
+# Informa tiempo total, páginas por segundo, tamaño de salida y memoria máxima del proceso.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import credenciales
+
+def memoria_maxima_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:  # Windows
+        return float('nan')
+
+def tamano_mb(ruta):
+    if os.path.isdir(ruta):
+        return sum(os.path.getsize(os.path.join(ruta, f)) for f in os.listdir(ruta)) / 1e6
+    return os.path.getsize(ruta) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de hojas de credenciales")
+    parser.add_argument('--estudiantes', type=int, default=5_000)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--formatos', default='pdf,png')
+    args = parser.parse_args()
+
+    estudiantes = [(f"EST-{i:06d}", f"Estudiante Número {i}", f"{i % 6 + 1}A", "Informática")
+                   for i in range(args.estudiantes)]
+    por_pagina = credenciales.HOJA['columnas'] * credenciales.HOJA['filas']
+    print(f"=== Credenciales: {args.estudiantes} estudiantes, {por_pagina} por hoja (CPUs: {os.cpu_count()}) ===")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        for formato in args.formatos.split(','):
+            salida = os.path.join(carpeta, f"credenciales.{formato}" if formato == 'pdf' else "paginas")
+            inicio = time.perf_counter()
+            paginas = credenciales.renderizar_credenciales(estudiantes, salida, formato, procesos=args.procesos)
+            segundos = time.perf_counter() - inicio
+            print(f"{formato:<4} {paginas:>5} páginas  {segundos:>8.2f} s  {paginas / segundos:>7.1f} pág/s  "
+                  f"{args.estudiantes / segundos:>7.0f} credenciales/s  {tamano_mb(salida):>8.1f} MB")
+
+    print(f"Memoria máxima del proceso principal: {memoria_maxima_mb():.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Benchmark del camino de escaneo del lector (escaneo.procesar_cuadro, lo que hace video_loop).
+#
+# Uso:
+#   python benchmarks/bench_escaneo.py                              # guarda bench_escaneo_<fecha>.json
+#   python benchmarks/bench_escaneo.py --cuadros 20 -o base.json
+#   python benchmarks/bench_escaneo.py --comparar base.json          # sale con 1 si hay regresión
+#   python benchmarks/bench_escaneo.py --decodificador opencv         # equipos sin la librería zbar
+#
+# Los cuadros son sintéticos (sinteticos.py, QR dibujados con qrcode): 0, 1 o 3 códigos por
+# cuadro, en 480p/720p/1080p, con escala, rotación, desenfoque y ruido al azar (semilla fija).
+# No hace falta una cámara. Por caso informa cuadros por segundo, latencia p50/p99 y tasa de
+# éxito (se leyeron exactamente los códigos del cuadro; con 0 códigos, que no haya falsos).
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import escaneo
+import metricas
+import sinteticos
+
+RESOLUCIONES = {'480p': (480, 640), '720p': (720, 1280), '1080p': (1080, 1920)}
+CANTIDADES = (0, 1, 3)
+
+def medir_caso(alto, ancho, cantidad, qrs, decodificador, cuadros, rng):
+    latencias, exitos = [], 0
+    for _ in range(cuadros):
+        elegidos = rng.sample(qrs, cantidad)
+        cuadro = sinteticos.cuadro_con_varios(
+            [qr for _, qr in elegidos], rng, alto, ancho,
+            escala=rng.uniform(0.15, 0.5), angulo=rng.uniform(-45, 45),
+            desenfoque=rng.choice((0.0, 0.0, 0.8, 1.5)), sigma_ruido=rng.uniform(0, 10))
+        inicio = time.perf_counter()
+        codigos, _ = escaneo.procesar_cuadro(cuadro, decodificador)
+        latencias.append(time.perf_counter() - inicio)
+        exitos += {c.data for c in codigos} == {contenido.encode('utf-8') for contenido, _ in elegidos}
+    return {
+        'cuadros': cuadros,
+        'fps': len(latencias) / sum(latencias),
+        'p50_ms': metricas.percentil(latencias, 50) * 1000,
+        'p99_ms': metricas.percentil(latencias, 99) * 1000,
+        'exito': exitos / cuadros,
+    }
+
+def comparar(actual, previo, tolerancia):
+    """Lista de regresiones: latencia p50 más alta que la tolerancia o tasa de éxito más baja."""
+    regresiones = []
+    for caso, r in actual['casos'].items():
+        antes = previo.get('casos', {}).get(caso)
+        if not antes:
+            continue
+        if r['p50_ms'] > antes['p50_ms'] * (1 + tolerancia):
+            regresiones.append(f"{caso}: p50 {antes['p50_ms']:.1f} -> {r['p50_ms']:.1f} ms")
+        if r['exito'] < antes['exito'] - 0.02:
+            regresiones.append(f"{caso}: éxito {antes['exito']:.1%} -> {r['exito']:.1%}")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del camino de escaneo con cuadros sintéticos")
+    parser.add_argument('--cuadros', type=int, default=40, help="Cuadros por caso")
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--decodificador', choices=escaneo.DECODIFICADORES, default=escaneo.DECODIFICADOR_POR_DEFECTO)
+    parser.add_argument('-o', '--salida', help="Archivo JSON de resultados (por defecto bench_escaneo_<fecha>.json)")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument('--tolerancia', type=float, default=0.15, help="Aumento de p50 tolerado (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    import cv2
+    nombre_decodificador, decodificador = escaneo.obtener_decodificador(args.decodificador, alternativa='opencv')
+    rng = random.Random(args.semilla)
+    contenidos = [f"EST-{i:06d}" for i in range(12)]
+    qrs = [(contenido, sinteticos.imagen_qr(contenido)) for contenido in contenidos]
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'decodificador': nombre_decodificador,
+        'semilla': args.semilla,
+        'casos': {},
+    }
+    print(f"=== Escaneo sintético: {args.cuadros} cuadros por caso, decodificador '{nombre_decodificador}' ===")
+    print(f"{'caso':<12} {'cuadros/s':>10} {'p50':>9} {'p99':>9} {'éxito':>7}")
+    for nombre_resolucion, (alto, ancho) in RESOLUCIONES.items():
+        for cantidad in CANTIDADES:
+            caso = f"{nombre_resolucion}_{cantidad}qr"
+            r = medir_caso(alto, ancho, cantidad, qrs, decodificador, args.cuadros, rng)
+            resultado['casos'][caso] = r
+            print(f"{caso:<12} {r['fps']:>10.1f} {r['p50_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['exito']:>7.1%}")
+
+    salida = args.salida or f"bench_escaneo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            previo = json.load(archivo)
+        if previo.get('decodificador') != nombre_decodificador:
+            print(f"Aviso: la corrida anterior usó el decodificador '{previo.get('decodificador')}'.")
+        regresiones = comparar(resultado, previo, args.tolerancia)
+        if regresiones:
+            print("\nRegresiones respecto de", args.comparar)
+            for linea in regresiones:
+                print("  " + linea)
+            return 1
+        print(f"Sin regresiones respecto de {args.comparar}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# Fotos de evidencia (evidencias.AlmacenEvidencias): cuánto agregan al registro y qué pasa con
+# el disco lento y con la retención.
+#
+# Uso:
+#   python benchmarks/bench_evidencias.py                    # sale con 1 si algo no se cumple
+#   python benchmarks/bench_evidencias.py --grupos 300 --tamanio 3 --intervalo-ms 5 --escritura-lenta-ms 200
+#
+# Con una BD y una carpeta temporales se corre el trabajo del hilo de la BD del lector
+# (ProcesadorEscaneos.procesar_lote y, con fotos, AlmacenEvidencias.vincular) sobre grupos de
+# códigos (como en bench_lote_registro: nuevos, un repetido, uno ya registrado y uno desconocido)
+# con un cuadro sintético de 640x480 cada uno, un grupo cada --intervalo-ms. Se informa:
+#   registro    tiempo por lote en el hilo de la BD sin y con fotos (p50/p99): lo que se atrasa
+#               el próximo escaneo. El hilo de la cámara solo guarda una referencia al cuadro.
+#   vínculo     lo que tarda vincular() (consulta, inserción y encolado; nunca espera al disco)
+#   guardado    codificación JPEG y escritura por foto, tamaño medio
+#   disco lento cada escritura demora --escritura-lenta-ms: vincular sigue sin esperar y las
+#               fotos que no entran en la cola se descartan (sin fila en evidencias)
+#   retención   con un máximo chico el total queda debajo del máximo y las carpetas de días
+#               viejos se borran al iniciar
+# y se verifica que cada registro con foto apunte a un archivo que existe.
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comun
+import evidencias
+import metricas
+import procesador
+import sinteticos
+
+def con_cuadros(grupos, rng):
+    """(códigos, cuadro) por grupo de comun.armar_grupos: un cuadro sintético con un QR."""
+    qrs = [sinteticos.imagen_qr(f"EST-{i:06d}") for i in range(4)]
+    return [(codigos, sinteticos.cuadro_con_varios([rng.choice(qrs)], rng, sigma_ruido=rng.uniform(2, 6)))
+            for codigos in grupos]
+
+def correr(db_path, grupos, almacen, intervalo):
+    """Tiempo por lote en el hilo de la BD, con un lote cada 'intervalo' segundos."""
+    proc = procesador.ProcesadorEscaneos(db_path, hora_fin=procesador.hora(23, 59, 59))
+    proc.abrir_conexion()
+    tiempos = []
+    try:
+        for codigos, cuadro in grupos:
+            time.sleep(intervalo)
+            inicio = time.perf_counter()
+            resultados = proc.procesar_lote(codigos)
+            registrados = [(r.estudiante[0], cuadro) for r in resultados if r.estado == 'registrado']
+            if almacen and registrados:
+                almacen.vincular(proc.conectar(), registrados)
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        proc.cerrar_conexion()
+    return tiempos
+
+def vinculo(almacen):
+    return almacen.metricas.histogramas('evidencia_segundos')[(('paso', 'vinculo'),)]
+
+def verificar_vinculos(db_path, carpeta):
+    """(registros, con foto, fotos que faltan en disco)."""
+    with sqlite3.connect(db_path) as conn:
+        registros = conn.execute("SELECT COUNT(*) FROM asistencia").fetchone()[0]
+        rutas = [fila[0] for fila in conn.execute("SELECT ruta FROM evidencias")]
+    return registros, len(rutas), sum(not os.path.exists(os.path.join(carpeta, ruta)) for ruta in rutas)
+
+class AlmacenLento(evidencias.AlmacenEvidencias):
+    """Cada foto demora 'demora' segundos más en escribirse (disco lento o de red)."""
+
+    def __init__(self, *args, demora=0.2, **kwargs):
+        self.demora = demora
+        super().__init__(*args, **kwargs)
+
+    def _guardar(self, *args):
+        time.sleep(self.demora)
+        super()._guardar(*args)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fotos de evidencia: costo en el registro, disco lento y retención")
+    parser.add_argument('--grupos', type=int, default=200, help="Lotes registrados (un cuadro por lote)")
+    parser.add_argument('--tamanio', type=int, default=5,
+                        help="Códigos por lote: tamanio - 3 nuevos, un repetido, uno ya registrado y uno desconocido")
+    parser.add_argument('--intervalo-ms', type=float, default=20.0,
+                        help="Tiempo entre lotes (20 ms: 50 cuadros con códigos por segundo, más que un molinete)")
+    parser.add_argument('--escritura-lenta-ms', type=float, default=100.0)
+    parser.add_argument('--limite-ms', type=float, default=3.0, help="Máximo aceptable agregado al p50 del registro")
+    parser.add_argument('--semilla', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    estudiantes = args.grupos * args.tamanio
+    grupos = con_cuadros(comun.armar_grupos(args.grupos, args.tamanio, estudiantes, rng), rng)
+    base = tempfile.mkdtemp(prefix="bench_evidencias_")
+    fallas = []
+    try:
+        intervalo = args.intervalo_ms / 1000
+        sin_fotos = correr(comun.preparar_bd(base, "sin.db", estudiantes), grupos, None, intervalo)
+
+        carpeta = os.path.join(base, "fotos")
+        almacen = evidencias.AlmacenEvidencias(carpeta)
+        db_path = comun.preparar_bd(base, "con.db", estudiantes)
+        con_fotos = correr(db_path, grupos, almacen, intervalo)
+        almacen.esperar()
+        almacen.cerrar()
+        registros, con_foto, faltan = verificar_vinculos(db_path, carpeta)
+        guardado = {paso: almacen.metricas.histogramas('evidencia_segundos')[(('paso', paso),)]
+                    for paso in ('codificacion', 'escritura')}
+
+        print(f"=== {args.grupos} lotes de {args.tamanio} códigos, uno cada {args.intervalo_ms:.0f} ms, "
+              f"un cuadro 640x480 por lote ===")
+        print(f"{'registro':<12} {'p50':>9} {'p99':>9}")
+        for titulo, tiempos in (("sin fotos", sin_fotos), ("con fotos", con_fotos)):
+            print(f"{titulo:<12} {metricas.percentil(tiempos, 50) * 1000:>7.2f}ms "
+                  f"{metricas.percentil(tiempos, 99) * 1000:>7.2f}ms")
+        agregado = (metricas.percentil(con_fotos, 50) - metricas.percentil(sin_fotos, 50)) * 1000
+        print(f"vínculo      {vinculo(almacen).percentil(50) * 1000:>7.2f}ms {vinculo(almacen).percentil(99) * 1000:>7.2f}ms")
+        print(f"guardado     codificación p50 {guardado['codificacion'].percentil(50) * 1000:.1f} ms, escritura p50 "
+              f"{guardado['escritura'].percentil(50) * 1000:.1f} ms, {almacen.bytes_totales / max(almacen.guardadas, 1) / 1024:.0f} KiB "
+              f"por foto, {almacen.guardadas} fotos, {almacen.descartadas} descartadas")
+        print(f"vínculos     {registros} registros, {con_foto} con foto, {faltan} fotos faltantes")
+        if agregado > args.limite_ms:
+            fallas.append(f"las fotos agregan {agregado:.1f} ms al p50 del registro (máximo {args.limite_ms:.0f} ms)")
+        if con_foto != registros or faltan:
+            fallas.append("hay registros sin foto o fotos que no están en disco")
+
+        # Disco lento: la cola se llena y se descarta, pero encolar no espera
+        carpeta_lenta = os.path.join(base, "lentas")
+        lento = AlmacenLento(carpeta_lenta, demora=args.escritura_lenta_ms / 1000)
+        db_lenta = comun.preparar_bd(base, "lenta.db", estudiantes)
+        correr(db_lenta, grupos, lento, intervalo)
+        lento.esperar()
+        lento.cerrar()
+        registros, con_foto, faltan = verificar_vinculos(db_lenta, carpeta_lenta)
+        print(f"\ndisco lento  escritura +{args.escritura_lenta_ms:.0f} ms: vínculo p99 "
+              f"{vinculo(lento).percentil(99) * 1000:.2f} ms, {lento.guardadas} guardadas, {lento.descartadas} descartadas, "
+              f"{con_foto} de {registros} registros con foto, {faltan} faltantes")
+        if vinculo(lento).percentil(99) * 1000 > args.escritura_lenta_ms / 2 or faltan:
+            fallas.append("con el disco lento vincular esperó o quedaron vínculos a fotos no guardadas")
+
+        # Retención: carpetas viejas y un máximo de 20 fotos aproximadamente
+        carpeta_ret = os.path.join(base, "retencion")
+        viejo = os.path.join(carpeta_ret, str(date.today() - timedelta(days=evidencias.DIAS_RETENCION + 1)))
+        os.makedirs(viejo)
+        shutil.copy(os.path.join(carpeta, next(ruta for ruta, _ in almacen._archivos)), os.path.join(viejo, "080000_1.jpg"))
+        maximo = int(almacen.bytes_totales / max(almacen.guardadas, 1) * 20)
+        retencion = evidencias.AlmacenEvidencias(carpeta_ret, maximo_bytes=maximo)
+        for numero, (_, cuadro) in enumerate(grupos):
+            retencion.encolar(cuadro, numero)
+            retencion.esperar()
+        retencion.cerrar()
+        en_disco = sum(os.path.getsize(os.path.join(raiz, nombre))
+                       for raiz, _, nombres in os.walk(carpeta_ret) for nombre in nombres)
+        print(f"retención    máximo {maximo / 1024:.0f} KiB: {en_disco / 1024:.0f} KiB en disco, {retencion.borradas} borradas, "
+              f"carpeta vieja {'borrada' if not os.path.exists(viejo) else 'TODAVÍA ESTÁ'}")
+        if en_disco > maximo or os.path.exists(viejo):
+            fallas.append("la retención no respetó el máximo o la antigüedad")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    for falla in fallas:
+        print(f"FALLA: {falla}")
+    return 1 if fallas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# Benchmark de la validación de QR firmados (firma_qr.py) frente a la búsqueda en la base.
+#
+# Uso:
+#   python benchmarks/bench_firma_qr.py
+#   python benchmarks/bench_firma_qr.py --estudiantes 50000 --codigos 20000
+#
+# Compara, por código escaneado: verificar la firma en memoria (válido y falsificado) contra
+# la consulta por id_unico_qr que hacía el lector para cualquier código, incluso uno inventado.
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import firma_qr
+
+def medir(nombre, funcion, codigos):
+    inicio = time.perf_counter()
+    rechazados = sum(1 for codigo in codigos if funcion(codigo) is None)
+    segundos = time.perf_counter() - inicio
+    print(f"{nombre:<40} {segundos / len(codigos) * 1e6:>8.1f} µs/código  (rechazados {rechazados}/{len(codigos)})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de QR firmados")
+    parser.add_argument('--estudiantes', type=int, default=20_000)
+    parser.add_argument('--codigos', type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_llavero = os.path.join(carpeta, "claves_qr.json")
+        firma_qr.rotar_clave(ruta_llavero)
+        llavero = firma_qr.cargar_llavero(ruta_llavero)
+
+        conn = sqlite3.connect(os.path.join(carpeta, "asistencia.db"))
+        conn.execute("CREATE TABLE estudiantes (id INTEGER PRIMARY KEY, id_unico_qr TEXT UNIQUE NOT NULL)")
+        conn.executemany("INSERT INTO estudiantes (id_unico_qr) VALUES (?)",
+                         ((f"EST-{i:06d}",) for i in range(args.estudiantes)))
+        conn.commit()
+
+        validos = [firma_qr.firmar(f"EST-{rng.randrange(args.estudiantes):06d}", llavero) for _ in range(args.codigos)]
+        falsos = [codigo[:-4] + "AAAA" for codigo in validos]
+        basura = [f"EST-{rng.randrange(10**9):09d}" for _ in range(args.codigos)]
+
+        def verificar(codigo):
+            return firma_qr.verificar(codigo, llavero)[0]
+
+        def buscar(codigo):
+            return conn.execute("SELECT id FROM estudiantes WHERE id_unico_qr = ?", (codigo,)).fetchone()
+
+        def buscar_como_lector(codigo):
+            # buscar_estudiante abre una conexión nueva por cada código
+            with sqlite3.connect(os.path.join(carpeta, "asistencia.db")) as otra:
+                fila = otra.execute("SELECT id FROM estudiantes WHERE id_unico_qr = ?", (codigo,)).fetchone()
+            otra.close()
+            return fila
+
+        print(f"=== {args.codigos} códigos, {args.estudiantes} estudiantes ===")
+        medir("firma en memoria, códigos válidos", verificar, validos)
+        medir("firma en memoria, códigos falsificados", verificar, falsos)
+        medir("BD (conexión abierta), códigos inventados", buscar, basura)
+        medir("BD (conexión por código), inventados", buscar_como_lector, basura)
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Benchmark de generación de QR en lote (lote_qr.py).
+#
+# Uso:
+#   python benchmarks/bench_lote_qr.py                 # 10.000 códigos
+#   python benchmarks/bench_lote_qr.py --codigos 2000 --procesos 4
+#
+# Mide: generación secuencial (1 proceso), generación en paralelo en una carpeta vacía y una
+# segunda pasada sobre la misma carpeta, donde todos los PNG ya existen sin cambios.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lote_qr
+
+def medir(nombre, funcion, cantidad):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    print(f"{nombre:<36} {segundos:>8.2f} s  {cantidad / segundos:>9.0f} códigos/s  "
+          f"(generados {resultado['generados']}, omitidos {resultado['omitidos']}, errores {len(resultado['errores'])})")
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de generación de QR en lote")
+    parser.add_argument('--codigos', type=int, default=10_000)
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument('--muestra-secuencial', type=int, default=1_000,
+                        help="Códigos para la medición secuencial (se extrapola al total)")
+    args = parser.parse_args()
+
+    estudiantes = [(f"EST-{i:06d}", f"Estudiante {i}") for i in range(args.codigos)]
+    print(f"=== Generación de {args.codigos} QR (CPUs: {os.cpu_count()}) ===")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        muestra = estudiantes[:args.muestra_secuencial]
+        medir(f"secuencial ({len(muestra)} códigos)",
+              lambda: lote_qr.generar_lote(os.path.join(carpeta, 'secuencial'), muestra, procesos=1),
+              len(muestra))
+
+        destino = os.path.join(carpeta, 'paralelo')
+        medir("paralelo, carpeta vacía",
+              lambda: lote_qr.generar_lote(destino, estudiantes, procesos=args.procesos), args.codigos)
+        medir("paralelo, sin cambios (omitidos)",
+              lambda: lote_qr.generar_lote(destino, estudiantes, procesos=args.procesos), args.codigos)
+
+        # Cambiar los parámetros de dibujo invalida todas las claves de contenido
+        parametros = dict(lote_qr.PARAMETROS_QR, border=2)
+        medir("paralelo, parámetros cambiados",
+              lambda: lote_qr.generar_lote(destino, estudiantes, parametros, procesos=args.procesos), args.codigos)
+
+if __name__ == "__main__":
+    main()
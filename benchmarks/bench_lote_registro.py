@@ -0,0 +1,77 @@
+# Registro de grupos: un escaneo por vez (ProcesadorEscaneos.procesar) contra el lote
+# (ProcesadorEscaneos.procesar_lote).
+#
+# Uso:
+#   python benchmarks/bench_lote_registro.py                 # sale con 1 si el lote registra distinto
+#   python benchmarks/bench_lote_registro.py --grupos 100 --tamanio 8 --estudiantes 5000
+#
+# Se arma una BD temporal con --estudiantes y se registran --grupos grupos de --tamanio códigos
+# (un grupo = los códigos leídos en un mismo cuadro). Cada grupo mezcla códigos nuevos, uno
+# repetido dentro del grupo, un estudiante que ya marcó y un código desconocido. Se informa el
+# tiempo por grupo y por registro de cada forma y se verifica que ambas dejen la misma tabla
+# asistencia y devuelvan los mismos estados, en el mismo orden.
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comun
+import procesador
+
+def correr(db_path, grupos, en_lote):
+    proc = procesador.ProcesadorEscaneos(db_path, hora_fin=procesador.hora(23, 59, 59))
+    proc.abrir_conexion()
+    estados, tiempos = [], []
+    try:
+        for grupo in grupos:
+            inicio = time.perf_counter()
+            if en_lote:
+                resultados = proc.procesar_lote(grupo)
+            else:
+                resultados = [proc.procesar(contenido) for contenido in grupo]
+            tiempos.append(time.perf_counter() - inicio)
+            estados.append([r.estado for r in resultados])
+    finally:
+        proc.cerrar_conexion()
+    with sqlite3.connect(db_path) as conn:
+        tabla = sorted(conn.execute("SELECT student_id, fecha FROM asistencia").fetchall())
+    return estados, tiempos, tabla
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de grupos de escaneos uno por uno y en lote")
+    parser.add_argument('--grupos', type=int, default=200)
+    parser.add_argument('--tamanio', type=int, default=6, help="Códigos por grupo (por cuadro)")
+    parser.add_argument('--estudiantes', type=int, default=20000)
+    parser.add_argument('--semilla', type=int, default=7)
+    args = parser.parse_args()
+
+    grupos = comun.armar_grupos(args.grupos, args.tamanio, args.estudiantes, random.Random(args.semilla))
+    carpeta = tempfile.mkdtemp(prefix="bench_lote_")
+    try:
+        uno = correr(comun.preparar_bd(carpeta, "uno.db", args.estudiantes), grupos, en_lote=False)
+        lote = correr(comun.preparar_bd(carpeta, "lote.db", args.estudiantes), grupos, en_lote=True)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    print(f"=== {args.grupos} grupos de {args.tamanio} códigos, {args.estudiantes} estudiantes ===")
+    print(f"{'forma':<14} {'por grupo':>10} {'por código':>11} {'registros':>10}")
+    for titulo, (_, tiempos, tabla) in (("uno por uno", uno), ("en lote", lote)):
+        total = sum(tiempos)
+        print(f"{titulo:<14} {total / len(tiempos) * 1000:>8.2f}ms {total / (len(tiempos) * args.tamanio) * 1000:>9.3f}ms "
+              f"{len(tabla):>10}")
+
+    if uno[0] != lote[0] or uno[2] != lote[2]:
+        print("\nFALLA: el lote no devuelve los mismos estados o no deja la misma tabla asistencia.")
+        return 1
+    print("\nOK: mismos estados, en el mismo orden, y mismos registros.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
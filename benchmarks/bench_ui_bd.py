@@ -0,0 +1,187 @@
+# Latencia de la interfaz del lector mientras la BD está lenta.
+#
+# Uso:
+#   python benchmarks/bench_ui_bd.py                       # sale con 1 si la vista se congela
+#   python benchmarks/bench_ui_bd.py --demora-ms 200 --escaneos 30
+#
+# Reemplaza el bucle de Tk por uno equivalente (callbacks de root.after en una cola, un cuadro
+# de vista previa cada 33 ms) para correr sin pantalla. Se compara:
+#   antes   el escaneo se procesa dentro del bucle de la interfaz (root.after -> process_qr_code),
+#           que redibuja el panel y cuenta las estadísticas en la BD por cada escaneo
+#   ahora   SistemaAsistenciaQR.process_qr_code lo encola en procesador.EjecutorBD y el panel
+#           (panel_escaneos.PanelEscaneos) se redibuja a ritmo acotado desde memoria
+# en dos escenarios:
+#   BD lenta  cada acceso a SQLite se demora --demora-ms; "ahora" debe mantener el hueco máximo
+#             entre cuadros de la vista previa cerca de 33 ms sin importar la demora
+#   ráfaga    --rafaga escaneos seguidos sin demora; cuenta redibujos del panel y consultas de
+#             estadísticas (antes, uno de cada por escaneo)
+# y se verifica que todos los escaneos se registren en orden.
+
+import argparse
+import os
+import queue
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comun
+import metricas
+import procesador
+import pruebadeqr
+
+PERIODO_CUADRO = 1 / 30
+
+class ProcesadorLento(procesador.ProcesadorEscaneos):
+    """Cada consulta a la BD espera 'demora' segundos antes de conectarse (disco lento)."""
+
+    def __init__(self, *args, demora=0.1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.demora = demora
+        self.consultas_estadisticas = 0
+
+    def conectar(self):
+        time.sleep(self.demora)
+        return super().conectar()
+
+    def estadisticas_del_dia(self):
+        self.consultas_estadisticas += 1
+        return super().estadisticas_del_dia()
+
+class BucleInterfaz:
+    """Sustituto del mainloop de Tk: atiende callbacks de after() y pinta un cuadro cada 33 ms."""
+
+    def __init__(self):
+        self.cola = queue.SimpleQueue()
+        self.agendados = []
+        self.cuadros = []
+
+    def after(self, ms, funcion, *args):
+        if ms:
+            self.agendados.append((time.perf_counter() + ms / 1000, funcion, args))
+        else:
+            self.cola.put((funcion, args))
+
+    def correr(self, hasta):
+        siguiente = time.perf_counter()
+        while not hasta():
+            ahora = time.perf_counter()
+            if ahora >= siguiente:
+                self.cuadros.append(ahora)   # update_video_frame
+                siguiente = ahora + PERIODO_CUADRO
+            for agendado in [a for a in self.agendados if a[0] <= ahora]:
+                self.agendados.remove(agendado)
+                self.cola.put(agendado[1:])
+            try:
+                funcion, args = self.cola.get(timeout=min(max(siguiente - time.perf_counter(), 0), 0.005))
+            except queue.Empty:
+                continue
+            funcion(*args)
+
+    def hueco_maximo(self):
+        return max((b - a for a, b in zip(self.cuadros, self.cuadros[1:])), default=0.0)
+
+def armar_sistema(db_path, demora, bucle):
+    """SistemaAsistenciaQR sin ventana: los widgets se reemplazan por registros de lo mostrado."""
+    sistema = pruebadeqr.SistemaAsistenciaQR.__new__(pruebadeqr.SistemaAsistenciaQR)
+    sistema.root = bucle
+    sistema.metricas = metricas.Metricas()
+    sistema.bitacora = pruebadeqr.bitacora.Bitacora("lector")
+    sistema.HORA_INICIO_INGRESO, sistema.HORA_FIN_INGRESO = procesador.hora(0, 0), procesador.hora(23, 59, 59)
+    # El mismo estado que arma __init__ (el hilo de la BD arranca recién con el primer envío)
+    sistema.preparar_registro(ProcesadorLento(db_path, hora_fin=sistema.HORA_FIN_INGRESO, demora=demora,
+                                              metricas_lector=sistema.metricas))
+    sistema.redibujos = 0
+    sistema.update_info_text = lambda mensaje: setattr(sistema, 'redibujos', sistema.redibujos + 1)
+    sistema.stats_label = types.SimpleNamespace(configure=lambda **kwargs: None)
+    return sistema
+
+def correr(modo, db_path, demora, escaneos, intervalo):
+    bucle = BucleInterfaz()
+    sistema = armar_sistema(db_path, demora, bucle)
+
+    def camara():
+        # El hilo de captura entrega un código nuevo cada 'intervalo' segundos
+        for i in range(escaneos):
+            time.sleep(intervalo)
+            if modo == 'antes':
+                bucle.after(0, procesar_en_interfaz, f"EST-{i:06d}")
+            else:
+                sistema.process_qr_code(f"EST-{i:06d}", time.perf_counter())
+
+    procesados = []
+
+    def procesar_en_interfaz(qr_data):
+        # El camino anterior: todo en el hilo de Tk, un redibujo y un conteo por escaneo
+        resultado = sistema.procesador.procesar(qr_data)
+        sistema.update_info_text(sistema.mensaje_resultado(qr_data, resultado))
+        if resultado.estado == 'registrado':
+            sistema.mostrar_estadisticas(sistema.procesador.estadisticas_del_dia())
+        procesados.append(qr_data)
+
+    if modo == 'antes':
+        terminado = lambda: len(procesados) >= escaneos
+    else:
+        terminado = lambda: sistema.panel.agregados >= escaneos and not sistema.panel.pendiente
+
+    hilo = threading.Thread(target=camara, daemon=True)
+    inicio = time.perf_counter()
+    hilo.start()
+    bucle.correr(hasta=terminado)
+    duracion = time.perf_counter() - inicio
+    if modo == 'ahora':
+        sistema.ejecutor_bd.cerrar()
+
+    with sqlite3.connect(db_path) as conn:
+        orden = [fila[0] for fila in conn.execute(
+            "SELECT e.id_unico_qr FROM asistencia a JOIN estudiantes e ON e.id = a.student_id ORDER BY a.id")]
+        conn.execute("DELETE FROM asistencia")
+    en_orden = orden == [f"EST-{i:06d}" for i in range(escaneos)]
+    return bucle.hueco_maximo(), duracion, en_orden, sistema.redibujos, sistema.procesador.consultas_estadisticas
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de la vista previa con la BD lenta")
+    parser.add_argument('--demora-ms', type=float, default=120.0, help="Demora agregada a cada acceso a la BD")
+    parser.add_argument('--escaneos', type=int, default=15)
+    parser.add_argument('--intervalo-ms', type=float, default=150.0, help="Tiempo entre códigos leídos")
+    parser.add_argument('--limite-ms', type=float, default=100.0, help="Hueco máximo aceptable entre cuadros")
+    parser.add_argument('--rafaga', type=int, default=200, help="Escaneos del escenario de ráfaga (uno cada 5 ms)")
+    args = parser.parse_args()
+
+    escenarios = [
+        (f"BD lenta: cada acceso demorado {args.demora_ms:.0f} ms, {args.escaneos} escaneos, "
+         f"uno cada {args.intervalo_ms:.0f} ms", args.demora_ms / 1000, args.escaneos, args.intervalo_ms / 1000),
+        (f"Ráfaga: {args.rafaga} escaneos, uno cada 5 ms, BD sin demora", 0.0, args.rafaga, 0.005),
+    ]
+    carpeta = tempfile.mkdtemp(prefix="bench_ui_bd_")
+    resultados = {}
+    try:
+        db_path = comun.preparar_bd(carpeta, "asistencia.db", max(args.escaneos, args.rafaga))
+        for numero, (titulo, demora, escaneos, intervalo) in enumerate(escenarios):
+            print(f"=== {titulo} ===")
+            print(f"{'modo':<8} {'hueco máx. entre cuadros':>26} {'duración':>10} {'redibujos':>10} "
+                  f"{'estadísticas':>13} {'orden':>7}")
+            for modo in ('antes', 'ahora'):
+                hueco, duracion, en_orden, redibujos, consultas = correr(modo, db_path, demora, escaneos, intervalo)
+                resultados[numero, modo] = (hueco, en_orden)
+                print(f"{modo:<8} {hueco * 1000:>24.0f}ms {duracion:>9.2f}s {redibujos:>10} {consultas:>13} "
+                      f"{'ok' if en_orden else 'MAL':>7}")
+            print()
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    hueco, _ = resultados[0, 'ahora']
+    if hueco * 1000 > args.limite_ms or not all(en_orden for _, en_orden in resultados.values()):
+        print(f"FALLA: con el ejecutor de la BD el hueco máximo debe ser menor a {args.limite_ms:.0f} ms "
+              f"y los registros deben quedar en orden.")
+        return 1
+    print(f"OK: la vista previa no espera a la BD (límite {args.limite_ms:.0f} ms) y el orden se mantiene.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# Ayudas compartidas por los benchmarks que registran asistencia sobre una BD temporal
+# (bench_lote_registro, bench_evidencias, bench_ui_bd). Los percentiles de listas de muestras
+# están en metricas.percentil.
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import procesador
+
+def preparar_bd(carpeta, nombre, cantidad):
+    """BD con las tablas del lector y 'cantidad' estudiantes EST-000000, EST-000001, ..."""
+    db_path = os.path.join(carpeta, nombre)
+    with sqlite3.connect(db_path) as conn:
+        procesador.crear_tablas(conn)
+        conn.executemany("INSERT INTO estudiantes (nombre_y_apellido, id_unico_qr) VALUES (?, ?)",
+                         ((f"Estudiante {i}", f"EST-{i:06d}") for i in range(cantidad)))
+    return db_path
+
+def armar_grupos(grupos, tamanio, estudiantes, rng):
+    """Grupos de códigos con un repetido, un estudiante del grupo anterior y un desconocido."""
+    disponibles = list(range(estudiantes))
+    rng.shuffle(disponibles)
+    resultado, anterior = [], None
+    for _ in range(grupos):
+        nuevos = [f"EST-{disponibles.pop():06d}" for _ in range(max(tamanio - 3, 1))]
+        grupo = nuevos + [nuevos[0], anterior or nuevos[-1], f"EST-X{rng.randrange(10 ** 6):06d}"]
+        rng.shuffle(grupo)
+        resultado.append(grupo)
+        anterior = nuevos[0]
+    return resultado
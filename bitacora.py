@@ -0,0 +1,113 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+
+# --- 1. BITÁCORA ESTRUCTURADA ---
+#
+# Reemplaza los print de diagnóstico del camino de escaneo. Cada entrada es un evento con campos
+# (evento clave=valor ...). El hilo que registra solo encola el registro; el formateo y la
+# escritura en la consola o el archivo los hace un hilo de fondo (QueueListener), así una consola
+# lenta no frena el hilo de Tk. Con el nivel por defecto (WARNING) los eventos de diagnóstico
+# se descartan con una sola comparación antes de armar nada.
+#
+# ASISTENCIA_LOG_NIVEL    DEBUG, INFO, WARNING (por defecto) o ERROR
+# ASISTENCIA_LOG_ARCHIVO  archivo de destino (por defecto, la salida de errores)
+# ASISTENCIA_LOG_FORMATO  texto (por defecto) o json (una línea JSON por evento)
+
+RAIZ = "asistencia"
+NIVEL_POR_DEFECTO = "WARNING"
+FORMATOS = ('texto', 'json')
+NIVELES = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+_oyente = None
+
+class FormatoTexto(logging.Formatter):
+    """2025-03-10 08:01:02.345 DEBUG lector busqueda_estudiante id_qr='EST-1' encontrado=True"""
+
+    def format(self, registro):
+        fecha = datetime.fromtimestamp(registro.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        origen = registro.name.rpartition('.')[2]
+        campos = " ".join(f"{clave}={valor!r}" for clave, valor in getattr(registro, 'campos', {}).items())
+        linea = f"{fecha} {registro.levelname} {origen} {registro.getMessage()}"
+        return f"{linea} {campos}" if campos else linea
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por evento, para cargarla con pandas o jq."""
+
+    def format(self, registro):
+        entrada = {
+            'fecha': datetime.fromtimestamp(registro.created).isoformat(timespec='milliseconds'),
+            'nivel': registro.levelname,
+            'origen': registro.name.rpartition('.')[2],
+            'evento': registro.getMessage(),
+        }
+        entrada.update(getattr(registro, 'campos', {}))
+        return json.dumps(entrada, ensure_ascii=False, default=str)
+
+def configurar(nivel=None, archivo=None, formato=None):
+    """Conecta la bitácora a su hilo de escritura (una sola vez por proceso).
+
+    Los parámetros que no se indiquen se toman de las variables de entorno.
+    """
+    global _oyente
+    nivel = (nivel or os.environ.get("ASISTENCIA_LOG_NIVEL") or NIVEL_POR_DEFECTO).upper()
+    archivo = archivo or os.environ.get("ASISTENCIA_LOG_ARCHIVO")
+    formato = formato or os.environ.get("ASISTENCIA_LOG_FORMATO") or 'texto'
+    if nivel not in NIVELES:
+        raise ValueError(f"Nivel de bitácora desconocido: {nivel}. Opciones: {', '.join(NIVELES)}")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de bitácora desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+
+    raiz = logging.getLogger(RAIZ)
+    raiz.setLevel(nivel)
+    if _oyente is not None:
+        return
+    destino = logging.FileHandler(archivo, encoding='utf-8') if archivo else logging.StreamHandler(sys.stderr)
+    destino.setFormatter(FormatoJSON() if formato == 'json' else FormatoTexto())
+
+    cola = queue.SimpleQueue()
+    raiz.addHandler(logging.handlers.QueueHandler(cola))
+    raiz.propagate = False
+    _oyente = logging.handlers.QueueListener(cola, destino)
+    _oyente.start()
+    atexit.register(detener)
+
+def detener():
+    """Vacía la cola y detiene el hilo de escritura."""
+    global _oyente
+    if _oyente is not None:
+        _oyente.stop()
+        for manejador in _oyente.handlers:
+            manejador.close()
+        _oyente = None
+
+class Bitacora:
+    """Eventos con campos para una parte del sistema (lector, base de datos, ...)."""
+
+    def __init__(self, origen):
+        self._logger = logging.getLogger(f"{RAIZ}.{origen}")
+
+    def activa(self, nivel=logging.DEBUG):
+        """Para saltear el armado de campos costosos cuando el nivel está apagado."""
+        return self._logger.isEnabledFor(nivel)
+
+    def _registrar(self, nivel, evento, campos):
+        if self._logger.isEnabledFor(nivel):
+            self._logger.log(nivel, evento, extra={'campos': campos})
+
+    def debug(self, evento, **campos):
+        self._registrar(logging.DEBUG, evento, campos)
+
+    def info(self, evento, **campos):
+        self._registrar(logging.INFO, evento, campos)
+
+    def warning(self, evento, **campos):
+        self._registrar(logging.WARNING, evento, campos)
+
+    def error(self, evento, **campos):
+        self._registrar(logging.ERROR, evento, campos)
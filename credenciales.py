@@ -0,0 +1,265 @@
+import argparse
+import os
+import sqlite3
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import firma_qr
+import lote_qr
+
+# --- 1. CONFIGURACIÓN DE LA HOJA ---
+
+CREDENCIALES_FOLDER = os.path.join(os.path.expanduser("~"), "Documents", "CREDENCIALES QR")
+
+# Hoja A4 a 300 dpi con una grilla de 3 x 4 credenciales
+HOJA = {
+    'ancho': 2480,
+    'alto': 3508,
+    'dpi': 300,
+    'margen': 100,
+    'columnas': 3,
+    'filas': 4,
+}
+
+def consultar_roster(db_path="asistencia.db", curso=None, carrera=None):
+    """Estudiantes a imprimir: (id_unico_qr, nombre_y_apellido, curso, carrera) ordenados por nombre."""
+    sql = "SELECT id_unico_qr, nombre_y_apellido, curso, carrera FROM estudiantes"
+    condiciones, params = [], []
+    if curso:
+        condiciones.append("curso = ?")
+        params.append(curso)
+    if carrera:
+        condiciones.append("carrera = ?")
+        params.append(carrera)
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY curso, nombre_y_apellido"
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+# --- 2. DIBUJO DE PÁGINAS ---
+
+def _fuente(tamano):
+    from PIL import ImageFont
+    for nombre in ("arial.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=tamano)
+
+def _recortar_texto(draw, texto, fuente, ancho_maximo):
+    """Acorta el texto con '…' hasta que entre en el ancho indicado."""
+    if draw.textlength(texto, font=fuente) <= ancho_maximo:
+        return texto
+    while texto and draw.textlength(texto + "…", font=fuente) > ancho_maximo:
+        texto = texto[:-1]
+    return texto + "…"
+
+def dibujar_pagina(estudiantes, hoja=None, parametros_qr=None):
+    """Dibuja una hoja con una credencial (QR + nombre + datos) por estudiante."""
+    from PIL import Image, ImageDraw
+    hoja = hoja or HOJA
+    pagina = Image.new('L', (hoja['ancho'], hoja['alto']), 255)
+    draw = ImageDraw.Draw(pagina)
+
+    ancho_celda = (hoja['ancho'] - 2 * hoja['margen']) // hoja['columnas']
+    alto_celda = (hoja['alto'] - 2 * hoja['margen']) // hoja['filas']
+    lado_qr = min(ancho_celda, alto_celda) - 220
+    fuente_nombre = _fuente(44)
+    fuente_datos = _fuente(32)
+
+    for i, estudiante in enumerate(estudiantes):
+        id_unico, nombre, curso, carrera = estudiante[:4]
+        payload = estudiante[4] if len(estudiante) > 4 and estudiante[4] is not None else id_unico
+        x = hoja['margen'] + (i % hoja['columnas']) * ancho_celda
+        y = hoja['margen'] + (i // hoja['columnas']) * alto_celda
+
+        # Línea de corte
+        draw.rectangle([x, y, x + ancho_celda - 1, y + alto_celda - 1], outline=0, width=2)
+
+        qr = lote_qr.crear_imagen_qr(payload, parametros_qr).get_image().convert('L')
+        qr = qr.resize((lado_qr, lado_qr), Image.NEAREST)
+        pagina.paste(qr, (x + (ancho_celda - lado_qr) // 2, y + 30))
+
+        centro = x + ancho_celda // 2
+        texto_y = y + 30 + lado_qr + 20
+        nombre = _recortar_texto(draw, nombre or "-", fuente_nombre, ancho_celda - 40)
+        draw.text((centro, texto_y), nombre, fill=0, font=fuente_nombre, anchor='ma')
+        datos = _recortar_texto(draw, f"{id_unico} · {curso or '-'} · {carrera or '-'}", fuente_datos, ancho_celda - 40)
+        draw.text((centro, texto_y + 60), datos, fill=60, font=fuente_datos, anchor='ma')
+
+    return pagina
+
+def _renderizar_pagina(tarea):
+    """Trabajo de cada proceso: dibuja una página y la guarda como PNG o la devuelve lista para el PDF."""
+    from PIL import Image
+    numero, estudiantes, hoja, parametros_qr, ruta_png = tarea
+    pagina = dibujar_pagina(estudiantes, hoja, parametros_qr)
+    if ruta_png:
+        lote_qr._escribir_atomico(ruta_png, lambda archivo: pagina.save(archivo, format='PNG', dpi=(hoja['dpi'],) * 2))
+        return numero, ruta_png
+    # En blanco y negro puro (1 bit por pixel, comprimido) la página ocupa una fracción del tamaño en grises
+    pagina = pagina.convert('1', dither=Image.Dither.NONE)
+    return numero, (pagina.width, pagina.height, zlib.compress(pagina.tobytes(), 6))
+
+# --- 3. ESCRITURA DEL PDF ---
+
+class EscritorPDF:
+    """PDF mínimo que agrega páginas (una imagen de 1 bit por página) a medida que llegan.
+
+    Cada página se escribe y se libera de inmediato; el árbol de páginas y la tabla xref se
+    escriben al cerrar, así que el costo por página no crece con el tamaño del documento.
+    """
+
+    def __init__(self, ruta, dpi):
+        self.archivo = open(ruta, 'wb')
+        self.dpi = dpi
+        self.offsets = {}
+        self.paginas = []
+        self.siguiente = 3  # 1 = catálogo y 2 = árbol de páginas, se escriben al final
+        self.archivo.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _objeto(self, cuerpo, stream=None, numero=None):
+        if numero is None:
+            numero = self.siguiente
+            self.siguiente += 1
+        self.offsets[numero] = self.archivo.tell()
+        self.archivo.write(f"{numero} 0 obj\n".encode('ascii') + cuerpo)
+        if stream is not None:
+            self.archivo.write(b"\nstream\n" + stream + b"\nendstream")
+        self.archivo.write(b"\nendobj\n")
+        return numero
+
+    def agregar_pagina(self, ancho, alto, datos):
+        """Agrega una página a partir de los bits empaquetados y comprimidos con zlib."""
+        ancho_pt = ancho * 72 / self.dpi
+        alto_pt = alto * 72 / self.dpi
+        imagen = self._objeto(
+            (f"<< /Type /XObject /Subtype /Image /Width {ancho} /Height {alto} /ColorSpace /DeviceGray "
+             f"/BitsPerComponent 1 /Filter /FlateDecode /Length {len(datos)} >>").encode('ascii'),
+            datos)
+        contenido = f"q {ancho_pt:.2f} 0 0 {alto_pt:.2f} 0 0 cm /Im0 Do Q".encode('ascii')
+        contenido_num = self._objeto(f"<< /Length {len(contenido)} >>".encode('ascii'), contenido)
+        pagina = self._objeto(
+            (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ancho_pt:.2f} {alto_pt:.2f}] "
+             f"/Resources << /XObject << /Im0 {imagen} 0 R >> >> /Contents {contenido_num} 0 R >>").encode('ascii'))
+        self.paginas.append(pagina)
+
+    def cerrar(self):
+        hijos = " ".join(f"{p} 0 R" for p in self.paginas)
+        self._objeto(f"<< /Type /Pages /Kids [{hijos}] /Count {len(self.paginas)} >>".encode('ascii'), numero=2)
+        self._objeto(b"<< /Type /Catalog /Pages 2 0 R >>", numero=1)
+
+        inicio_xref = self.archivo.tell()
+        total = self.siguiente
+        self.archivo.write(f"xref\n0 {total}\n0000000000 65535 f \n".encode('ascii'))
+        for numero in range(1, total):
+            self.archivo.write(f"{self.offsets[numero]:010d} 00000 n \n".encode('ascii'))
+        self.archivo.write(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode('ascii'))
+        self.archivo.close()
+
+# --- 4. RENDERIZADO DE LA TANDA ---
+
+def paginar(estudiantes, por_pagina):
+    for inicio in range(0, len(estudiantes), por_pagina):
+        yield estudiantes[inicio:inicio + por_pagina]
+
+def renderizar_credenciales(estudiantes, salida, formato='pdf', hoja=None, parametros_qr=None, procesos=None):
+    """Dibuja las hojas de credenciales en paralelo y las escribe a disco de a una.
+
+    formato='pdf': 'salida' es el archivo PDF (las páginas se agregan en orden a medida que terminan).
+    formato='png': 'salida' es una carpeta con una imagen por página.
+    Como mucho hay 2 páginas por proceso en memoria a la vez. Devuelve la cantidad de páginas.
+    """
+    hoja = hoja or HOJA
+    por_pagina = hoja['columnas'] * hoja['filas']
+    if formato == 'png':
+        os.makedirs(salida, exist_ok=True)
+    elif formato != 'pdf':
+        raise ValueError(f"Formato no soportado: {formato}. Use 'pdf' o 'png'")
+
+    def tareas():
+        for numero, grupo in enumerate(paginar(estudiantes, por_pagina), start=1):
+            ruta_png = os.path.join(salida, f"credenciales_{numero:04d}.png") if formato == 'png' else None
+            yield numero, grupo, hoja, parametros_qr, ruta_png
+
+    paginas = 0
+    temporal = salida + ".tmp" if formato == 'pdf' else None
+    pdf = EscritorPDF(temporal, hoja['dpi']) if formato == 'pdf' else None
+
+    def escribir(resultado):
+        nonlocal paginas
+        _, datos = resultado
+        if pdf:
+            pdf.agregar_pagina(*datos)
+        paginas += 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            # Ventana acotada de páginas en vuelo: se mantiene el orden y la memoria no crece con la cohorte
+            limite = 2 * (procesos or os.cpu_count() or 1)
+            en_vuelo = deque()
+            for tarea in tareas():
+                en_vuelo.append(executor.submit(_renderizar_pagina, tarea))
+                if len(en_vuelo) >= limite:
+                    escribir(en_vuelo.popleft().result())
+            while en_vuelo:
+                escribir(en_vuelo.popleft().result())
+    except BaseException:
+        if pdf:
+            pdf.archivo.close()
+            os.remove(temporal)
+        raise
+
+    if pdf:
+        pdf.cerrar()
+        os.replace(temporal, salida)
+    return paginas
+
+# --- 5. MODO CMD ---
+
+def main(argv=None):
+    """Genera las hojas de credenciales de un curso o carrera desde la línea de comandos."""
+    parser = argparse.ArgumentParser(prog="credenciales", description="Imprimir credenciales QR por curso o carrera.")
+    parser.add_argument('--curso', help="Solo los estudiantes de este curso")
+    parser.add_argument('--carrera', help="Solo los estudiantes de esta carrera")
+    parser.add_argument('--formato', choices=['pdf', 'png'], default='pdf')
+    parser.add_argument('-o', '--salida', help="Archivo PDF o carpeta PNG (por defecto en CREDENCIALES QR)")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument('--perfil', choices=list(lote_qr.PERFILES_QR), default=None,
+                        help="Perfil de generación de los QR (por defecto, ASISTENCIA_PERFIL_QR o 'predeterminado')")
+    args = parser.parse_args(argv)
+
+    estudiantes = consultar_roster(curso=args.curso, carrera=args.carrera)
+    if not estudiantes:
+        print("No hay estudiantes para el filtro indicado.")
+        return 1
+
+    # Con llavero de claves, las credenciales llevan el mismo contenido firmado que los PNG
+    llavero = firma_qr.cargar_llavero()
+    if llavero:
+        estudiantes = [estudiante + (firma_qr.firmar(estudiante[0], llavero),) for estudiante in estudiantes]
+
+    salida = args.salida
+    if not salida:
+        os.makedirs(CREDENCIALES_FOLDER, exist_ok=True)
+        etiqueta = "_".join(filter(None, [args.curso, args.carrera])).replace(' ', '_') or "todos"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        salida = os.path.join(CREDENCIALES_FOLDER, f"Credenciales_{etiqueta}_{timestamp}")
+        if args.formato == 'pdf':
+            salida += ".pdf"
+
+    inicio = datetime.now()
+    paginas = renderizar_credenciales(estudiantes, salida, args.formato, parametros_qr=lote_qr.parametros_perfil(args.perfil),
+                                      procesos=args.procesos)
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"Credenciales generadas en: {salida}")
+    print(f"Estudiantes: {len(estudiantes)}  Páginas: {paginas}  ({segundos:.2f} s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+import os
+import time
+from collections import Counter, deque, namedtuple
+
+# --- 1. DECODIFICACIÓN DE CUADROS ---
+#
+# Camino de decodificación del lector (pruebadeqr.video_loop y "Cargar Imagen"). Las herramientas
+# de ajuste y los benchmarks usan estas mismas funciones para medir exactamente lo que corre en
+# el ingreso.
+
+# Mismo formato que devuelve pyzbar.decode: data (bytes) y polygon (lista de puntos con x, y)
+Punto = namedtuple('Punto', 'x y')
+Codigo = namedtuple('Codigo', 'data polygon')
+
+DECODIFICADORES = ('pyzbar', 'opencv')
+DECODIFICADOR_POR_DEFECTO = 'pyzbar'
+
+_detector_opencv = None
+
+def decodificar_pyzbar(frame):
+    """Decodificador del lector: pyzbar sobre el cuadro tal como llega de la cámara."""
+    from pyzbar import pyzbar
+    return pyzbar.decode(frame)
+
+def decodificar_opencv(frame):
+    """Alternativa con el detector de QR de OpenCV (para equipos sin la librería zbar)."""
+    global _detector_opencv
+    import cv2
+    if _detector_opencv is None:
+        _detector_opencv = cv2.QRCodeDetector()
+    try:
+        ok, textos, esquinas, _ = _detector_opencv.detectAndDecodeMulti(frame)
+    except cv2.error:
+        return []  # el detector falla con algunos cuadros casi uniformes (sin códigos)
+    if not ok:
+        return []
+    return [Codigo(texto.encode('utf-8'), [Punto(int(x), int(y)) for x, y in puntos])
+            for texto, puntos in zip(textos, esquinas) if texto]
+
+def obtener_decodificador(nombre=None, alternativa=None):
+    """Devuelve (nombre, función) del decodificador pedido.
+
+    Si no se puede cargar (por ejemplo, falta la librería zbar) y se indica una alternativa,
+    devuelve esa en su lugar; si no, deja pasar el ImportError.
+    """
+    nombre = nombre or DECODIFICADOR_POR_DEFECTO
+    funciones = {'pyzbar': decodificar_pyzbar, 'opencv': decodificar_opencv}
+    if nombre not in funciones:
+        raise ValueError(f"Decodificador desconocido: {nombre}. Opciones: {', '.join(DECODIFICADORES)}")
+    try:
+        if nombre == 'pyzbar':
+            from pyzbar import pyzbar
+        else:
+            import cv2
+    except ImportError as e:
+        if not alternativa or alternativa == nombre:
+            raise
+        print(f"Aviso: no se pudo cargar el decodificador '{nombre}' ({e}); se usa '{alternativa}'.")
+        return obtener_decodificador(alternativa)
+    return nombre, funciones[nombre]
+
+def decodificar(frame):
+    """Decodifica todos los QR de un cuadro BGR con el decodificador del lector."""
+    return decodificar_pyzbar(frame)
+
+# --- 2. CALIDAD DEL CUADRO ---
+#
+# Antes de decodificar se descartan los cuadros sin chance de lectura: movidos o desenfocados
+# (varianza del laplaciano baja) y demasiado oscuros o lavados (brillo medio). Se mide sobre
+# una copia en grises achicada a LADO_CALIDAD píxeles de ancho (~1 ms contra ~20 ms de una
+# decodificación) y por celdas: el QR ocupa una parte del cuadro, así que cuenta la celda más
+# nítida y no la varianza de todo el cuadro, que domina el fondo liso.
+# Los umbrales salen de benchmarks/bench_calidad.py con cuadros sintéticos, con margen: un cuadro
+# lavado casi siempre cae por nitidez (pierde contraste) y un fondo quemado con el QR legible
+# tiene brillo medio alto, así que BRILLO_MAXIMO solo descarta cuadros prácticamente blancos.
+
+NITIDEZ_MINIMA = 600.0
+BRILLO_MINIMO = 40.0
+BRILLO_MAXIMO = 254.0
+LADO_CALIDAD = 320
+CELDAS_CALIDAD = 4
+
+def medir_calidad(frame, lado=LADO_CALIDAD, celdas=CELDAS_CALIDAD):
+    """(nitidez, brillo) de un cuadro BGR: varianza del laplaciano de la celda más nítida y
+    brillo medio (0-255), sobre el cuadro en grises achicado a 'lado' píxeles de ancho."""
+    import cv2
+    gris = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    alto, ancho = gris.shape
+    if ancho > lado:
+        gris = cv2.resize(gris, (lado, max(int(alto * lado / ancho), celdas)), interpolation=cv2.INTER_AREA)
+    laplaciano = cv2.Laplacian(gris, cv2.CV_32F)
+    alto_celda, ancho_celda = laplaciano.shape[0] // celdas, laplaciano.shape[1] // celdas
+    por_celda = laplaciano[:alto_celda * celdas, :ancho_celda * celdas].reshape(
+        celdas, alto_celda, celdas, ancho_celda).var(axis=(1, 3))
+    return float(por_celda.max()), float(gris.mean())
+
+class FiltroCalidad:
+    """Decide si vale la pena decodificar un cuadro y cuenta los descartados por motivo."""
+
+    def __init__(self, nitidez_minima=NITIDEZ_MINIMA, brillo_minimo=BRILLO_MINIMO, brillo_maximo=BRILLO_MAXIMO):
+        self.nitidez_minima = nitidez_minima
+        self.brillo_minimo = brillo_minimo
+        self.brillo_maximo = brillo_maximo
+        self.evaluados = 0
+        self.descartados = Counter()
+        self.ultimo_motivo = None
+
+    def motivo(self, frame):
+        """None si el cuadro se puede decodificar; si no, 'oscuro', 'sobreexpuesto' o 'movido'."""
+        nitidez, brillo = medir_calidad(frame)
+        if brillo < self.brillo_minimo:
+            return 'oscuro'
+        if brillo > self.brillo_maximo:
+            return 'sobreexpuesto'
+        if nitidez < self.nitidez_minima:
+            return 'movido'
+        return None
+
+    def admitir(self, frame):
+        self.evaluados += 1
+        self.ultimo_motivo = self.motivo(frame)
+        if self.ultimo_motivo:
+            self.descartados[self.ultimo_motivo] += 1
+        return self.ultimo_motivo is None
+
+def filtro_calidad_del_entorno():
+    """El filtro del lector con los umbrales de ASISTENCIA_NITIDEZ_MINIMA, ASISTENCIA_BRILLO_MINIMO
+    y ASISTENCIA_BRILLO_MAXIMO; None con ASISTENCIA_FILTRO_CALIDAD=0 (se decodifican todos)."""
+    if os.environ.get("ASISTENCIA_FILTRO_CALIDAD") == "0":
+        return None
+    return FiltroCalidad(float(os.environ.get("ASISTENCIA_NITIDEZ_MINIMA", NITIDEZ_MINIMA)),
+                         float(os.environ.get("ASISTENCIA_BRILLO_MINIMO", BRILLO_MINIMO)),
+                         float(os.environ.get("ASISTENCIA_BRILLO_MAXIMO", BRILLO_MAXIMO)))
+
+# --- 3. CASCADA DE RESCATE ---
+#
+# Para los códigos difíciles (pantallas rajadas, reflejos, poca luz, modo oscuro): cuando el
+# decodificador no lee nada, se vuelve a intentar sobre versiones preprocesadas del cuadro. Solo
+# se intenta si aparece algún candidato a patrón de búsqueda (los tres cuadrados concéntricos de
+# las esquinas del QR), y sobre el recorte alrededor de los candidatos, no sobre el cuadro entero.
+# Cada cuadro tiene un presupuesto de tiempo: una etapa no arranca si, según lo más que tardó en
+# los últimos intentos (o en la calibración, antes de correr de verdad) y con algo de holgura, se
+# pasaría; entonces se prueba la siguiente. Así la cascada no baja los cuadros por segundo del
+# lector más allá de ese presupuesto. Como en un cuadro suelen entrar una o dos etapas, cada cuadro
+# empieza por la etapa siguiente a la del anterior: mientras el estudiante mueve el teléfono,
+# en pocos cuadros se prueban todas.
+
+LADO_BUSCADOR = 640
+LADO_RECORTE = 400
+PRESUPUESTO_RESCATE = 0.015
+# Intentos de la cascada en los que se recuerda lo que tardó cada etapa (se usa el máximo)
+VENTANA_COSTOS = 64
+# Holgura sobre ese máximo: el costo de una etapa depende del cuadro y a veces lo supera
+MARGEN_ESTIMACION = 1.25
+
+def candidatos_buscador(gris, lado=LADO_BUSCADOR):
+    """Rectángulos (x, y, ancho, alto), en píxeles de gris, de los posibles patrones de búsqueda:
+    contornos casi cuadrados con al menos dos niveles de contornos anidados adentro."""
+    import cv2
+    import numpy as np
+    alto, ancho = gris.shape
+    factor = min(1.0, lado / ancho)
+    if factor < 1.0:
+        gris = cv2.resize(gris, (lado, int(alto * factor)), interpolation=cv2.INTER_AREA)
+    # El suavizado previo evita que el ruido del sensor se binarice en miles de contornos (de
+    # ~50 ms a 1-5 ms en 640x480)
+    binaria = cv2.adaptiveThreshold(cv2.GaussianBlur(gris, (5, 5), 0), 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                    cv2.THRESH_BINARY_INV, 31, 5)
+    contornos, jerarquia = cv2.findContours(binaria, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if jerarquia is None:
+        return []
+    hijos = jerarquia[0][:, 2]
+    anidados = hijos >= 0
+    anidados[anidados] = hijos[hijos[anidados]] >= 0
+    area_maxima = gris.shape[0] * gris.shape[1] / 8
+    candidatos = []
+    for i in np.flatnonzero(anidados):
+        x, y, w, h = cv2.boundingRect(contornos[i])
+        if w < 7 or h < 7 or not 0.6 < w / h < 1.6 or w * h > area_maxima:
+            continue
+        candidatos.append((int(x / factor), int(y / factor), int(w / factor), int(h / factor)))
+    return candidatos
+
+def recorte_de_candidatos(candidatos, alto, ancho):
+    """(x0, y0, x1, y1) que cubre los candidatos con lugar para el resto del código. Un patrón de
+    búsqueda mide 7 de los 21 o más módulos de lado: con menos de tres candidatos se agregan 3
+    patrones por lado; con tres o más, el código ya está entre ellos y alcanza con uno."""
+    lado = max(max(w, h) for _, _, w, h in candidatos)
+    margen = lado if len(candidatos) >= 3 else 3 * lado
+    x0 = min(x for x, _, _, _ in candidatos) - margen
+    y0 = min(y for _, y, _, _ in candidatos) - margen
+    x1 = max(x + w for x, _, w, _ in candidatos) + margen
+    y1 = max(y + h for _, y, _, h in candidatos) + margen
+    return max(x0, 0), max(y0, 0), min(x1, ancho), min(y1, alto)
+
+def _clahe(gris):
+    import cv2
+    return cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8)).apply(gris)
+
+def _enfoque(gris):
+    import cv2
+    return cv2.addWeighted(gris, 1.8, cv2.GaussianBlur(gris, (0, 0), 2.0), -0.8, 0)
+
+def _umbral_adaptativo(gris):
+    import cv2
+    return cv2.adaptiveThreshold(gris, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5)
+
+def _invertido(gris):
+    return 255 - gris
+
+# En orden: las más baratas y las que más rescatan primero
+ETAPAS_RESCATE = (
+    ('clahe', _clahe),                          # poca luz y reflejos: ecualiza el contraste por zonas
+    ('enfoque', _enfoque),                      # desenfoque leve
+    ('umbral_adaptativo', _umbral_adaptativo),  # iluminación despareja y rajaduras de la pantalla
+    ('invertido', _invertido),                  # QR claro sobre fondo oscuro (modo oscuro)
+)
+
+class CascadaRescate:
+    """Reintentos preprocesados, con presupuesto de tiempo por cuadro, para cuadros sin lectura.
+
+    Cuenta los intentos, los rescates por etapa y los cuadros sin candidatos o sin tiempo.
+    """
+
+    def __init__(self, presupuesto=PRESUPUESTO_RESCATE, etapas=ETAPAS_RESCATE, reloj=time.perf_counter):
+        self.presupuesto = presupuesto
+        self.etapas = etapas
+        self.reloj = reloj
+        self.calibrados = {}   # segundos por etapa medidos por calibrar()
+        self.medidos = {nombre: deque() for nombre, _ in etapas}   # (intento, segundos) recientes
+        self.siguiente = 0
+        self.intentos = 0
+        self.sin_candidatos = 0
+        self.sin_tiempo = 0
+        self.rescates = Counter()
+        self.ultima_etapa = None
+
+    def calibrar(self, decodificador=None):
+        """Mide cada etapa (lo más que tarda en tres pasadas) sobre un QR borroso y de poco
+        contraste del tamaño de un recorte, como los que llegan a la cascada.
+
+        Sin esto la primera vez de cada etapa no tendría estimación y correría sin control. El
+        lector la llama en segundo plano al abrir la cámara; si no, la hace el primer intento.
+        """
+        import cv2
+        import numpy as np
+        lado_qr = LADO_RECORTE * 11 // 20
+        qr = cv2.resize(cv2.QRCodeEncoder.create().encode("CALIBRACION-000000"), (lado_qr, lado_qr),
+                        interpolation=cv2.INTER_NEAREST).astype(np.float32)
+        recorte = np.random.default_rng(0).integers(100, 156, (LADO_RECORTE, LADO_RECORTE)).astype(np.float32)
+        desde = (LADO_RECORTE - lado_qr) // 2
+        recorte[desde:desde + lado_qr, desde:desde + lado_qr] = 128 + (qr - 128) * 0.4
+        recorte = cv2.GaussianBlur(recorte, (0, 0), 1.5).clip(0, 255).astype(np.uint8)
+        decodificador = decodificador or decodificar
+        for nombre, preparar in self.etapas:
+            costos = []
+            for _ in range(3):
+                comienzo = self.reloj()
+                decodificador(preparar(recorte))
+                costos.append(self.reloj() - comienzo)
+            self.calibrados[nombre] = max(costos)
+
+    def costo_estimado(self, nombre):
+        """Lo más que tardó la etapa en los últimos VENTANA_COSTOS intentos (o en la calibración),
+        con MARGEN_ESTIMACION."""
+        medidos = self.medidos[nombre]
+        while medidos and medidos[0][0] <= self.intentos - VENTANA_COSTOS:
+            medidos.popleft()
+        if medidos:
+            return max(costo for _, costo in medidos) * MARGEN_ESTIMACION
+        return self.calibrados[nombre] * MARGEN_ESTIMACION
+
+    def intentar(self, frame, decodificador=None):
+        """Códigos rescatados (con coordenadas del cuadro) o []; la etapa queda en ultima_etapa."""
+        import cv2
+        if not self.calibrados:
+            self.calibrar(decodificador)
+        inicio = self.reloj()
+        self.ultima_etapa = None
+        self.intentos += 1
+        gris = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        candidatos = candidatos_buscador(gris)
+        if not candidatos:
+            self.sin_candidatos += 1
+            return []
+        x0, y0, x1, y1 = recorte_de_candidatos(candidatos, *gris.shape)
+        recorte = gris[y0:y1, x0:x1]
+        escala = min(1.0, LADO_RECORTE / max(recorte.shape))
+        if escala < 1.0:
+            recorte = cv2.resize(recorte, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        decodificador = decodificador or decodificar
+        orden = self.etapas[self.siguiente:] + self.etapas[:self.siguiente]
+        self.siguiente = (self.siguiente + 1) % len(self.etapas)
+        sin_tiempo = False
+        for nombre, preparar in orden:
+            comienzo = self.reloj()
+            if comienzo - inicio + self.costo_estimado(nombre) > self.presupuesto:
+                # No entra: se saltea y se prueba la siguiente (puede ser más barata). Un costo
+                # alto sale de la ventana después de VENTANA_COSTOS intentos
+                sin_tiempo = True
+                continue
+            codigos = decodificador(preparar(recorte))
+            self.medidos[nombre].append((self.intentos, self.reloj() - comienzo))
+            if codigos:
+                self.rescates[nombre] += 1
+                self.ultima_etapa = nombre
+                return [Codigo(c.data, [Punto(int(p.x / escala) + x0, int(p.y / escala) + y0) for p in c.polygon])
+                        for c in codigos]
+        self.sin_tiempo += sin_tiempo
+        return []
+
+def cascada_rescate_del_entorno():
+    """La cascada del lector si ASISTENCIA_RESCATE=1 (apagada por defecto), con un presupuesto de
+    ASISTENCIA_RESCATE_MS milisegundos por cuadro (15)."""
+    if os.environ.get("ASISTENCIA_RESCATE") != "1":
+        return None
+    return CascadaRescate(float(os.environ.get("ASISTENCIA_RESCATE_MS", PRESUPUESTO_RESCATE * 1000)) / 1000)
+
+# --- 4. PROCESAMIENTO DE UN CUADRO DEL VIDEO ---
+
+class FiltroRepetidos:
+    """Descarta el mismo QR leído otra vez antes de 'intervalo' segundos.
+
+    Recuerda cada código y no solo el último: con un grupo frente a la cámara los códigos de un
+    cuadro se alternan (A, B, A, B...) y seguirlos de a uno los volvía a admitir en cada cuadro.
+    """
+
+    def __init__(self, intervalo=3):
+        self.intervalo = intervalo
+        self.momentos = {}
+
+    def admitir(self, contenido, ahora):
+        anterior = self.momentos.get(contenido)
+        if anterior is not None and 0 <= ahora - anterior < self.intervalo:
+            return False
+        self.momentos[contenido] = ahora
+        if len(self.momentos) > 64:
+            self.momentos = {c: m for c, m in self.momentos.items() if 0 <= ahora - m < self.intervalo}
+        return True
+
+# Tamaño de la vista previa en la ventana del lector
+TAMANO_VISTA = (400, 300)
+
+def dibujar_contornos(frame, codigos):
+    """Marca en verde el contorno de cada código detectado (sobre el mismo frame)."""
+    import cv2
+    import numpy as np
+    for codigo in codigos:
+        puntos = codigo.polygon
+        if len(puntos) == 4:
+            cv2.polylines(frame, [np.array([(p.x, p.y) for p in puntos], np.int32)], True, (0, 255, 0), 3)
+
+def preparar_vista(frame, tamano=TAMANO_VISTA):
+    """Convierte el cuadro BGR a RGB y lo achica para mostrarlo."""
+    import cv2
+    return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), tamano)
+
+def procesar_cuadro(frame, decodificador=None, tiempos=None, calidad=None, rescate=None):
+    """Lo que hace el lector con cada cuadro: decodificar, marcar los códigos y armar la vista.
+
+    Devuelve (codigos, vista RGB). decodificador permite medir otra función con el mismo camino;
+    con un FiltroCalidad en calidad, los cuadros que no lo pasan no se decodifican (sin códigos,
+    el motivo queda en calidad.ultimo_motivo). Con una CascadaRescate en rescate, los cuadros
+    admitidos sin lectura se reintentan (la etapa que leyó queda en rescate.ultima_etapa). Si se
+    pasa el dict tiempos, se completa con los segundos de 'calidad', 'decodificacion', 'rescate'
+    y 'vista'.
+    """
+    inicio = time.perf_counter()
+    admitido = calidad is None or calidad.admitir(frame)
+    evaluado = time.perf_counter()
+    codigos = (decodificador or decodificar)(frame) if admitido else []
+    decodificado = time.perf_counter()
+    if rescate is not None:
+        rescate.ultima_etapa = None
+        if admitido and not codigos:
+            codigos = rescate.intentar(frame, decodificador)
+    rescatado = time.perf_counter()
+    dibujar_contornos(frame, codigos)
+    vista = preparar_vista(frame)
+    if tiempos is not None:
+        tiempos['calidad'] = evaluado - inicio
+        tiempos['decodificacion'] = decodificado - evaluado
+        tiempos['rescate'] = rescatado - decodificado
+        tiempos['vista'] = time.perf_counter() - rescatado
+    return codigos, vista
@@ -0,0 +1,312 @@
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+
+import bitacora
+import metricas
+
+# OpenCV se importa recién en el hilo que guarda las fotos: el lector importa este módulo al
+# iniciar solo para crear la tabla.
+
+# --- 1. TABLA DE EVIDENCIAS ---
+#
+# Una fila por registro de asistencia con foto: la ruta del JPEG relativa a la carpeta de
+# evidencias. Varios registros de un mismo cuadro (un grupo frente al molinete) comparten la
+# foto. El archivo puede faltar: la retención borra los viejos. Si la cola estaba llena la foto
+# no se guardó y tampoco hay fila.
+
+SQL_EVIDENCIAS = """
+    CREATE TABLE IF NOT EXISTS evidencias (
+        asistencia_id INTEGER PRIMARY KEY REFERENCES asistencia (id),
+        ruta TEXT NOT NULL,
+        capturada TEXT NOT NULL
+    );
+
+    CREATE TRIGGER IF NOT EXISTS asistencia_evidencias_ad AFTER DELETE ON asistencia BEGIN
+        DELETE FROM evidencias WHERE asistencia_id = OLD.id;
+    END;
+"""
+
+def instalar_tabla(conn):
+    """Crea la tabla de evidencias y el trigger que la limpia al borrar asistencias."""
+    conn.executescript(SQL_EVIDENCIAS)
+
+def evidencias_de(conn, id_qr, fecha=None):
+    """Registros de asistencia de un estudiante con su foto (o None): (fecha, hora, puerta, ruta)."""
+    sql = ("SELECT a.fecha, a.hora_ingreso, a.puerta, ev.ruta FROM asistencia a "
+           "JOIN estudiantes e ON e.id = a.student_id "
+           "LEFT JOIN evidencias ev ON ev.asistencia_id = a.id WHERE e.id_unico_qr = ?")
+    params = [id_qr]
+    if fecha:
+        sql += " AND a.fecha = ?"
+        params.append(fecha)
+    return conn.execute(sql + " ORDER BY a.fecha, a.hora_ingreso", params).fetchall()
+
+# --- 2. ALMACÉN EN SEGUNDO PLANO ---
+#
+# El lector no codifica ni escribe: guarda una referencia al cuadro en el que se aceptó el código
+# (con el contorno ya marcado) y, una vez registrada la asistencia, el hilo de la BD lo encola acá.
+# Un hilo propio lo pasa a JPEG y lo escribe en carpeta/AAAA-MM-DD/. Si la cola está llena (disco
+# lento, ráfaga) la foto se descarta en lugar de hacer esperar a nadie.
+
+CARPETA_POR_DEFECTO = "evidencias"
+CALIDAD_JPEG = 75
+COLA_MAXIMA = 16
+MAXIMO_MB = 500
+DIAS_RETENCION = 30
+PRIORIDAD_HILO = 10   # nice del hilo que codifica y escribe
+
+def _es_dia(nombre):
+    try:
+        datetime.strptime(nombre, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+class AlmacenEvidencias:
+    """Fotos de los registros en carpetas por día, con retención por antigüedad y por tamaño.
+
+    Después de cada foto se borran las de más de 'dias' días y, si el total pasa de maximo_bytes,
+    las más viejas. Al iniciar, el hilo hace el inventario de lo que ya hay en la carpeta.
+    """
+
+    def __init__(self, carpeta=CARPETA_POR_DEFECTO, calidad=CALIDAD_JPEG, cola_maxima=COLA_MAXIMA,
+                 maximo_bytes=MAXIMO_MB * 1024 * 1024, dias=DIAS_RETENCION, metricas_lector=None,
+                 bitacora_lector=None, hoy=date.today):
+        self.carpeta = carpeta
+        self.calidad = calidad
+        self.maximo_bytes = maximo_bytes
+        self.dias = dias
+        self.hoy = hoy
+        self.metricas = metricas_lector or metricas.Metricas()
+        self.bitacora = bitacora_lector or bitacora.Bitacora("evidencias")
+        self._cola = queue.Queue(maxsize=cola_maxima)
+        self._archivos = deque()   # (ruta relativa, bytes), de la más vieja a la más nueva
+        self.bytes_totales = 0
+        self.guardadas = 0
+        self.descartadas = 0
+        self.errores = 0
+        self.borradas = 0
+        self._hilo = threading.Thread(target=self._trabajar, name="evidencias", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, cuadro, nombre, momento=None):
+        """Encola el cuadro BGR sin esperar. Devuelve la ruta relativa que va a tener o None si se descartó.
+
+        El cuadro no se copia: quien lo encola no tiene que volver a modificarlo.
+        """
+        ruta = self._ruta(nombre, momento or datetime.now())
+        try:
+            self._cola.put_nowait((cuadro, ruta, time.perf_counter()))
+        except queue.Full:
+            self._descartar()
+            return None
+        return ruta
+
+    def _ruta(self, nombre, momento):
+        return f"{momento:%Y-%m-%d}/{momento:%H%M%S}_{nombre}.jpg"
+
+    def _descartar(self, cantidad=1):
+        self.descartadas += cantidad
+        self.metricas.incrementar('evidencias', "Fotos de evidencia por resultado", cantidad, resultado='descartada')
+
+    def vincular(self, conn, registrados):
+        """En el hilo de la BD: guarda el vínculo y encola la foto de cada estudiante registrado hoy.
+
+        registrados es una lista de (student_id, cuadro); los que comparten cuadro comparten foto.
+        El lugar en la cola se reserva antes y las fotos se encolan después del commit: el hilo de
+        las fotos no arranca en medio de la transacción y, si falla, no quedan archivos sueltos.
+        Supone que el hilo de la BD es el único que encola.
+        """
+        inicio = time.perf_counter()
+        student_ids = sorted({student_id for student_id, _ in registrados})
+        filas = conn.execute(
+            f"SELECT student_id, id, fecha, hora_ingreso FROM asistencia WHERE fecha = ? AND student_id IN "
+            f"({', '.join('?' * len(student_ids))})", [str(self.hoy())] + student_ids).fetchall()
+        asistencias = {fila[0]: fila[1:] for fila in filas}
+        por_cuadro = {}
+        for student_id, cuadro in registrados:
+            if student_id in asistencias:
+                por_cuadro.setdefault(id(cuadro), (cuadro, []))[1].append(asistencias[student_id])
+        libres = self._cola.maxsize - self._cola.qsize()
+        fotos, vinculos = [], []
+        for cuadro, registros in por_cuadro.values():
+            if len(fotos) == libres:
+                self._descartar()
+                continue
+            asistencia_id, fecha, hora_ingreso = registros[0]
+            ruta = self._ruta(asistencia_id, datetime.strptime(f"{fecha} {hora_ingreso}", "%Y-%m-%d %H:%M:%S"))
+            fotos.append((cuadro, ruta))
+            vinculos.extend((registro[0], ruta, f"{fecha} {hora_ingreso}") for registro in registros)
+        try:
+            conn.executemany("INSERT OR REPLACE INTO evidencias (asistencia_id, ruta, capturada) VALUES (?, ?, ?)",
+                             vinculos)
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            self.bitacora.error("error_vinculando_evidencias", registros=len(vinculos), error=str(e))
+            return
+        self.metricas.observar('evidencia_segundos', time.perf_counter() - inicio,
+                               "Trabajo de las fotos de evidencia por paso", paso='vinculo')
+        encolada = time.perf_counter()
+        for cuadro, ruta in fotos:
+            self._cola.put_nowait((cuadro, ruta, encolada))
+
+    def esperar(self):
+        """Bloquea hasta que se guarde todo lo encolado (para herramientas y benchmarks)."""
+        self._cola.join()
+
+    def cerrar(self, espera=5.0):
+        """Guarda lo encolado (hasta 'espera' segundos) y termina el hilo."""
+        try:
+            self._cola.put(None, timeout=espera)
+        except queue.Full:
+            return
+        self._hilo.join(espera)
+
+    def _trabajar(self):
+        # Con pocos núcleos, codificar compite con el registro: el hilo cede la CPU (solo en Linux,
+        # donde la prioridad es por hilo)
+        if hasattr(os, 'setpriority') and sys.platform.startswith('linux'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PRIORIDAD_HILO)
+            except OSError:
+                pass
+        try:
+            self._inventariar()
+        except OSError as e:
+            self.bitacora.error("error_inventario_evidencias", carpeta=self.carpeta, error=repr(e))
+        while True:
+            item = self._cola.get()
+            try:
+                if item is None:
+                    return
+                self._guardar(*item)
+            finally:
+                self._cola.task_done()
+
+    def _guardar(self, cuadro, ruta, encolada):
+        import cv2
+        inicio = time.perf_counter()
+        self.metricas.observar('evidencia_segundos', inicio - encolada, "Trabajo de las fotos de evidencia por paso",
+                               paso='espera')
+        try:
+            ok, datos = cv2.imencode('.jpg', cuadro, [cv2.IMWRITE_JPEG_QUALITY, self.calidad])
+            if not ok:
+                raise ValueError("no se pudo codificar el cuadro")
+            codificado = time.perf_counter()
+            destino = os.path.join(self.carpeta, ruta)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            # Se escribe aparte y se renombra: nunca queda un JPEG a medias con el nombre final
+            with open(destino + ".tmp", 'wb') as archivo:
+                archivo.write(datos.tobytes())
+            os.replace(destino + ".tmp", destino)
+        except (OSError, ValueError, cv2.error) as e:
+            self.errores += 1
+            self.metricas.incrementar('evidencias', "Fotos de evidencia por resultado", resultado='error')
+            self.bitacora.error("error_guardando_evidencia", ruta=ruta, error=repr(e))
+            return
+        self.metricas.observar('evidencia_segundos', codificado - inicio, "Trabajo de las fotos de evidencia por paso",
+                               paso='codificacion')
+        self.metricas.observar('evidencia_segundos', time.perf_counter() - codificado,
+                               "Trabajo de las fotos de evidencia por paso", paso='escritura')
+        self.metricas.incrementar('evidencias', "Fotos de evidencia por resultado", resultado='guardada')
+        self.guardadas += 1
+        self._archivos.append((ruta, len(datos)))
+        self.bytes_totales += len(datos)
+        self._aplicar_retencion()
+
+    def _inventariar(self):
+        if not os.path.isdir(self.carpeta):
+            return
+        for dia in sorted(os.listdir(self.carpeta)):
+            carpeta_dia = os.path.join(self.carpeta, dia)
+            if not (_es_dia(dia) and os.path.isdir(carpeta_dia)):
+                continue
+            for nombre in sorted(os.listdir(carpeta_dia)):
+                ruta_completa = os.path.join(carpeta_dia, nombre)
+                if nombre.endswith(".tmp"):
+                    os.remove(ruta_completa)   # escritura interrumpida
+                elif nombre.endswith(".jpg"):
+                    tamanio = os.path.getsize(ruta_completa)
+                    self._archivos.append((f"{dia}/{nombre}", tamanio))
+                    self.bytes_totales += tamanio
+        self._aplicar_retencion()
+
+    def _aplicar_retencion(self):
+        limite = str(self.hoy() - timedelta(days=self.dias))
+        dias_tocados = set()
+        # La foto más nueva no se borra por tamaño aunque sola pase del máximo
+        while self._archivos and (self._archivos[0][0][:10] < limite or
+                                  (self.bytes_totales > self.maximo_bytes and len(self._archivos) > 1)):
+            ruta, tamanio = self._archivos.popleft()
+            self.bytes_totales -= tamanio
+            dias_tocados.add(ruta[:10])
+            try:
+                os.remove(os.path.join(self.carpeta, ruta))
+                self.borradas += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.bitacora.error("error_borrando_evidencia", ruta=ruta, error=repr(e))
+        for dia in dias_tocados:
+            try:
+                os.rmdir(os.path.join(self.carpeta, dia))   # solo si quedó vacía
+            except OSError:
+                pass
+
+def almacen_del_entorno(metricas_lector=None, bitacora_lector=None):
+    """Almacén configurado con las variables ASISTENCIA_EVIDENCIAS_*, o None si está apagado.
+
+    ASISTENCIA_EVIDENCIAS=1 lo enciende; _CARPETA, _MB, _DIAS y _CALIDAD (JPEG, 0-100) cambian
+    dónde se guardan las fotos, el tamaño máximo, la antigüedad máxima y la calidad.
+    """
+    if os.environ.get("ASISTENCIA_EVIDENCIAS") != "1":
+        return None
+    return AlmacenEvidencias(
+        carpeta=os.environ.get("ASISTENCIA_EVIDENCIAS_CARPETA", CARPETA_POR_DEFECTO),
+        calidad=int(os.environ.get("ASISTENCIA_EVIDENCIAS_CALIDAD", CALIDAD_JPEG)),
+        maximo_bytes=float(os.environ.get("ASISTENCIA_EVIDENCIAS_MB", MAXIMO_MB)) * 1024 * 1024,
+        dias=int(os.environ.get("ASISTENCIA_EVIDENCIAS_DIAS", DIAS_RETENCION)),
+        metricas_lector=metricas_lector,
+        bitacora_lector=bitacora_lector)
+
+# --- 3. MODO CMD ---
+
+def main(argv=None):
+    """Lista los ingresos de un estudiante con la foto de cada uno (para reclamos)."""
+    parser = argparse.ArgumentParser(prog="evidencias",
+                                     description="Fotos de evidencia de los ingresos de un estudiante.")
+    parser.add_argument('id_qr', help="id_unico_qr del estudiante")
+    parser.add_argument('--fecha', help="Solo ese día (AAAA-MM-DD)")
+    parser.add_argument('--db', default="asistencia.db")
+    parser.add_argument('--carpeta', default=os.environ.get("ASISTENCIA_EVIDENCIAS_CARPETA", CARPETA_POR_DEFECTO))
+    args = parser.parse_args(argv)
+
+    with sqlite3.connect(args.db) as conn:
+        try:
+            filas = evidencias_de(conn, args.id_qr, args.fecha)
+        except sqlite3.OperationalError as e:
+            print(f"❌ No se pudo consultar la BD: {e}")
+            return 1
+    if not filas:
+        print(f"Sin ingresos registrados para {args.id_qr}" + (f" el {args.fecha}" if args.fecha else ""))
+        return 1
+    for fecha, hora_ingreso, puerta, ruta in filas:
+        if ruta is None:
+            foto = "sin foto"
+        else:
+            ruta_completa = os.path.join(args.carpeta, ruta)
+            foto = ruta_completa if os.path.exists(ruta_completa) else f"{ruta_completa} (borrada por la retención)"
+        print(f"{fecha} {hora_ingreso}  puerta {puerta or '-'}  {foto}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+from datetime import date
+
+# --- 1. FORMATO DEL CONTENIDO FIRMADO ---
+#
+# Versión 1:  QA1:<id_unico>:<emitido>:<clave>:<firma>
+#   emitido  día de emisión (días desde 1970-01-01) en base 36; por defecto el día en que se creó
+#            la clave, así que fecha la clave y no la impresión de la credencial
+#   clave    identificador de la clave con la que se firmó (permite rotarlas)
+#   firma    HMAC-SHA256 de todo lo anterior, truncado a 8 bytes, en base32 sin relleno
+#
+# El lector verifica la firma en memoria antes de consultar la base: un código inventado o
+# dañado se rechaza sin I/O. Los QR sin firma (solo el id_unico) siguen siendo válidos
+# salvo que el lector exija firma. Para que los QR venzan se limita la antigüedad de la clave
+# (antiguedad_clave_dias): al rotarla y regenerar las credenciales, vuelven a valer.
+
+PREFIJO = "QA"
+VERSION = 1
+BYTES_FIRMA = 8
+# QA<versión>:<id_unico>:<emitido>:<clave>:<firma> completo (el id_unico puede tener ':')
+FORMATO_FIRMADO = re.compile(rf"{PREFIJO}\d+:.+:[0-9a-z]+:[0-9a-z]+:[A-Z2-7]+")
+
+# Llavero con las claves secretas (se copia a cada estación de ingreso junto con la base)
+RUTA_LLAVERO = os.environ.get("ASISTENCIA_LLAVERO_QR", "claves_qr.json")
+
+def _base36(numero):
+    digitos = "0123456789abcdefghijklmnopqrstuvwxyz"
+    texto = ""
+    while True:
+        numero, resto = divmod(numero, 36)
+        texto = digitos[resto] + texto
+        if not numero:
+            return texto
+
+def _dia(fecha=None):
+    return ((fecha or date.today()) - date(1970, 1, 1)).days
+
+def _firma(secreto, mensaje):
+    digest = hmac.new(secreto, mensaje.encode('utf-8'), hashlib.sha256).digest()[:BYTES_FIRMA]
+    return base64.b32encode(digest).decode('ascii').rstrip('=')
+
+def es_firmado(contenido):
+    """True si el contenido del QR tiene el formato firmado completo (cualquier versión).
+
+    Mirar solo el prefijo no alcanza: un id_unico viejo como "QA2024-001" no es un QR firmado y
+    tiene que seguir el camino de los QR sin firma.
+    """
+    return FORMATO_FIRMADO.fullmatch(contenido) is not None
+
+# --- 2. LLAVERO Y ROTACIÓN DE CLAVES ---
+
+def cargar_llavero(ruta=None):
+    """Lee el llavero. Devuelve None si no existe (QR sin firmar).
+
+    Formato: {'activa': id, 'claves': {id: {'secreto': bytes, 'creada': día}}}.
+    """
+    try:
+        with open(ruta or RUTA_LLAVERO, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+    except FileNotFoundError:
+        return None
+    for clave in datos['claves'].values():
+        clave['secreto'] = bytes.fromhex(clave['secreto'])
+    return datos
+
+def guardar_llavero(llavero, ruta=None):
+    import lote_qr
+    datos = {
+        'activa': llavero['activa'],
+        'claves': {kid: dict(clave, secreto=clave['secreto'].hex()) for kid, clave in llavero['claves'].items()},
+    }
+    contenido = json.dumps(datos, indent=2, sort_keys=True).encode('utf-8')
+    ruta = ruta or RUTA_LLAVERO
+    lote_qr._escribir_atomico(ruta, lambda archivo: archivo.write(contenido))
+    os.chmod(ruta, 0o600)
+
+def rotar_clave(ruta=None):
+    """Crea una clave nueva y la deja activa. Las anteriores siguen verificando hasta retirarlas."""
+    llavero = cargar_llavero(ruta) or {'activa': None, 'claves': {}}
+    siguiente = max((int(kid, 36) for kid in llavero['claves']), default=0) + 1
+    kid = _base36(siguiente)
+    llavero['claves'][kid] = {'secreto': secrets.token_bytes(32), 'creada': _dia()}
+    llavero['activa'] = kid
+    guardar_llavero(llavero, ruta)
+    return kid
+
+def retirar_clave(kid, ruta=None):
+    """Quita una clave: los QR firmados con ella dejan de ser válidos."""
+    llavero = cargar_llavero(ruta)
+    if not llavero or kid not in llavero['claves']:
+        raise KeyError(f"No existe la clave '{kid}'")
+    if kid == llavero['activa']:
+        raise ValueError("No se puede retirar la clave activa; primero rote a una nueva")
+    del llavero['claves'][kid]
+    guardar_llavero(llavero, ruta)
+
+# --- 3. FIRMA Y VERIFICACIÓN ---
+
+def firmar(id_unico, llavero, emitido=None):
+    """Contenido firmado para el QR de un estudiante con la clave activa.
+
+    emitido es el día de emisión; por defecto el día en que se creó la clave activa, así
+    regenerar el QR de un estudiante sin rotar la clave produce exactamente el mismo contenido.
+    """
+    kid = llavero['activa']
+    clave = llavero['claves'][kid]
+    emitido = clave['creada'] if emitido is None else emitido
+    mensaje = f"{PREFIJO}{VERSION}:{id_unico}:{_base36(emitido)}:{kid}"
+    return f"{mensaje}:{_firma(clave['secreto'], mensaje)}"
+
+def contenido_qr(id_unico, llavero=None):
+    """Lo que se escribe en el QR: firmado si hay llavero, el id_unico solo si no."""
+    if llavero is None:
+        llavero = cargar_llavero()
+    return firmar(id_unico, llavero) if llavero else id_unico
+
+def _verificar_v1(contenido, llavero, antiguedad_clave_dias):
+    # El id_unico puede contener ':'; los tres últimos campos se separan desde la derecha
+    partes = contenido.rsplit(':', 3)
+    if len(partes) != 4 or ':' not in partes[0]:
+        return None, "formato inválido"
+    cabeza, emitido, kid, firma = partes
+    id_unico = cabeza.split(':', 1)[1]
+    clave = llavero['claves'].get(kid)
+    if clave is None:
+        return None, f"clave '{kid}' desconocida o retirada"
+    mensaje = contenido[:-len(firma) - 1]
+    if not hmac.compare_digest(firma.encode('utf-8'), _firma(clave['secreto'], mensaje).encode('ascii')):
+        return None, "firma inválida"
+    try:
+        dia = int(emitido, 36)
+    except ValueError:
+        return None, "formato inválido"
+    hoy = _dia()
+    if dia > hoy + 1:
+        return None, "fecha de emisión futura"
+    if antiguedad_clave_dias is not None and hoy - clave['creada'] > antiguedad_clave_dias:
+        return None, f"QR vencido: su clave '{kid}' tiene más de {antiguedad_clave_dias} días"
+    return id_unico, None
+
+VERIFICADORES = {1: _verificar_v1}
+
+def verificar(contenido, llavero, antiguedad_clave_dias=None):
+    """Verifica un contenido firmado sin tocar la base. Devuelve (id_unico, None) o (None, motivo).
+
+    Con antiguedad_clave_dias se rechazan los QR firmados con una clave creada hace más días.
+    """
+    version = contenido[len(PREFIJO):].split(':', 1)[0]
+    verificador = VERIFICADORES.get(int(version)) if version.isdigit() else None
+    if verificador is None:
+        return None, f"versión de QR no soportada: {version}"
+    return verificador(contenido, llavero, antiguedad_clave_dias)
+
+# --- 4. MODO CMD ---
+
+def main(argv=None):
+    """Administración del llavero de firma de QR."""
+    parser = argparse.ArgumentParser(prog="claves", description="Claves de firma de los códigos QR.")
+    sub = parser.add_subparsers(dest='accion', required=True)
+    sub.add_parser('rotar', help="Crear una clave nueva y activarla (la primera habilita la firma)")
+    sub.add_parser('listar', help="Mostrar las claves del llavero")
+    retirar = sub.add_parser('retirar', help="Quitar una clave vieja (invalida sus QR)")
+    retirar.add_argument('kid')
+    verificar_cmd = sub.add_parser('verificar', help="Verificar el contenido de un QR")
+    verificar_cmd.add_argument('contenido')
+    verificar_cmd.add_argument('--antiguedad-clave', type=int, default=None,
+                               help="Días máximos desde la creación de la clave que lo firmó")
+    args = parser.parse_args(argv)
+
+    if args.accion == 'rotar':
+        kid = rotar_clave()
+        print(f"Clave '{kid}' creada y activa en {RUTA_LLAVERO}.")
+        print("Regenere los QR (python tomadeasistencia.py qr) y copie el llavero a las estaciones de ingreso.")
+        return 0
+
+    llavero = cargar_llavero()
+    if not llavero:
+        print(f"No hay llavero en {RUTA_LLAVERO}. Cree uno con: claves rotar")
+        return 1
+
+    if args.accion == 'listar':
+        for kid, clave in sorted(llavero['claves'].items(), key=lambda item: int(item[0], 36)):
+            creada = date.fromordinal(date(1970, 1, 1).toordinal() + clave['creada'])
+            print(f"  {kid:<4} creada {creada}{'  (activa)' if kid == llavero['activa'] else ''}")
+    elif args.accion == 'retirar':
+        try:
+            retirar_clave(args.kid)
+        except (KeyError, ValueError) as e:
+            print(f"Error: {e}")
+            return 1
+        print(f"Clave '{args.kid}' retirada.")
+    elif args.accion == 'verificar':
+        if not es_firmado(args.contenido):
+            print("El contenido no está firmado.")
+            return 1
+        id_unico, error = verificar(args.contenido, llavero, args.antiguedad_clave)
+        if error:
+            print(f"QR inválido: {error}")
+            return 1
+        print(f"QR válido: {id_unico}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
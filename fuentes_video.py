@@ -0,0 +1,534 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import escaneo
+
+# --- 1. FUENTES DE CUADROS ---
+#
+# Lo que consume video_loop: cualquier objeto con leer() (un cuadro BGR, o None si todavía no
+# hay uno), cerrar(), agotada (True cuando no va a haber más cuadros) y marca_tiempo (segundos
+# del último cuadro: reloj de pared para la cámara, tiempo del video para lo grabado). El
+# intervalo entre escaneos del mismo QR se mide con marca_tiempo, así una grabación reproducida
+# a máxima velocidad se comporta igual que en tiempo real.
+
+EXTENSIONES_IMAGEN = ('.png', '.jpg', '.jpeg', '.bmp')
+TIPOS = ('camara', 'falsa', 'video', 'imagenes', 'sintetica')
+
+class Ritmo:
+    """Espacia los cuadros a fps * velocidad; sin fps (o velocidad 0) no espera nada."""
+
+    def __init__(self, fps=None, velocidad=1.0):
+        self.periodo = 1.0 / (fps * velocidad) if fps and velocidad else 0.0
+        self.siguiente = None
+
+    def esperar(self):
+        if not self.periodo:
+            return
+        ahora = time.perf_counter()
+        if self.siguiente is None:
+            self.siguiente = ahora
+        elif self.siguiente > ahora:
+            time.sleep(self.siguiente - ahora)
+        # Si el consumidor se atrasó no se acumulan cuadros "debidos": se sigue desde ahora
+        self.siguiente = max(self.siguiente, ahora) + self.periodo
+
+class FuenteCuadros:
+    agotada = False
+    marca_tiempo = 0.0
+
+    def leer(self):
+        raise NotImplementedError
+
+    def cerrar(self):
+        pass
+
+    def __iter__(self):
+        """Todos los cuadros hasta agotarse (para herramientas y benchmarks)."""
+        while not self.agotada:
+            frame = self.leer()
+            if frame is not None:
+                yield frame
+
+class FuenteCamara(FuenteCuadros):
+    """Cámara en vivo: prueba los índices en orden hasta que uno entregue un cuadro y le aplica
+    el perfil de captura (ver descubrir_camara). abrir_captura reemplaza a cv2.VideoCapture, por
+    ejemplo con CapturaFalsa."""
+
+    def __init__(self, indices=(0, 1), perfil=None, abrir_captura=None):
+        self.indice, self.captura, self.configuracion, self.diferencias = descubrir_camara(indices, perfil, abrir_captura)
+
+    def leer(self):
+        ret, frame = self.captura.read()
+        self.marca_tiempo = time.time()
+        return frame if ret else None
+
+    def cerrar(self):
+        self.captura.release()
+
+class FuenteVideo(FuenteCuadros):
+    """Archivo de video grabado. maxima=True entrega los cuadros sin esperar (sin ritmo)."""
+
+    def __init__(self, ruta, velocidad=1.0, maxima=False, repetir=False):
+        import cv2
+        self.captura = cv2.VideoCapture(ruta)
+        if not self.captura.isOpened():
+            raise OSError(f"No se pudo abrir el video {ruta}")
+        self.fps = self.captura.get(cv2.CAP_PROP_FPS) or 30.0
+        self.ritmo = Ritmo(None if maxima else self.fps, velocidad)
+        self.repetir = repetir
+        self.cuadro = 0
+        self._vuelta = 0.0
+
+    def leer(self):
+        import cv2
+        self.ritmo.esperar()
+        ret, frame = self.captura.read()
+        if not ret and self.repetir and self.cuadro:
+            self._vuelta += self.cuadro / self.fps
+            self.cuadro = 0
+            self.captura.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.captura.read()
+        if not ret:
+            self.agotada = True
+            return None
+        self.marca_tiempo = self._vuelta + self.cuadro / self.fps
+        self.cuadro += 1
+        return frame
+
+    def cerrar(self):
+        self.captura.release()
+
+class FuenteImagenes(FuenteCuadros):
+    """Carpeta de imágenes en orden alfabético, una por cuadro (sin fps, a máxima velocidad)."""
+
+    def __init__(self, carpeta, fps=None, repetir=False):
+        self.rutas = sorted(os.path.join(carpeta, nombre) for nombre in os.listdir(carpeta)
+                            if nombre.lower().endswith(EXTENSIONES_IMAGEN))
+        if not self.rutas:
+            raise OSError(f"No hay imágenes en {carpeta}")
+        self.fps = fps or 30.0
+        self.ritmo = Ritmo(fps)
+        self.repetir = repetir
+        self.cuadro = 0
+
+    def leer(self):
+        import cv2
+        if self.cuadro >= len(self.rutas) and not self.repetir:
+            self.agotada = True
+            return None
+        self.ritmo.esperar()
+        frame = cv2.imread(self.rutas[self.cuadro % len(self.rutas)])
+        self.marca_tiempo = self.cuadro / self.fps
+        self.cuadro += 1
+        return frame
+
+class FuenteSintetica(FuenteCuadros):
+    """Cuadros generados con sinteticos.py: un QR al azar de 'contenidos' en una parte de ellos.
+
+    Reproducible con la semilla. cuadros=None genera sin fin.
+    """
+
+    def __init__(self, contenidos=None, cuadros=None, fps=None, semilla=7, alto=480, ancho=640,
+                 proporcion_con_qr=0.5):
+        import sinteticos
+        self.rng = random.Random(semilla)
+        contenidos = contenidos or [f"EST-{i:06d}" for i in range(12)]
+        self.qrs = [sinteticos.imagen_qr(contenido) for contenido in contenidos]
+        self.cuadros = cuadros
+        self.fps = fps or 30.0
+        self.ritmo = Ritmo(fps)
+        self.alto, self.ancho = alto, ancho
+        self.proporcion_con_qr = proporcion_con_qr
+        self.cuadro = 0
+
+    def leer(self):
+        import sinteticos
+        if self.cuadros is not None and self.cuadro >= self.cuadros:
+            self.agotada = True
+            return None
+        self.ritmo.esperar()
+        rng = self.rng
+        qrs = [rng.choice(self.qrs)] if rng.random() < self.proporcion_con_qr else []
+        frame = sinteticos.cuadro_con_varios(qrs, rng, self.alto, self.ancho, escala=rng.uniform(0.2, 0.5),
+                                             angulo=rng.uniform(-30, 30), desenfoque=rng.choice((0.0, 0.0, 0.8)),
+                                             sigma_ruido=rng.uniform(0, 6))
+        self.marca_tiempo = self.cuadro / self.fps
+        self.cuadro += 1
+        return frame
+
+def abrir(especificacion=None, maxima=False, perfil=None):
+    """Abre una fuente a partir de un texto como los de ASISTENCIA_FUENTE_VIDEO:
+
+    camara, camara:2, falsa, falsa:INDICE, video:RUTA, imagenes:CARPETA, sintetica o
+    sintetica:CUADROS. Una ruta sola se toma como video o carpeta de imágenes según lo que sea.
+    maxima quita el ritmo de los videos grabados y de las fuentes sintéticas. Las cámaras usan el
+    perfil de captura indicado (o el de ASISTENCIA_PERFIL_CAMARA) y, sin índice, empiezan por el
+    que funcionó la última vez en esta estación; falsa es una cámara simulada (CapturaFalsa).
+    """
+    especificacion = especificacion or os.environ.get("ASISTENCIA_FUENTE_VIDEO") or "camara"
+    tipo, _, valor = especificacion.partition(':')
+    if tipo not in TIPOS:
+        tipo, valor = ('imagenes' if os.path.isdir(especificacion) else 'video'), especificacion
+    if tipo in ('camara', 'falsa'):
+        return abrir_camara(int(valor) if valor else None, perfil, CapturaFalsa if tipo == 'falsa' else None)
+    if tipo == 'video':
+        return FuenteVideo(valor, maxima=maxima)
+    if tipo == 'imagenes':
+        return FuenteImagenes(valor)
+    return FuenteSintetica(cuadros=int(valor) if valor else None, fps=None if maxima else 30.0)
+
+# --- 2. CÁMARA: PERFILES DE CAPTURA, DESCUBRIMIENTO Y LATENCIA ---
+#
+# Con la configuración del driver, muchas cámaras USB entregan YUYV a la resolución máxima con
+# una cola interna de varios cuadros: el cuadro que se decodifica es de hace 100-200 ms y se nota
+# el retraso entre que aparece el teléfono y el escaneo. Un perfil pide resolución, formato
+# (MJPG), fps y largo de la cola (CAP_PROP_BUFFERSIZE); después se lee lo que la cámara reporta,
+# porque ignora sin aviso lo que no soporta. El índice que funcionó y lo obtenido se guardan por
+# estación en RUTA_CONFIG_CAMARA para abrir directo esa cámara la próxima vez.
+
+# ancho, alto, fourcc y fps en None quedan como los elige el driver; buffer es el largo de la cola
+PerfilCaptura = namedtuple('PerfilCaptura', 'ancho alto fourcc fps buffer')
+
+PERFILES = {
+    'driver': PerfilCaptura(None, None, None, None, None),
+    'baja_latencia': PerfilCaptura(640, 480, 'MJPG', 30, 1),
+    'hd': PerfilCaptura(1280, 720, 'MJPG', 30, 1),
+}
+PERFIL_POR_DEFECTO = 'baja_latencia'
+INDICES_CAMARA = (0, 1)
+
+RUTA_CONFIG_CAMARA = os.environ.get("ASISTENCIA_CONFIG_CAMARA", "camara_estacion.json")
+
+def obtener_perfil(nombre=None):
+    nombre = nombre or PERFIL_POR_DEFECTO
+    if nombre not in PERFILES:
+        raise ValueError(f"Perfil de captura desconocido: {nombre}. Opciones: {', '.join(PERFILES)}")
+    return nombre, PERFILES[nombre]
+
+def _texto_fourcc(codigo):
+    codigo = int(codigo)
+    texto = "".join(chr((codigo >> (8 * i)) & 0xFF) for i in range(4))
+    return texto if codigo and texto.isprintable() else None
+
+def leer_configuracion(captura):
+    """Lo que la captura reporta: ancho, alto, fourcc, fps y buffer (None si no lo informa)."""
+    import cv2
+    buffer = int(captura.get(cv2.CAP_PROP_BUFFERSIZE))
+    return {
+        'ancho': int(captura.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'alto': int(captura.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fourcc': _texto_fourcc(captura.get(cv2.CAP_PROP_FOURCC)),
+        'fps': round(captura.get(cv2.CAP_PROP_FPS), 2),
+        'buffer': buffer if buffer > 0 else None,
+    }
+
+def aplicar_perfil(captura, perfil):
+    """Pide el perfil a la captura y devuelve (configuración reportada, diferencias).
+
+    diferencias lista los campos pedidos que la cámara no tomó, como 'fourcc: MJPG -> YUYV'.
+    """
+    import cv2
+    # El formato va antes que la resolución: en V4L2 el cambio de formato puede resetear el tamaño
+    if perfil.fourcc:
+        captura.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*perfil.fourcc))
+    if perfil.ancho and perfil.alto:
+        captura.set(cv2.CAP_PROP_FRAME_WIDTH, perfil.ancho)
+        captura.set(cv2.CAP_PROP_FRAME_HEIGHT, perfil.alto)
+    if perfil.fps:
+        captura.set(cv2.CAP_PROP_FPS, perfil.fps)
+    if perfil.buffer:
+        captura.set(cv2.CAP_PROP_BUFFERSIZE, perfil.buffer)
+    obtenida = leer_configuracion(captura)
+    diferencias = []
+    for campo, pedido in perfil._asdict().items():
+        if pedido is None:
+            continue
+        obtenido = obtenida[campo]
+        if campo == 'fps' and obtenido and abs(obtenido - pedido) < 0.5:
+            continue
+        if obtenido != pedido:
+            diferencias.append(f"{campo}: {pedido} -> {'no informado' if obtenido is None else obtenido}")
+    return obtenida, diferencias
+
+def descubrir_camara(indices=INDICES_CAMARA, perfil=None, abrir_captura=None):
+    """Prueba los índices en orden; el primero que abre y entrega un cuadro queda con el perfil
+    aplicado. Devuelve (indice, captura, configuración reportada, diferencias)."""
+    if abrir_captura is None:
+        import cv2
+        abrir_captura = cv2.VideoCapture
+    for indice in indices:
+        captura = abrir_captura(indice)
+        if not captura.isOpened():
+            captura.release()
+            continue
+        configuracion, diferencias = aplicar_perfil(captura, perfil) if perfil else (leer_configuracion(captura), [])
+        # Algunas cámaras abren pero no entregan cuadros (ocupadas por otro programa)
+        if captura.read()[0]:
+            return indice, captura, configuracion, diferencias
+        captura.release()
+    raise OSError(f"No se pudo acceder a la cámara (índices probados: {', '.join(map(str, indices))})")
+
+def cargar_config_camara(ruta=None):
+    """La configuración guardada de esta estación, o {} si no hay."""
+    try:
+        with open(ruta or RUTA_CONFIG_CAMARA, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+def guardar_config_camara(datos, ruta=None):
+    try:
+        with open(ruta or RUTA_CONFIG_CAMARA, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, indent=2, ensure_ascii=False)
+    except OSError as e:
+        print(f"Aviso: no se pudo guardar la configuración de la cámara: {e}")
+
+def abrir_camara(indice=None, perfil=None, abrir_captura=None, ruta_config=None, guardar=True):
+    """FuenteCamara con el perfil pedido, el de ASISTENCIA_PERFIL_CAMARA o el guardado para esta
+    estación. Sin índice, prueba primero el guardado. Si el índice, el perfil o lo obtenido
+    cambiaron, actualiza el archivo (con guardar=False no lo toca). Con una captura sustituta
+    (abrir_captura) el archivo de la estación solo se usa si se indica ruta_config."""
+    usar_archivo = abrir_captura is None or ruta_config is not None
+    guardada = cargar_config_camara(ruta_config) if usar_archivo else {}
+    nombre_perfil, perfil = obtener_perfil(perfil or os.environ.get("ASISTENCIA_PERFIL_CAMARA") or guardada.get('perfil'))
+    if indice is not None:
+        indices = (indice,)
+    else:
+        anterior = guardada.get('indice')
+        indices = ((anterior,) if anterior is not None else ()) + tuple(i for i in INDICES_CAMARA if i != anterior)
+    fuente = FuenteCamara(indices, perfil, abrir_captura)
+    fuente.perfil = nombre_perfil
+    for diferencia in fuente.diferencias:
+        print(f"Aviso: la cámara {fuente.indice} no tomó el perfil '{nombre_perfil}' ({diferencia})")
+    if usar_archivo and guardar and (guardada.get('indice'), guardada.get('perfil'), guardada.get('configuracion')) != \
+            (fuente.indice, nombre_perfil, fuente.configuracion):
+        guardada.update(indice=fuente.indice, perfil=nombre_perfil, configuracion=fuente.configuracion,
+                        diferencias=fuente.diferencias, fecha=datetime.now().isoformat(timespec='seconds'))
+        guardar_config_camara(guardada, ruta_config)
+    return fuente
+
+def medir_latencia(captura, cuadros=20, pausa=0.5):
+    """Estima el retraso que agrega la cola de la captura.
+
+    Después de una pausa sin leer, los cuadros que esperaban en la cola salen enseguida (en menos
+    de un tercio del período) y recién después llegan al ritmo de la cámara. Si el lector tarda
+    más que un cuadro en procesar cada uno, la cola se mantiene llena y cada cuadro que decodifica
+    tiene esa antigüedad. Devuelve fps medidos, cuadros en cola y retraso_ms.
+    """
+    captura.read()
+    time.sleep(pausa)
+    esperas = []
+    for _ in range(cuadros):
+        inicio = time.perf_counter()
+        if not captura.read()[0]:
+            break
+        esperas.append(time.perf_counter() - inicio)
+    ritmo = sorted(esperas[len(esperas) // 2:])
+    periodo = ritmo[len(ritmo) // 2] if ritmo else 0.0
+    en_cola = 0
+    for espera in esperas:
+        if espera >= periodo / 3:
+            break
+        en_cola += 1
+    return {
+        'fps': round(1 / periodo, 1) if periodo else None,
+        'en_cola': en_cola,
+        'retraso_ms': round(en_cola * periodo * 1000, 1),
+    }
+
+class CapturaFalsa:
+    """Sustituto de cv2.VideoCapture para probar perfiles, descubrimiento y latencia sin cámara.
+
+    Solo abre los índices de 'disponibles'. Produce cuadros a 'fps' con el reloj real y guarda
+    hasta 'cola' cuadros sin leer (descarta los más viejos), como el driver. Elige la resolución
+    de 'modos' más cercana a la pedida, ignora los formatos fuera de 'formatos' y, con
+    buffer_configurable=False, no deja cambiar el largo de la cola (como muchos backends).
+    Con 'contenidos', los cuadros muestran uno de esos QR.
+    """
+
+    def __init__(self, indice=0, disponibles=(0,), fps=30.0, cola=4, modos=((640, 480), (1280, 720), (1920, 1080)),
+                 formatos=('YUYV', 'MJPG'), buffer_configurable=True, contenidos=None):
+        import cv2
+        self.abierta = indice in disponibles
+        self.fps_maximos = fps
+        self.fps = fps
+        self.cola = cola
+        self.modos = modos
+        self.formatos = formatos
+        self.buffer_configurable = buffer_configurable
+        self.contenidos = contenidos
+        self.ancho, self.alto = modos[-1]
+        self.fourcc = cv2.VideoWriter_fourcc(*formatos[0])
+        self._base = None
+        self._inicio = time.perf_counter()
+        self._ultimo = -1
+
+    def isOpened(self):
+        return self.abierta
+
+    def set(self, propiedad, valor):
+        import cv2
+        if propiedad == cv2.CAP_PROP_FRAME_WIDTH:
+            self.ancho, self.alto = min(self.modos, key=lambda m: (abs(m[0] - valor), abs(m[1] - self.alto)))
+        elif propiedad == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.ancho, self.alto = min(self.modos, key=lambda m: (abs(m[0] - self.ancho), abs(m[1] - valor)))
+        elif propiedad == cv2.CAP_PROP_FOURCC:
+            if _texto_fourcc(valor) not in self.formatos:
+                return False
+            self.fourcc = int(valor)
+        elif propiedad == cv2.CAP_PROP_FPS:
+            self.fps = min(float(valor), self.fps_maximos)
+        elif propiedad == cv2.CAP_PROP_BUFFERSIZE:
+            if not self.buffer_configurable:
+                return False
+            self.cola = max(int(valor), 1)
+        else:
+            return False
+        self._base = None
+        return True
+
+    def get(self, propiedad):
+        import cv2
+        return float({cv2.CAP_PROP_FRAME_WIDTH: self.ancho, cv2.CAP_PROP_FRAME_HEIGHT: self.alto,
+                      cv2.CAP_PROP_FOURCC: self.fourcc, cv2.CAP_PROP_FPS: self.fps,
+                      cv2.CAP_PROP_BUFFERSIZE: self.cola if self.buffer_configurable else 0}.get(propiedad, 0))
+
+    def read(self):
+        if not self.abierta:
+            return False, None
+        periodo = 1.0 / self.fps
+        producidos = int((time.perf_counter() - self._inicio) / periodo)
+        # El más viejo que sigue en la cola; si no hay ninguno, se espera al próximo
+        siguiente = max(self._ultimo + 1, producidos - self.cola + 1)
+        espera = self._inicio + siguiente * periodo - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        self._ultimo = siguiente
+        return True, self._cuadro()
+
+    def _cuadro(self):
+        if self._base is None:
+            import sinteticos
+            rng = random.Random(self._ultimo)
+            qrs = [sinteticos.imagen_qr(rng.choice(self.contenidos))] if self.contenidos else []
+            self._base = sinteticos.cuadro_con_varios(qrs, rng, self.alto, self.ancho)
+        return self._base.copy()
+
+    def release(self):
+        self.abierta = False
+
+# --- 3. MODO CMD: REPRODUCIR UNA GRABACIÓN ---
+
+def main(argv=None):
+    """Pasa una fuente por el camino de escaneo del lector y lista los QR que se registrarían."""
+    parser = argparse.ArgumentParser(prog="reproducir-video",
+                                     description="Reproducir una grabación o fuente por el camino de escaneo.")
+    parser.add_argument('fuente', help="video:RUTA, imagenes:CARPETA, sintetica[:CUADROS] o una ruta")
+    parser.add_argument('--tiempo-real', action='store_true', help="Respetar los fps del video (por defecto, a máxima velocidad)")
+    parser.add_argument('--intervalo', type=float, default=3.0, help="Segundos entre escaneos del mismo QR (como el lector)")
+    parser.add_argument('--decodificador', choices=escaneo.DECODIFICADORES, default=escaneo.DECODIFICADOR_POR_DEFECTO)
+    parser.add_argument('--sin-filtro-calidad', action='store_true', help="Decodificar también los cuadros movidos u oscuros")
+    parser.add_argument('--rescate', action='store_true', help="Reintentar los cuadros sin lectura con la cascada de rescate")
+    parser.add_argument('-o', '--salida', help="CSV de escaneos (segundo, carril, contenido) para simular-ingreso --reproducir")
+    args = parser.parse_args(argv)
+
+    try:
+        nombre_decodificador, decodificador = escaneo.obtener_decodificador(args.decodificador, alternativa='opencv')
+        fuente = abrir(args.fuente, maxima=not args.tiempo_real)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    if isinstance(fuente, FuenteCamara) or (isinstance(fuente, FuenteSintetica) and fuente.cuadros is None):
+        fuente.cerrar()
+        print("Error: la fuente no tiene fin; use una grabación o indique los cuadros (sintetica:CUADROS).")
+        return 1
+
+    filtro = escaneo.FiltroRepetidos(args.intervalo)
+    calidad = None if args.sin_filtro_calidad else escaneo.filtro_calidad_del_entorno()
+    rescate = escaneo.CascadaRescate() if args.rescate else escaneo.cascada_rescate_del_entorno()
+    if rescate:
+        rescate.calibrar(decodificador)
+    escaneos, cuadros, decodificados = [], 0, 0
+    inicio = time.perf_counter()
+    try:
+        for frame in fuente:
+            cuadros += 1
+            codigos, _ = escaneo.procesar_cuadro(frame, decodificador, calidad=calidad, rescate=rescate)
+            decodificados += len(codigos)
+            for codigo in codigos:
+                contenido = codigo.data.decode('utf-8')
+                if filtro.admitir(contenido, fuente.marca_tiempo):
+                    escaneos.append((fuente.marca_tiempo, contenido))
+    finally:
+        fuente.cerrar()
+    duracion = time.perf_counter() - inicio
+
+    for marca, contenido in escaneos:
+        print(f"{marca:9.3f}s  {contenido}")
+    print(f"\n{cuadros} cuadros en {duracion:.2f} s ({cuadros / duracion if duracion else 0:.1f} cuadros/s, "
+          f"decodificador '{nombre_decodificador}'); {decodificados} lecturas, {len(escaneos)} escaneos admitidos.")
+    if calidad:
+        detalle = ", ".join(f"{cantidad} {motivo}" for motivo, cantidad in calidad.descartados.most_common())
+        print(f"Filtro de calidad: {sum(calidad.descartados.values())} cuadros sin decodificar ({detalle or 'ninguno'}).")
+    if rescate:
+        detalle = ", ".join(f"{cantidad} {etapa}" for etapa, cantidad in rescate.rescates.most_common())
+        print(f"Rescate: {rescate.intentos} cuadros reintentados, {sum(rescate.rescates.values())} leídos "
+              f"({detalle or 'ninguno'}); {rescate.sin_candidatos} sin patrones de búsqueda, "
+              f"{rescate.sin_tiempo} con etapas salteadas por tiempo.")
+    if args.salida:
+        with open(args.salida, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(('segundo', 'carril', 'contenido'))
+            escritor.writerows((f"{marca:.3f}", 0, contenido) for marca, contenido in escaneos)
+        print(f"Escaneos guardados en {args.salida}")
+    return 0
+
+# --- 4. MODO CMD: PROBAR LA CÁMARA ---
+
+def probar_camara(argv=None):
+    """Abre la cámara con cada perfil, muestra lo pedido contra lo obtenido y mide el retraso."""
+    parser = argparse.ArgumentParser(prog="probar-camara",
+                                     description="Probar perfiles de captura y medir el retraso de la cámara.")
+    parser.add_argument('--indice', type=int, help="Índice de la cámara (por defecto, el guardado o 0 y 1)")
+    parser.add_argument('--perfil', choices=PERFILES, action='append', help="Perfil a probar (se puede repetir; por defecto, todos)")
+    parser.add_argument('--cuadros', type=int, default=20, help="Cuadros leídos para medir el retraso")
+    parser.add_argument('--falsa', action='store_true', help="Usar una cámara simulada (CapturaFalsa) en lugar de la real")
+    parser.add_argument('--guardar', action='store_true', help="Dejar en la configuración de la estación el perfil con menos retraso")
+    args = parser.parse_args(argv)
+
+    abrir_captura = CapturaFalsa if args.falsa else None
+    medidos = []
+    print(f"{'perfil':<14} {'cámara':>6} {'resolución':>11} {'formato':>8} {'fps':>6} {'cola':>5} {'fps medidos':>12} "
+          f"{'en cola':>8} {'retraso':>9}")
+    for nombre in args.perfil or list(PERFILES):
+        try:
+            fuente = abrir_camara(args.indice, nombre, abrir_captura, guardar=False)
+        except (ImportError, OSError) as e:
+            print(f"Error: {e}")
+            return 1
+        try:
+            latencia = medir_latencia(fuente.captura, args.cuadros)
+        finally:
+            fuente.cerrar()
+        c = fuente.configuracion
+        medidos.append((latencia['retraso_ms'], nombre, fuente.indice))
+        print(f"{nombre:<14} {fuente.indice:>6} {c['ancho']:>5}x{c['alto']:<5} {c['fourcc'] or '?':>8} {c['fps']:>6g} "
+              f"{c['buffer'] or '?':>5} {latencia['fps'] or 0:>12.1f} {latencia['en_cola']:>8} {latencia['retraso_ms']:>7.0f}ms")
+        for diferencia in fuente.diferencias:
+            print(f"{'':<14} no tomó {diferencia}")
+
+    if args.guardar and not args.falsa:
+        _, nombre, indice = min(medidos)
+        abrir_camara(indice, nombre).cerrar()
+        print(f"\nPerfil '{nombre}' guardado para esta estación en {RUTA_CONFIG_CAMARA}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,24 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sqlite3
-import cv2
-import pandas as pd
 from datetime import datetime, time
 import os
 import threading
-from PIL import Image, ImageTk
-from pyzbar import pyzbar
 import time as time_module
 
-# Importar numpy después de verificar opencv
-try:
+# OpenCV, numpy, PIL y pyzbar se importan al iniciar la cámara y pandas al generar el reporte,
+# así la ventana aparece sin esperarlas
+cv2 = np = Image = ImageTk = pyzbar = None
+
+def cargar_librerias_vision():
+    """Importa las librerías de visión (una sola vez) y las deja como globales del módulo."""
+    global cv2, np, Image, ImageTk, pyzbar
+    if pyzbar is not None:
+        return
+    import cv2
     import numpy as np
-except ImportError:
-    # Esto es solo un mensaje de error por si numpy no está instalado
-    # El código debe tener numpy instalado para las partes de visión por computadora
-    pass 
+    from PIL import Image, ImageTk
+    from pyzbar import pyzbar
 
 class SistemaAsistenciaQR:
     def __init__(self):
@@ -175,6 +177,7 @@ class SistemaAsistenciaQR:
     def start_camera(self):
         """Inicia la cámara y el escaneo de QR."""
         try:
+            cargar_librerias_vision()
             # Intentar con cámara 0 (por defecto)
             self.camera = cv2.VideoCapture(0)  
             if not self.camera.isOpened():
@@ -193,6 +196,8 @@ class SistemaAsistenciaQR:
             
             self.update_info_text("Cámara iniciada. Acerca un código QR...")
             
+        except ImportError as e:
+            messagebox.showerror("Error de Librerías", f"Para usar la cámara, necesita:\n- opencv-python\n- pyzbar\n- pillow\n\nInstálalas con:\npip install opencv-python pyzbar pillow\n\nDetalle: {e}")
         except Exception as e:
             messagebox.showerror("Error de Cámara", f"No se pudo iniciar la cámara: {e}")
 
@@ -396,6 +401,7 @@ class SistemaAsistenciaQR:
     def generar_reporte_excel(self):
         """Genera un reporte de asistencia en Excel."""
         try:
+            import pandas as pd
             fecha_hoy = datetime.now().date()
             
             with sqlite3.connect("asistencia.db") as conn:
@@ -483,11 +489,8 @@ class SistemaAsistenciaQR:
 
 def main():
     """Función principal."""
-    # Verificar que numpy y pandas estén disponibles antes de iniciar
+    # Las librerías pesadas se verifican al usarlas (cámara / reporte), no antes de abrir la ventana
     try:
-        import numpy as np 
-        import pandas as pd
-        
         app = SistemaAsistenciaQR()
         app.run()
         
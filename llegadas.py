@@ -0,0 +1,235 @@
+import argparse
+import sqlite3
+import sys
+from datetime import datetime, time
+
+# numpy se importa recién al armar el histograma: el lector QR importa este módulo al iniciar
+# solo para instalar la tabla y los triggers.
+
+# --- 1. HISTOGRAMA DE LLEGADAS POR MINUTO ---
+
+PUERTA_POR_DEFECTO = "principal"
+MINUTOS_POR_DIA = 24 * 60
+
+# El histograma se mantiene con un trigger sobre asistencia: cada registro suma 1 al minuto
+# (fecha, puerta, HH*60+MM) correspondiente, sin importar quién haga el INSERT.
+SQL_HISTOGRAMA = f"""
+    CREATE TABLE IF NOT EXISTS llegadas_por_minuto (
+        fecha TEXT NOT NULL,
+        puerta TEXT NOT NULL,
+        minuto INTEGER NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, puerta, minuto)
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS asistencia_llegadas_ai AFTER INSERT ON asistencia BEGIN
+        INSERT INTO llegadas_por_minuto (fecha, puerta, minuto, cantidad)
+        VALUES (NEW.fecha,
+                COALESCE(NEW.puerta, '{PUERTA_POR_DEFECTO}'),
+                CAST(substr(NEW.hora_ingreso, 1, 2) AS INTEGER) * 60 + CAST(substr(NEW.hora_ingreso, 4, 2) AS INTEGER),
+                1)
+        ON CONFLICT (fecha, puerta, minuto) DO UPDATE SET cantidad = cantidad + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS asistencia_llegadas_ad AFTER DELETE ON asistencia BEGIN
+        UPDATE llegadas_por_minuto SET cantidad = cantidad - 1
+        WHERE fecha = OLD.fecha
+          AND puerta = COALESCE(OLD.puerta, '{PUERTA_POR_DEFECTO}')
+          AND minuto = CAST(substr(OLD.hora_ingreso, 1, 2) AS INTEGER) * 60 + CAST(substr(OLD.hora_ingreso, 4, 2) AS INTEGER);
+    END;
+"""
+
+def instalar_histograma(conn):
+    """Agrega la columna puerta a asistencia, crea el histograma y sus triggers.
+
+    Si el histograma no existía se reconstruye a partir del historial.
+    """
+    cursor = conn.cursor()
+    columnas = [fila[1] for fila in cursor.execute("PRAGMA table_info(asistencia)")]
+    if 'puerta' not in columnas:
+        cursor.execute("ALTER TABLE asistencia ADD COLUMN puerta TEXT")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='llegadas_por_minuto'")
+    existia = cursor.fetchone() is not None
+    cursor.executescript(SQL_HISTOGRAMA)
+    if not existia:
+        reconstruir_histograma(conn)
+
+def reconstruir_histograma(conn):
+    """Recalcula el histograma completo desde la tabla asistencia."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM llegadas_por_minuto")
+    cursor.execute(f"""
+        INSERT INTO llegadas_por_minuto (fecha, puerta, minuto, cantidad)
+        SELECT fecha,
+               COALESCE(puerta, '{PUERTA_POR_DEFECTO}'),
+               CAST(substr(hora_ingreso, 1, 2) AS INTEGER) * 60 + CAST(substr(hora_ingreso, 4, 2) AS INTEGER) AS minuto,
+               COUNT(*)
+        FROM asistencia
+        GROUP BY 1, 2, 3
+    """)
+    conn.commit()
+
+# --- 2. CONSULTAS VECTORIZADAS ---
+
+class HistogramaLlegadas:
+    """Llegadas por minuto: una fila por (fecha, puerta) y una columna por minuto del día."""
+
+    def __init__(self, claves, conteos):
+        self.claves = claves          # lista de (fecha, puerta)
+        self.conteos = conteos        # np.ndarray (len(claves), 1440) de int32
+
+    def recortar(self, inicio, fin):
+        """Devuelve (conteos, primer_minuto) limitados a la ventana de ingreso."""
+        desde = inicio.hour * 60 + inicio.minute
+        hasta = fin.hour * 60 + fin.minute
+        return self.conteos[:, desde:hasta + 1], desde
+
+    def totales(self):
+        return self.conteos.sum(axis=1)
+
+    def pico_por_minuto(self):
+        """Máximo de escaneos en un minuto y el minuto en que ocurrió, por (fecha, puerta)."""
+        return self.conteos.max(axis=1), self.conteos.argmax(axis=1)
+
+    def percentiles(self, percentiles=(50, 90, 99)):
+        """Minuto del día en el que se alcanza cada percentil de llegadas, por (fecha, puerta).
+
+        Devuelve un arreglo (len(claves), len(percentiles)); -1 para filas sin llegadas.
+        """
+        import numpy as np
+        acumulado = np.cumsum(self.conteos, axis=1)
+        total = acumulado[:, -1:]
+        objetivos = total * (np.asarray(percentiles, dtype=float) / 100.0)[None, :]
+        # searchsorted fila por fila sería un bucle; se compara contra todos los minutos a la vez
+        minutos = (acumulado[:, None, :] < objetivos[:, :, None]).sum(axis=2)
+        return np.where(total > 0, minutos, -1)
+
+    def espera_maxima(self, estaciones, segundos_por_escaneo, inicio=None, fin=None):
+        """Espera máxima estimada (segundos) por (fecha, puerta) con una cantidad de estaciones.
+
+        Modelo de cola fluida minuto a minuto: lo que no se atiende en un minuto pasa al siguiente.
+        """
+        import numpy as np
+        conteos, _ = self.recortar(inicio, fin) if inicio and fin else (self.conteos, 0)
+        estaciones = np.asarray(estaciones, dtype=float)
+        capacidad = estaciones * 60.0 / segundos_por_escaneo
+        pendientes = np.zeros(np.broadcast(conteos[:, 0], capacidad).shape)
+        maxima = np.zeros_like(pendientes)
+        for minuto in range(conteos.shape[1]):
+            pendientes = np.maximum(pendientes + conteos[:, minuto] - capacidad, 0.0)
+            np.maximum(maxima, pendientes, out=maxima)
+        return maxima * segundos_por_escaneo / estaciones
+
+    def estaciones_necesarias(self, segundos_por_escaneo, espera_objetivo=60, inicio=None, fin=None,
+                              maximo_estaciones=50):
+        """Mínima cantidad de estaciones para que la cola no supere espera_objetivo, por (fecha, puerta)."""
+        import numpy as np
+        necesarias = np.full(len(self.claves), maximo_estaciones, dtype=np.int32)
+        pendientes = np.ones(len(self.claves), dtype=bool)
+        for estaciones in range(1, maximo_estaciones + 1):
+            espera = self.espera_maxima(estaciones, segundos_por_escaneo, inicio, fin)
+            cumple = pendientes & (espera <= espera_objetivo)
+            necesarias[cumple] = estaciones
+            pendientes &= ~cumple
+            if not pendientes.any():
+                break
+        return necesarias
+
+def cargar_histograma(db_path="asistencia.db", desde=None, hasta=None, puerta=None):
+    """Lee el histograma precalculado y lo arma como matriz (fecha, puerta) x minuto."""
+    import numpy as np
+    sql = "SELECT fecha, puerta, minuto, cantidad FROM llegadas_por_minuto WHERE cantidad > 0"
+    params = []
+    if desde:
+        sql += " AND fecha >= ?"
+        params.append(str(desde))
+    if hasta:
+        sql += " AND fecha <= ?"
+        params.append(str(hasta))
+    if puerta:
+        sql += " AND puerta = ?"
+        params.append(puerta)
+    sql += " ORDER BY fecha, puerta"
+
+    with sqlite3.connect(db_path) as conn:
+        filas = conn.execute(sql, params).fetchall()
+
+    if not filas:
+        return HistogramaLlegadas([], np.zeros((0, MINUTOS_POR_DIA), dtype=np.int32))
+
+    fechas, puertas, minutos, cantidades = zip(*filas)
+    claves = list(dict.fromkeys(zip(fechas, puertas)))
+    indice = {clave: i for i, clave in enumerate(claves)}
+    filas_idx = np.fromiter((indice[c] for c in zip(fechas, puertas)), dtype=np.int64, count=len(fechas))
+
+    conteos = np.zeros((len(claves), MINUTOS_POR_DIA), dtype=np.int32)
+    np.add.at(conteos, (filas_idx, np.asarray(minutos) % MINUTOS_POR_DIA), np.asarray(cantidades, dtype=np.int32))
+    return HistogramaLlegadas(claves, conteos)
+
+def formato_minuto(minuto):
+    """Convierte minutos desde medianoche a 'HH:MM'."""
+    if minuto < 0:
+        return "--:--"
+    return f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+# --- 3. MODO CMD ---
+
+def _hora(texto):
+    return datetime.strptime(texto, '%H:%M').time()
+
+def main(argv=None):
+    """Reporte de llegadas por minuto y dimensionamiento de estaciones."""
+    parser = argparse.ArgumentParser(prog="llegadas", description="Analítica de llegadas al ingreso.")
+    parser.add_argument('consulta', choices=['resumen', 'estaciones'], help="Consulta a ejecutar")
+    parser.add_argument('--desde', help="Fecha inicial YYYY-MM-DD")
+    parser.add_argument('--hasta', help="Fecha final YYYY-MM-DD")
+    parser.add_argument('--puerta', help="Filtrar por puerta")
+    parser.add_argument('--inicio', type=_hora, default=time(7, 0), help="Inicio de la ventana de ingreso HH:MM")
+    parser.add_argument('--fin', type=_hora, default=time(10, 0), help="Fin de la ventana de ingreso HH:MM")
+    parser.add_argument('--segundos-por-escaneo', type=float, default=3.0,
+                        help="Tiempo medio de atención por estudiante en una estación")
+    parser.add_argument('--espera', type=float, default=60.0, help="Espera máxima aceptable en segundos")
+    parser.add_argument('--reconstruir', action='store_true', help="Recalcular el histograma desde asistencia")
+    args = parser.parse_args(argv)
+
+    try:
+        import numpy as np
+    except ImportError as e:
+        print(f"Error: Falta una librería esencial. Instala las dependencias con:\npip install numpy\nDetalle: {e}")
+        return 1
+
+    if args.reconstruir:
+        with sqlite3.connect("asistencia.db") as conn:
+            reconstruir_histograma(conn)
+
+    histograma = cargar_histograma(desde=args.desde, hasta=args.hasta, puerta=args.puerta)
+    if not histograma.claves:
+        print("No hay llegadas registradas para el período indicado.")
+        return 0
+
+    if args.consulta == 'resumen':
+        picos, minutos_pico = histograma.pico_por_minuto()
+        percentiles = histograma.percentiles((50, 90, 99))
+        totales = histograma.totales()
+        print(f"\n{'Fecha':<12} {'Puerta':<12} {'Total':>6} {'Pico/min':>9} {'A las':>6} {'p50':>6} {'p90':>6} {'p99':>6}")
+        print("-" * 70)
+        for i, (fecha, puerta) in enumerate(histograma.claves):
+            print(f"{fecha:<12} {puerta[:11]:<12} {totales[i]:>6} {picos[i]:>9} {formato_minuto(minutos_pico[i]):>6} "
+                  f"{formato_minuto(percentiles[i, 0]):>6} {formato_minuto(percentiles[i, 1]):>6} {formato_minuto(percentiles[i, 2]):>6}")
+
+    elif args.consulta == 'estaciones':
+        necesarias = histograma.estaciones_necesarias(args.segundos_por_escaneo, args.espera, args.inicio, args.fin)
+        print(f"\nEstaciones para esperar menos de {args.espera:.0f} s "
+              f"({args.segundos_por_escaneo:.1f} s por escaneo):")
+        por_puerta = {}
+        for (fecha, puerta), n in zip(histograma.claves, necesarias):
+            por_puerta.setdefault(puerta, []).append(int(n))
+        for puerta, valores in sorted(por_puerta.items()):
+            valores = np.asarray(valores)
+            print(f"  {puerta:<15} máximo: {valores.max():>3}   p90 de los días: {int(np.ceil(np.percentile(valores, 90))):>3}"
+                  f"   días analizados: {len(valores)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# --- 1. PARÁMETROS DE RENDERIZADO ---
+
+# Perfiles de generación. En la pantalla de un teléfono el código se ve siempre del mismo tamaño,
+# así que menos módulos (corrección L) o menos borde significan módulos más grandes para la
+# cámara. Se comparan con: python ajuste_qr.py
+PERFILES_QR = {
+    # Mismos valores que usa qrcode.make() por defecto
+    'predeterminado': {'version': None, 'error_correction': 'M', 'box_size': 10, 'border': 4},
+    # Corrección mínima: el código más chico posible, módulos más grandes en pantalla
+    'pantalla': {'version': None, 'error_correction': 'L', 'box_size': 10, 'border': 4},
+    # Como 'pantalla' pero con la mitad del margen (la pantalla ya tiene fondo claro alrededor)
+    'pantalla_margen_corto': {'version': None, 'error_correction': 'L', 'box_size': 10, 'border': 2},
+    # Corrección alta para credenciales impresas que se rayan o doblan
+    'impreso': {'version': None, 'error_correction': 'Q', 'box_size': 10, 'border': 4},
+}
+PERFIL_POR_DEFECTO = 'predeterminado'
+
+def parametros_perfil(nombre=None):
+    """Parámetros del perfil indicado (o del configurado en ASISTENCIA_PERFIL_QR)."""
+    nombre = nombre or os.environ.get("ASISTENCIA_PERFIL_QR") or PERFIL_POR_DEFECTO
+    if nombre not in PERFILES_QR:
+        raise ValueError(f"Perfil de QR desconocido: {nombre}. Opciones: {', '.join(PERFILES_QR)}")
+    return dict(PERFILES_QR[nombre])
+
+PARAMETROS_QR = PERFILES_QR[PERFIL_POR_DEFECTO]
+
+# Manifiesto con la clave de contenido de cada PNG generado en la carpeta
+NOMBRE_MANIFIESTO = ".manifiesto_qr.json"
+
+def nombre_archivo_qr(id_unico, nombre_y_apellido=""):
+    """Nombre del PNG de un estudiante (espacios y separadores reemplazados por '_')."""
+    nombre_sanitizado = nombre_y_apellido.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    return f"QR_{id_unico}_{nombre_sanitizado}.png"
+
+def clave_contenido(payload, parametros=None):
+    """Hash del contenido del QR y de los parámetros con los que se dibuja."""
+    parametros = parametros or parametros_perfil()
+    datos = json.dumps({'payload': payload, 'parametros': parametros}, sort_keys=True)
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+# --- 2. ESCRITURA ATÓMICA ---
+
+def _escribir_atomico(ruta, escribir):
+    """Escribe a un temporal en la misma carpeta y lo renombra, para no dejar archivos a medias."""
+    carpeta = os.path.dirname(ruta) or '.'
+    fd, temporal = tempfile.mkstemp(dir=carpeta, prefix='.tmp_', suffix=os.path.splitext(ruta)[1])
+    try:
+        with os.fdopen(fd, 'wb') as archivo:
+            escribir(archivo)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+def crear_imagen_qr(payload, parametros=None):
+    """Dibuja el QR con los parámetros indicados y devuelve la imagen PIL."""
+    import qrcode
+    parametros = parametros or parametros_perfil()
+    niveles = {
+        'L': qrcode.constants.ERROR_CORRECT_L,
+        'M': qrcode.constants.ERROR_CORRECT_M,
+        'Q': qrcode.constants.ERROR_CORRECT_Q,
+        'H': qrcode.constants.ERROR_CORRECT_H,
+    }
+    qr = qrcode.QRCode(
+        version=parametros['version'],
+        error_correction=niveles[parametros['error_correction']],
+        box_size=parametros['box_size'],
+        border=parametros['border'],
+    )
+    qr.add_data(payload)
+    qr.make(fit=parametros['version'] is None)
+    return qr.make_image()
+
+def guardar_qr(payload, ruta, parametros=None):
+    """Dibuja y guarda un QR de forma atómica."""
+    img = crear_imagen_qr(payload, parametros)
+    _escribir_atomico(ruta, lambda archivo: img.save(archivo, format='PNG'))
+
+def _renderizar(tarea):
+    """Trabajo de cada proceso: (payload, ruta, parametros) -> (ruta, error)."""
+    payload, ruta, parametros = tarea
+    try:
+        guardar_qr(payload, ruta, parametros)
+        return ruta, None
+    except Exception as e:
+        return ruta, str(e)
+
+# --- 3. MANIFIESTO ---
+
+def leer_manifiesto(carpeta):
+    try:
+        with open(os.path.join(carpeta, NOMBRE_MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+def guardar_manifiesto(carpeta, manifiesto):
+    datos = json.dumps(manifiesto, sort_keys=True, indent=0).encode('utf-8')
+    _escribir_atomico(os.path.join(carpeta, NOMBRE_MANIFIESTO), lambda archivo: archivo.write(datos))
+
+def _esta_actualizado(carpeta, nombre, clave, manifiesto):
+    return manifiesto.get(nombre) == clave and os.path.exists(os.path.join(carpeta, nombre))
+
+# --- 4. GENERACIÓN ---
+
+def generar_qr_archivo(carpeta, id_unico, nombre_y_apellido="", payload=None, parametros=None, forzar=False):
+    """Genera el QR de un solo estudiante salvo que ya exista sin cambios. Devuelve (ruta, generado)."""
+    payload = id_unico if payload is None else payload
+    parametros = parametros or parametros_perfil()
+    nombre = nombre_archivo_qr(id_unico, nombre_y_apellido)
+    ruta = os.path.join(carpeta, nombre)
+    clave = clave_contenido(payload, parametros)
+
+    manifiesto = leer_manifiesto(carpeta)
+    if not forzar and _esta_actualizado(carpeta, nombre, clave, manifiesto):
+        return ruta, False
+
+    guardar_qr(payload, ruta, parametros)
+    manifiesto[nombre] = clave
+    guardar_manifiesto(carpeta, manifiesto)
+    return ruta, True
+
+def generar_lote(carpeta, estudiantes, parametros=None, procesos=None, forzar=False, tamano_bloque=64):
+    """Genera en paralelo los QR de una lista de (id_unico, nombre_y_apellido[, payload]).
+
+    Los PNG cuyo contenido y parámetros no cambiaron se omiten. Devuelve un diccionario con
+    'generados', 'omitidos' y 'errores' (lista de (ruta, mensaje)).
+    """
+    parametros = parametros or parametros_perfil()
+    os.makedirs(carpeta, exist_ok=True)
+    manifiesto = leer_manifiesto(carpeta)
+
+    tareas = []
+    claves = {}
+    omitidos = 0
+    for estudiante in estudiantes:
+        id_unico, nombre_y_apellido = estudiante[0], estudiante[1] or ""
+        payload = estudiante[2] if len(estudiante) > 2 and estudiante[2] is not None else id_unico
+        nombre = nombre_archivo_qr(id_unico, nombre_y_apellido)
+        clave = clave_contenido(payload, parametros)
+        if not forzar and _esta_actualizado(carpeta, nombre, clave, manifiesto):
+            omitidos += 1
+            continue
+        claves[os.path.join(carpeta, nombre)] = (nombre, clave)
+        tareas.append((payload, os.path.join(carpeta, nombre), parametros))
+
+    errores = []
+    generados = 0
+    if tareas:
+        if procesos == 1 or len(tareas) < tamano_bloque:
+            resultados = [_renderizar(tarea) for tarea in tareas]
+        else:
+            # Se importa acá: concurrent.futures/multiprocessing pesan en el arranque de quien importa lote_qr
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=procesos) as executor:
+                resultados = list(executor.map(_renderizar, tareas, chunksize=tamano_bloque))
+
+        for ruta, error in resultados:
+            if error:
+                errores.append((ruta, error))
+                continue
+            nombre, clave = claves[ruta]
+            manifiesto[nombre] = clave
+            generados += 1
+        guardar_manifiesto(carpeta, manifiesto)
+
+    return {'generados': generados, 'omitidos': omitidos, 'errores': errores}
@@ -0,0 +1,183 @@
+import bisect
+import copy
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- 1. HISTOGRAMAS Y CONTADORES ---
+#
+# Métricas del lector en memoria, expuestas en el formato de texto de Prometheus por HTTP
+# (solo en la máquina local) o en un archivo para el textfile collector de node_exporter.
+# Registrar una observación es una búsqueda binaria y dos sumas bajo un lock.
+
+# Límites en segundos: de medio milisegundo (una consulta por índice) a varios segundos
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histograma:
+    """Cantidad de observaciones por balde, suma y total (baldes acumulados al exponer)."""
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = tuple(limites)
+        self.baldes = [0] * (len(self.limites) + 1)   # el último es +Inf
+        self.suma = 0.0
+        self.cantidad = 0
+
+    def observar(self, valor):
+        self.baldes[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cantidad += 1
+
+    def sumar(self, otro):
+        """Acumula otro histograma con los mismos límites (por ejemplo, de otro proceso)."""
+        self.baldes = [a + b for a, b in zip(self.baldes, otro.baldes)]
+        self.suma += otro.suma
+        self.cantidad += otro.cantidad
+
+    def percentil(self, p):
+        """Estimación por interpolación lineal dentro del balde (como histogram_quantile)."""
+        if not self.cantidad:
+            return 0.0
+        objetivo = self.cantidad * p / 100.0
+        acumulado = 0
+        for i, cantidad in enumerate(self.baldes):
+            if cantidad and acumulado + cantidad >= objetivo:
+                if i == len(self.limites):
+                    return self.limites[-1]   # en +Inf solo se sabe que supera el último límite
+                desde = self.limites[i - 1] if i else 0.0
+                return desde + (self.limites[i] - desde) * (objetivo - acumulado) / cantidad
+            acumulado += cantidad
+        return self.limites[-1]
+
+def percentil(valores, p):
+    """Percentil exacto de una lista de muestras (el valor en esa posición, sin interpolar), o 0.0
+    si está vacía. Para los benchmarks y el simulador, que guardan cada muestra."""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))] if ordenados else 0.0
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas) + "}"
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class Metricas:
+    """Registro de contadores e histogramas con etiquetas, seguro entre hilos."""
+
+    def __init__(self, prefijo="asistencia"):
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self._familias = {}   # nombre -> (tipo, ayuda, {etiquetas: valor o Histograma})
+
+    def _serie(self, nombre, tipo, ayuda, etiquetas):
+        familia = self._familias.get(nombre)
+        if familia is None:
+            familia = self._familias[nombre] = (tipo, ayuda, {})
+        clave = tuple(sorted(etiquetas.items()))
+        series = familia[2]
+        if clave not in series:
+            series[clave] = Histograma() if tipo == 'histogram' else 0
+        return series, clave
+
+    def incrementar(self, nombre, ayuda="", cantidad=1, **etiquetas):
+        with self._lock:
+            series, clave = self._serie(nombre, 'counter', ayuda, etiquetas)
+            series[clave] += cantidad
+
+    def observar(self, nombre, segundos, ayuda="", **etiquetas):
+        with self._lock:
+            series, clave = self._serie(nombre, 'histogram', ayuda, etiquetas)
+            series[clave].observar(segundos)
+
+    def histogramas(self, nombre):
+        """Copia de los histogramas de una familia: {etiquetas: Histograma}."""
+        with self._lock:
+            series = self._familias.get(nombre, (None, None, {}))[2]
+            return {etiquetas: copy.deepcopy(valor) for etiquetas, valor in series.items()}
+
+    def observar_etapa(self, etapa, segundos):
+        self.observar("etapa_segundos", segundos, "Duración de cada etapa del escaneo", etapa=etapa)
+
+    @contextmanager
+    def medir(self, etapa):
+        """Mide la duración del bloque como una observación de la etapa."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar_etapa(etapa, time.perf_counter() - inicio)
+
+    def exponer(self):
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)."""
+        lineas = []
+        with self._lock:
+            for nombre, (tipo, ayuda, series) in sorted(self._familias.items()):
+                completo = f"{self.prefijo}_{nombre}"
+                if tipo == 'counter':
+                    completo += "_total"
+                lineas.append(f"# HELP {completo} {ayuda}")
+                lineas.append(f"# TYPE {completo} {tipo}")
+                for etiquetas, valor in sorted(series.items()):
+                    if tipo == 'counter':
+                        lineas.append(f"{completo}{_etiquetas(etiquetas)} {_numero(valor)}")
+                        continue
+                    acumulado = 0
+                    for limite, cantidad in zip(valor.limites + (float('inf'),), valor.baldes):
+                        acumulado += cantidad
+                        le = "+Inf" if limite == float('inf') else repr(limite)
+                        lineas.append(f"{completo}_bucket{_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+                    lineas.append(f"{completo}_sum{_etiquetas(etiquetas)} {_numero(valor.suma)}")
+                    lineas.append(f"{completo}_count{_etiquetas(etiquetas)} {valor.cantidad}")
+        return "\n".join(lineas) + "\n"
+
+# --- 2. EXPOSICIÓN ---
+
+def servir_http(metricas, puerto, host="127.0.0.1"):
+    """Sirve /metrics en un hilo de fondo. Devuelve el servidor (server.shutdown() lo detiene)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            cuerpo = metricas.exponer().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            pass  # sin una línea por cada scrape en la consola del lector
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="metricas-http").start()
+    return servidor
+
+def escribir_textfile(metricas, ruta):
+    """Escribe las métricas de forma atómica (para el textfile collector de node_exporter)."""
+    import lote_qr
+    contenido = metricas.exponer().encode('utf-8')
+    lote_qr._escribir_atomico(ruta, lambda archivo: archivo.write(contenido))
+
+def escribir_textfile_periodico(metricas, ruta, intervalo=15.0):
+    """Reescribe el archivo cada 'intervalo' segundos desde un hilo de fondo. Devuelve un Event para detenerlo."""
+    detener = threading.Event()
+
+    def bucle():
+        while not detener.wait(intervalo):
+            try:
+                escribir_textfile(metricas, ruta)
+            except OSError as e:
+                print(f"Error al escribir métricas en {ruta}: {e}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    threading.Thread(target=bucle, daemon=True, name="metricas-archivo").start()
+    return detener
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import date
+
+# --- 1. PANEL DE ÚLTIMOS ESCANEOS ---
+#
+# En una ráfaga (varios escaneos por segundo) la ventana no redibuja el panel ni vuelve a contar
+# en la BD por cada escaneo. Los resultados se acumulan en memoria (los últimos N y los
+# contadores del día) y el panel se pinta como mucho una vez cada 'intervalo' segundos con el
+# estado que haya en ese momento: diez escaneos seguidos producen uno o dos redibujos.
+
+ULTIMOS_POR_DEFECTO = 5
+INTERVALO_POR_DEFECTO = 0.25
+
+# ultimos: resúmenes de una línea, el más reciente primero; detalle: el mensaje completo del
+# último escaneo; estadisticas: (presentes, total, fecha), un texto de error o None;
+# espera: segundos desde el primer cambio sin pintar hasta este redibujo
+Instantanea = namedtuple('Instantanea', 'ultimos detalle estadisticas espera')
+
+class PanelEscaneos:
+    """Estado del panel de información y agenda de sus redibujos.
+
+    programar(ms, funcion) agenda en el hilo de la interfaz (root.after) y pintar(instantanea)
+    dibuja. agregar() y fijar_estadisticas() se pueden llamar desde cualquier hilo.
+    """
+
+    def __init__(self, programar, pintar, ultimos=ULTIMOS_POR_DEFECTO, intervalo=INTERVALO_POR_DEFECTO,
+                 reloj=time.monotonic):
+        self.programar = programar
+        self.pintar = pintar
+        self.intervalo = intervalo
+        self.reloj = reloj
+        self._lock = threading.Lock()
+        self._ultimos = deque(maxlen=ultimos)
+        self._detalle = None
+        self._estadisticas = None
+        self._agendado = False
+        self._pendiente_desde = None
+        self._ultimo_pintado = float('-inf')
+        self.agregados = 0
+        self.pintados = 0
+
+    @property
+    def pendiente(self):
+        return self._agendado
+
+    def agregar(self, resumen, detalle, registrado=False):
+        """Suma un escaneo. Si quedó registrado, los presentes de hoy se cuentan en memoria."""
+        with self._lock:
+            self._ultimos.appendleft(resumen)
+            self._detalle = detalle
+            self.agregados += 1
+            if registrado and isinstance(self._estadisticas, tuple):
+                presentes, total, fecha = self._estadisticas
+                hoy = str(date.today())
+                self._estadisticas = (presentes + 1 if fecha == hoy else 1, total, hoy)
+            self._marcar()
+
+    def fijar_estadisticas(self, estadisticas):
+        """Reemplaza los contadores con los leídos de la BD (al iniciar y cada tanto)."""
+        with self._lock:
+            self._estadisticas = estadisticas
+            self._marcar()
+
+    def _marcar(self):
+        if self._pendiente_desde is None:
+            self._pendiente_desde = self.reloj()
+        if self._agendado:
+            return
+        self._agendado = True
+        espera = max(0.0, self._ultimo_pintado + self.intervalo - self.reloj())
+        self.programar(int(espera * 1000), self._pintar)
+
+    def _pintar(self):
+        with self._lock:
+            self._agendado = False
+            self._ultimo_pintado = self.reloj()
+            instantanea = Instantanea(list(self._ultimos), self._detalle, self._estadisticas,
+                                      self._ultimo_pintado - self._pendiente_desde)
+            self._pendiente_desde = None
+            self.pintados += 1
+        self.pintar(instantanea)
@@ -0,0 +1,160 @@
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+# --- 1. PERFILADO A PEDIDO ---
+#
+# Para ver qué hace una estación lenta sin reiniciarla. Mientras no se pide un perfil no hay nada
+# corriendo (ni hilo ni hook de profiling). Dos modos:
+#   muestreo  un hilo toma las pilas de todos los hilos (Tk, captura y decodificación, BD) con
+#             sys._current_frames cada pocos milisegundos y las guarda en formato "collapsed"
+#             (una línea "hilo;función;función N"), que abren flamegraph.pl y speedscope.
+#   cprofile  cProfile sobre el hilo que lo inicia (el de Tk, desde el atajo de teclado) y
+#             guarda un .pstats para abrir con pstats o snakeviz.
+
+MODOS = ('muestreo', 'cprofile')
+INTERVALO_MUESTREO = 0.005
+
+def _marco(codigo):
+    nombre = getattr(codigo, 'co_qualname', codigo.co_name)
+    return f"{os.path.splitext(os.path.basename(codigo.co_filename))[0]}:{nombre}"
+
+class Muestreador:
+    """Cuenta las pilas de todos los hilos (menos el propio) cada 'intervalo' segundos."""
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True, name="perfilado")
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        return self.pilas
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            nombres = {hilo.ident: hilo.name for hilo in threading.enumerate()}
+            for ident, marco in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                pila = []
+                while marco is not None:
+                    pila.append(_marco(marco.f_code))
+                    marco = marco.f_back
+                pila.append(nombres.get(ident, str(ident)))
+                self.pilas[";".join(reversed(pila))] += 1
+            self.muestras += 1
+
+    def escribir_collapsed(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            for pila, cantidad in self.pilas.most_common():
+                archivo.write(f"{pila} {cantidad}\n")
+
+class Perfilador:
+    """Sesiones de perfilado de duración fija, que se prenden y apagan con alternar().
+
+    programar(ms, funcion) agenda el fin de la sesión; en la ventana es root.after, para que
+    cProfile se detenga en el mismo hilo en que se inició. Sin programar se usa un Timer.
+    """
+
+    def __init__(self, carpeta, modo='muestreo', segundos=30, prefijo="perfil", programar=None):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de perfilado desconocido: {modo}. Opciones: {', '.join(MODOS)}")
+        self.carpeta = carpeta
+        self.modo = modo
+        self.segundos = segundos
+        self.prefijo = prefijo
+        self.programar = programar
+        self._sesion = 0
+        self._inicio = None
+        self._muestreador = None
+        self._perfil = None
+
+    @property
+    def activo(self):
+        return self._inicio is not None
+
+    def alternar(self):
+        return self.detener() if self.activo else self.iniciar()
+
+    def iniciar(self):
+        if self.activo:
+            return None
+        self._sesion += 1
+        self._inicio = datetime.now()
+        if self.modo == 'cprofile':
+            import cProfile
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        else:
+            self._muestreador = Muestreador()
+            self._muestreador.iniciar()
+        sesion = self._sesion
+
+        def fin():
+            if self._sesion == sesion:   # no cortar una sesión posterior a la que agendó este fin
+                self.detener()
+
+        if self.programar:
+            self.programar(int(self.segundos * 1000), fin)
+        else:
+            temporizador = threading.Timer(self.segundos, fin)
+            temporizador.daemon = True
+            temporizador.start()
+        print(f"⏱️ Perfilado ({self.modo}) iniciado por {self.segundos:g} s")
+        return None
+
+    def detener(self):
+        """Termina la sesión y escribe el archivo. Devuelve su ruta."""
+        if not self.activo:
+            return None
+        duracion = (datetime.now() - self._inicio).total_seconds()
+        nombre = f"{self.prefijo}_{self._inicio.strftime('%Y%m%d_%H%M%S')}"
+        self._inicio = None
+        os.makedirs(self.carpeta, exist_ok=True)
+        if self.modo == 'cprofile':
+            self._perfil.disable()
+            ruta = os.path.join(self.carpeta, nombre + ".pstats")
+            self._perfil.dump_stats(ruta)
+            self._perfil = None
+            detalle = ""
+        else:
+            muestreador = self._muestreador
+            muestreador.detener()
+            ruta = os.path.join(self.carpeta, nombre + ".collapsed")
+            muestreador.escribir_collapsed(ruta)
+            self._muestreador = None
+            detalle = f", {muestreador.muestras} muestras"
+        print(f"⏱️ Perfil de {duracion:.1f} s guardado en {ruta}{detalle}")
+        return ruta
+
+def resumen_collapsed(ruta, primeras=15):
+    """Funciones con más muestras propias (el último marco de cada pila) de un .collapsed."""
+    propias, total = Counter(), 0
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            pila, _, cantidad = linea.rstrip('\n').rpartition(' ')
+            propias[pila.rsplit(';', 1)[-1]] += int(cantidad)
+            total += int(cantidad)
+    return [(funcion, cantidad / total) for funcion, cantidad in propias.most_common(primeras)] if total else []
+
+if __name__ == "__main__":
+    # Resumen rápido de un perfil guardado: python perfilado.py perfil_20250310_081500.collapsed
+    if len(sys.argv) != 2:
+        print("Uso: python perfilado.py ARCHIVO.collapsed|ARCHIVO.pstats")
+        sys.exit(1)
+    if sys.argv[1].endswith('.pstats'):
+        import pstats
+        pstats.Stats(sys.argv[1]).sort_stats('cumulative').print_stats(25)
+    else:
+        for funcion, fraccion in resumen_collapsed(sys.argv[1]):
+            print(f"{fraccion:>7.1%}  {funcion}")
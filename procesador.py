@@ -0,0 +1,359 @@
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime
+from datetime import time as hora
+
+import bitacora
+import evidencias
+import firma_qr
+import llegadas
+import metricas
+
+# --- 1. ESQUEMA ---
+
+def crear_tablas(conn):
+    """Crea estudiantes, asistencia y el histograma de llegadas si no existen.
+
+    Devuelve True si la tabla estudiantes se creó recién.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='estudiantes'")
+    nueva = cursor.fetchone() is None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estudiantes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre_y_apellido TEXT NOT NULL,
+            id_unico_qr TEXT NOT NULL UNIQUE,
+            curso TEXT,
+            carrera TEXT,
+            fecha_de_nacimiento TEXT,
+            correo_electronico TEXT,
+            genero TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asistencia (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            hora_ingreso TEXT NOT NULL,
+            puerta TEXT,
+            FOREIGN KEY (student_id) REFERENCES estudiantes (id)
+        )
+    """)
+    # Histograma de llegadas por minuto (se mantiene con triggers sobre asistencia)
+    llegadas.instalar_histograma(conn)
+    # Fotos de los registros (opcionales, ver evidencias.AlmacenEvidencias)
+    evidencias.instalar_tabla(conn)
+    return nueva
+
+# --- 2. PROCESAMIENTO DE UN ESCANEO ---
+#
+# La lógica del lector sin Tk: horario, firma, búsqueda, duplicado e inserción. La ventana
+# (pruebadeqr.SistemaAsistenciaQR) solo muestra el resultado; el simulador de ingreso
+# (simulador_ingreso.py) dispara escaneos contra esta misma clase con una BD de prueba.
+
+# estado: registrado, ya_registrado, no_encontrado, invalido, fuera_de_horario, error_registro o error
+# estudiante: la fila de estudiantes (o None); detalle: motivo, hora o error según el estado
+Resultado = namedtuple('Resultado', 'estado estudiante detalle')
+
+CAMPOS_ESTUDIANTE = ("id, nombre_y_apellido, id_unico_qr, curso, carrera, "
+                     "fecha_de_nacimiento, correo_electronico, genero")
+
+# Códigos por consulta en procesar_lote (SQLite limita los parámetros de una sentencia)
+LOTE_MAXIMO = 500
+
+class ProcesadorEscaneos:
+    def __init__(self, db_path="asistencia.db", puerta=llegadas.PUERTA_POR_DEFECTO, hora_inicio=hora(0, 0),
+                 hora_fin=hora(23, 59), llavero=None, solo_firmados=False, antiguedad_clave_dias=None,
+                 metricas_lector=None, bitacora_lector=None, timeout_bd=5.0):
+        self.db_path = db_path
+        self.puerta = puerta
+        self.hora_inicio = hora_inicio
+        self.hora_fin = hora_fin
+        self.llavero = llavero
+        self.solo_firmados = solo_firmados
+        self.antiguedad_clave_dias = antiguedad_clave_dias
+        self.metricas = metricas_lector or metricas.Metricas()
+        self.bitacora = bitacora_lector or bitacora.Bitacora("lector")
+        self.timeout_bd = timeout_bd
+        self._conexion = None
+
+    def abrir_conexion(self):
+        """Deja abierta una conexión para el hilo que llama (ver EjecutorBD); sin ella, cada
+        consulta abre la suya."""
+        self._conexion = sqlite3.connect(self.db_path, timeout=self.timeout_bd)
+
+    def cerrar_conexion(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def conectar(self):
+        return self._conexion or sqlite3.connect(self.db_path, timeout=self.timeout_bd)
+
+    def procesar(self, qr_data, capturado=None):
+        """Procesa el contenido de un QR leído y devuelve un Resultado.
+
+        capturado es el perf_counter() de la lectura del cuadro, para medir el tiempo total
+        hasta el registro.
+        """
+        try:
+            hora_actual = datetime.now().time()
+            self.bitacora.debug("qr_leido", contenido=qr_data, hora=hora_actual, puerta=self.puerta)
+
+            if not (self.hora_inicio <= hora_actual <= self.hora_fin):
+                self.bitacora.info("fuera_de_horario", hora=hora_actual, desde=self.hora_inicio, hasta=self.hora_fin)
+                return self._resultado('fuera_de_horario', None, hora_actual)
+
+            # Validar la firma sin tocar la BD: los códigos falsos o dañados se descartan acá
+            with self.metricas.medir('validacion_firma'):
+                id_qr, motivo = self.validar_contenido(qr_data)
+            if motivo:
+                self.bitacora.info("qr_rechazado", contenido=qr_data, motivo=motivo)
+                return self._resultado('invalido', None, motivo)
+
+            # Un error de SQLite (BD bloqueada) no es "no encontrado": se informa como error y el
+            # escaneo no sigue hasta la inserción
+            try:
+                with self.metricas.medir('busqueda_estudiante'):
+                    estudiante = self.buscar_estudiante(id_qr)
+            except sqlite3.Error as e:
+                self.bitacora.error("error_busqueda_estudiante", id_qr=id_qr, error=str(e))
+                return self._resultado('error', None, str(e))
+            if not estudiante:
+                self.bitacora.info("qr_no_reconocido", id_qr=id_qr)
+                return self._resultado('no_encontrado', None, id_qr)
+
+            try:
+                with self.metricas.medir('verificacion_duplicado'):
+                    ya_marco = self.ya_marco_asistencia_hoy(estudiante[0])
+            except sqlite3.Error as e:
+                self.bitacora.error("error_verificacion_duplicado", student_id=estudiante[0], error=str(e))
+                return self._resultado('error_registro', estudiante, str(e))
+            if ya_marco:
+                self.bitacora.info("ya_registrado", student_id=estudiante[0])
+                return self._resultado('ya_registrado', estudiante, None)
+
+            with self.metricas.medir('insercion'):
+                try:
+                    registrado = self.registrar_asistencia(estudiante[0])
+                except sqlite3.Error as e:
+                    self.bitacora.error("error_sqlite_registro", student_id=estudiante[0], error=str(e))
+                    return self._resultado('error_registro', estudiante, str(e))
+            if not registrado:
+                self.bitacora.error("registro_fallido", student_id=estudiante[0])
+                return self._resultado('error_registro', estudiante, None)
+            if capturado is not None:
+                self.metricas.observar('escaneo_a_registro_segundos', time.perf_counter() - capturado,
+                                       "Desde la lectura del cuadro hasta el registro guardado en la BD")
+            self.bitacora.info("asistencia_registrada", student_id=estudiante[0], id_qr=id_qr)
+            return self._resultado('registrado', estudiante, None)
+
+        except Exception as e:
+            self.bitacora.error("error_procesando_qr", contenido=qr_data, error=repr(e))
+            return self._resultado('error', None, str(e))
+
+    def procesar_lote(self, contenidos, capturados=None):
+        """Procesa juntos varios QR leídos (un grupo frente al molinete: varios códigos en un
+        cuadro, o los que se acumularon mientras la BD estaba ocupada).
+
+        Una sola búsqueda IN (...) de estudiantes y una sola transacción para verificar duplicados
+        e insertar. Devuelve un Resultado por contenido, en el mismo orden; si el mismo estudiante
+        aparece dos veces, el segundo queda como ya_registrado. capturados tiene el perf_counter()
+        de la lectura de cada contenido. Las etapas de las métricas se miden una vez por lote.
+        """
+        capturados = list(capturados or [None] * len(contenidos))
+        if len(contenidos) == 1:
+            return [self.procesar(contenidos[0], capturados[0])]
+        if len(contenidos) > LOTE_MAXIMO:
+            return (self.procesar_lote(contenidos[:LOTE_MAXIMO], capturados[:LOTE_MAXIMO]) +
+                    self.procesar_lote(contenidos[LOTE_MAXIMO:], capturados[LOTE_MAXIMO:]))
+        resultados = [None] * len(contenidos)
+        try:
+            hora_actual = datetime.now().time()
+            for contenido in contenidos:
+                self.bitacora.debug("qr_leido", contenido=contenido, hora=hora_actual, puerta=self.puerta)
+            self.metricas.incrementar('lotes', "Lotes de varios escaneos procesados juntos")
+
+            if not (self.hora_inicio <= hora_actual <= self.hora_fin):
+                self.bitacora.info("fuera_de_horario", hora=hora_actual, desde=self.hora_inicio, hasta=self.hora_fin,
+                                   escaneos=len(contenidos))
+                return [self._resultado('fuera_de_horario', None, hora_actual) for _ in contenidos]
+
+            pendientes = {}   # posición -> id_unico
+            with self.metricas.medir('validacion_firma'):
+                for i, contenido in enumerate(contenidos):
+                    id_qr, motivo = self.validar_contenido(contenido)
+                    if motivo:
+                        self.bitacora.info("qr_rechazado", contenido=contenido, motivo=motivo)
+                        resultados[i] = self._resultado('invalido', None, motivo)
+                    else:
+                        pendientes[i] = id_qr
+            if not pendientes:
+                return resultados
+
+            conn = self.conectar()
+            with self.metricas.medir('busqueda_estudiante'):
+                ids = sorted(set(pendientes.values()))
+                filas = conn.execute(f"SELECT {CAMPOS_ESTUDIANTE} FROM estudiantes WHERE id_unico_qr IN "
+                                     f"({', '.join('?' * len(ids))})", ids).fetchall()
+                estudiantes = {fila[2]: fila for fila in filas}
+            self.bitacora.debug("busqueda_lote", buscados=len(ids), encontrados=len(estudiantes))
+            for i, id_qr in list(pendientes.items()):
+                if id_qr not in estudiantes:
+                    self.bitacora.info("qr_no_reconocido", id_qr=id_qr)
+                    resultados[i] = self._resultado('no_encontrado', None, id_qr)
+                    del pendientes[i]
+            if not pendientes:
+                return resultados
+
+            fecha_hoy_str = str(datetime.now().date())
+            hora_actual_str = datetime.now().time().strftime('%H:%M:%S')
+            try:
+                # Verificación de duplicados e inserción en la misma transacción de escritura: otra
+                # estación no puede registrar a uno de estos estudiantes entre las dos
+                conn.execute("BEGIN IMMEDIATE")
+                with self.metricas.medir('verificacion_duplicado'):
+                    student_ids = sorted({estudiantes[id_qr][0] for id_qr in pendientes.values()})
+                    ya_marcaron = {fila[0] for fila in conn.execute(
+                        f"SELECT student_id FROM asistencia WHERE fecha = ? AND student_id IN "
+                        f"({', '.join('?' * len(student_ids))})", [fecha_hoy_str] + student_ids)}
+                nuevos = []
+                for i, id_qr in pendientes.items():
+                    estudiante = estudiantes[id_qr]
+                    if estudiante[0] in ya_marcaron:
+                        self.bitacora.info("ya_registrado", student_id=estudiante[0])
+                        resultados[i] = self._resultado('ya_registrado', estudiante, None)
+                    else:
+                        ya_marcaron.add(estudiante[0])
+                        nuevos.append(i)
+                with self.metricas.medir('insercion'):
+                    cursor = conn.executemany(
+                        "INSERT INTO asistencia (student_id, fecha, hora_ingreso, puerta) VALUES (?, ?, ?, ?)",
+                        [(estudiantes[pendientes[i]][0], fecha_hoy_str, hora_actual_str, self.puerta) for i in nuevos])
+                    if cursor.rowcount != len(nuevos):
+                        raise sqlite3.DatabaseError(f"se insertaron {cursor.rowcount} de {len(nuevos)} registros")
+                    conn.commit()
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                self.bitacora.error("error_sqlite_registro_lote", escaneos=len(pendientes), error=str(e))
+                for i, id_qr in pendientes.items():
+                    resultados[i] = self._resultado('error_registro', estudiantes[id_qr], str(e))
+                return resultados
+
+            for i in nuevos:
+                estudiante = estudiantes[pendientes[i]]
+                if capturados[i] is not None:
+                    self.metricas.observar('escaneo_a_registro_segundos', time.perf_counter() - capturados[i],
+                                           "Desde la lectura del cuadro hasta el registro guardado en la BD")
+                self.bitacora.info("asistencia_registrada", student_id=estudiante[0], id_qr=pendientes[i])
+                resultados[i] = self._resultado('registrado', estudiante, None)
+            return resultados
+
+        except Exception as e:
+            self.bitacora.error("error_procesando_lote", escaneos=len(contenidos), error=repr(e))
+            return [resultado or self._resultado('error', None, str(e)) for resultado in resultados]
+
+    def _resultado(self, estado, estudiante, detalle):
+        self.metricas.incrementar('escaneos', "Escaneos procesados por resultado", resultado=estado)
+        return Resultado(estado, estudiante, detalle)
+
+    def validar_contenido(self, qr_data):
+        """Devuelve (id_unico, None) si el contenido es aceptable o (None, motivo) si no."""
+        if firma_qr.es_firmado(qr_data):
+            if not self.llavero:
+                return None, "QR firmado pero esta estación no tiene llavero de claves"
+            return firma_qr.verificar(qr_data, self.llavero, self.antiguedad_clave_dias)
+        if self.solo_firmados:
+            return None, "QR sin firma (esta estación solo acepta QR firmados)"
+        return qr_data, None
+
+    def buscar_estudiante(self, id_qr):
+        """La fila del estudiante o None si no existe; los errores de SQLite se propagan."""
+        with self.conectar() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {CAMPOS_ESTUDIANTE} FROM estudiantes WHERE id_unico_qr = ?", (id_qr,))
+            resultado = cursor.fetchone()
+            self.bitacora.debug("busqueda_estudiante", id_qr=id_qr, encontrado=resultado is not None)
+            return resultado
+
+    def ya_marco_asistencia_hoy(self, student_id):
+        """True si ya tiene registro hoy; los errores de SQLite se propagan (no se asume que no marcó)."""
+        with self.conectar() as conn:
+            cursor = conn.cursor()
+            fecha_hoy_str = str(datetime.now().date())
+            cursor.execute("SELECT id FROM asistencia WHERE student_id = ? AND fecha = ?", (student_id, fecha_hoy_str))
+            resultado = cursor.fetchone()
+            self.bitacora.debug("verificacion_duplicado", student_id=student_id, fecha=fecha_hoy_str,
+                                ya_marco=resultado is not None)
+            return resultado is not None
+
+    def estadisticas_del_dia(self):
+        """(presentes hoy, total de estudiantes, fecha de hoy)."""
+        with self.conectar() as conn:
+            fecha_hoy = str(datetime.now().date())
+            presentes = conn.execute("SELECT COUNT(*) FROM asistencia WHERE fecha = ?", (fecha_hoy,)).fetchone()[0]
+            total = conn.execute("SELECT COUNT(*) FROM estudiantes").fetchone()[0]
+        return presentes, total, fecha_hoy
+
+    def registrar_asistencia(self, student_id):
+        """Inserta el registro de hoy. Devuelve True si quedó guardado; los errores de SQLite se propagan."""
+        with self.conectar() as conn:
+            cursor = conn.cursor()
+
+            fecha_hoy_str = str(datetime.now().date())
+            hora_actual_str = datetime.now().time().strftime('%H:%M:%S')
+
+            cursor.execute("""
+                INSERT INTO asistencia (student_id, fecha, hora_ingreso, puerta)
+                VALUES (?, ?, ?, ?)
+            """, (student_id, fecha_hoy_str, hora_actual_str, self.puerta))
+
+            conn.commit()
+
+            # Verificar que se insertó correctamente
+            cursor.execute("SELECT * FROM asistencia WHERE student_id = ? AND fecha = ?", (student_id, fecha_hoy_str))
+            registro_insertado = cursor.fetchone()
+            self.bitacora.debug("asistencia_insertada", student_id=student_id, fecha=fecha_hoy_str,
+                                hora=hora_actual_str, puerta=self.puerta, verificado=registro_insertado is not None)
+            if not registro_insertado:
+                self.bitacora.error("insercion_no_verificada", student_id=student_id, fecha=fecha_hoy_str)
+            return registro_insertado is not None
+
+# --- 3. EJECUTOR DE LA BD ---
+
+class EjecutorBD:
+    """Un único hilo dueño de la conexión del procesador.
+
+    La ventana le envía los escaneos y no espera a SQLite: si el disco está lento, se atrasan los
+    registros pero no la vista previa ni los botones. Con un solo hilo los escaneos se atienden en
+    el orden en que llegaron (el mismo estudiante nunca se procesa en paralelo consigo mismo).
+    """
+
+    def __init__(self, procesador_escaneos):
+        from concurrent.futures import ThreadPoolExecutor
+        self.procesador = procesador_escaneos
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bd",
+                                            initializer=procesador_escaneos.abrir_conexion)
+
+    def enviar(self, funcion, *args):
+        futuro = self._ejecutor.submit(funcion, *args)
+        futuro.add_done_callback(self._informar_error)
+        return futuro
+
+    def _informar_error(self, futuro):
+        if not futuro.cancelled() and futuro.exception() is not None:
+            self.procesador.bitacora.error("error_ejecutor_bd", error=repr(futuro.exception()))
+
+    def cerrar(self, esperar=True):
+        """Termina lo pendiente (los registros encolados se guardan) y cierra la conexión.
+
+        Devuelve el futuro del cierre. Con esperar=False no bloquea: la ventana lo espera
+        atendiendo sus eventos, porque lo pendiente puede estar llamando a Tk desde este hilo.
+        """
+        cerrado = self._ejecutor.submit(self.procesador.cerrar_conexion)
+        self._ejecutor.shutdown(wait=esperar)
+        return cerrado
@@ -1,21 +1,40 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 import sqlite3
-import cv2
-import pandas as pd
 from datetime import datetime, time
 import os
+import signal
 import threading
-from PIL import Image, ImageTk
-from pyzbar import pyzbar
 import time as time_module
 
-try:
-    import numpy as np
-    import openpyxl
-except ImportError as e:
-    print(f"Error: Falta una librería esencial. Instala las dependencias con:\npip install numpy opencv-python pyzbar pandas openpyxl pillow\nDetalle: {e}")
-    exit(1)
+import bitacora
+import escaneo
+import evidencias
+import firma_qr
+import fuentes_video
+import llegadas
+import metricas
+import panel_escaneos
+import perfilado
+import procesador
+import reportes
+
+# OpenCV, numpy, PIL y pyzbar se importan recién al usar la cámara o cargar una imagen
+# (ver cargar_librerias_vision) y pandas/openpyxl al generar el reporte: la ventana aparece
+# sin esperar a ninguna de ellas.
+cv2 = Image = ImageTk = pyzbar = None
+
+MENSAJE_DEPENDENCIAS = ("Falta una librería esencial. Instala las dependencias con:\n"
+                        "pip install numpy opencv-python pyzbar pandas openpyxl pillow")
+
+def cargar_librerias_vision():
+    """Importa las librerías de visión (una sola vez) y las deja como globales del módulo."""
+    global cv2, Image, ImageTk, pyzbar
+    if pyzbar is not None:
+        return
+    import cv2
+    from PIL import Image, ImageTk
+    from pyzbar import pyzbar
 
 class SistemaAsistenciaQR:
     def __init__(self):
@@ -23,18 +42,58 @@ class SistemaAsistenciaQR:
         self.root.title("Sistema de Asistencia - Lector QR")
         self.root.geometry("900x700")
         self.root.configure(bg='#ECF0F1')
+
+        # Diagnósticos del escaneo: apagados por defecto, ASISTENCIA_LOG_NIVEL=DEBUG los muestra
+        bitacora.configurar()
+        self.bitacora = bitacora.Bitacora("lector")
         
         # Variables de control
         self.camera = None
         self.is_scanning = False
+        self.abriendo_camara = False
         self.video_label = None
-        self.last_qr_code = ""
-        self.last_scan_time = 0
         self.scan_cooldown = 3
+        self.filtro_repetidos = escaneo.FiltroRepetidos(self.scan_cooldown)
+        # Los cuadros movidos, oscuros o quemados no se decodifican (ver escaneo.FiltroCalidad)
+        self.filtro_calidad = escaneo.filtro_calidad_del_entorno()
+        # ASISTENCIA_RESCATE=1: los cuadros sin lectura se reintentan preprocesados, con un tope de
+        # tiempo por cuadro (ver escaneo.CascadaRescate)
+        self.rescate = escaneo.cascada_rescate_del_entorno()
+
+        # Fuente de cuadros: la cámara por defecto. ASISTENCIA_FUENTE_VIDEO acepta también
+        # video:RUTA, imagenes:CARPETA, sintetica o falsa (cámara simulada) para probar el lector
+        # sin cámara; ASISTENCIA_FUENTE_MAXIMA=1 los reproduce sin esperar entre cuadros.
+        # ASISTENCIA_PERFIL_CAMARA elige el perfil de captura (ver fuentes_video.PERFILES); la
+        # cámara que funcionó y su configuración quedan en camara_estacion.json.
+        self.FUENTE_VIDEO = os.environ.get("ASISTENCIA_FUENTE_VIDEO", "camara")
+        self.FUENTE_MAXIMA = os.environ.get("ASISTENCIA_FUENTE_MAXIMA") == "1"
         
         # Configuración de horario de ingreso (más permisivo para pruebas)
         self.HORA_INICIO_INGRESO = time(0, 0)    # 00:00 (medianoche)
         self.HORA_FIN_INGRESO = time(23, 59)     # 23:59
+
+        # Latencia por etapa (captura -> registro) y contadores de escaneos. Se publican si está
+        # ASISTENCIA_METRICAS_PUERTO (http://127.0.0.1:<puerto>/metrics) o
+        # ASISTENCIA_METRICAS_ARCHIVO (textfile collector de node_exporter).
+        self.metricas = metricas.Metricas()
+        self.publicar_metricas()
+
+        # Lógica de cada escaneo (horario, firma, búsqueda, duplicado e inserción), sin Tk.
+        # ASISTENCIA_PUERTA identifica la puerta/estación en el histograma de llegadas.
+        # QR firmados: el llavero se carga una vez y la firma se verifica en memoria antes de ir a la BD.
+        # ASISTENCIA_SOLO_QR_FIRMADOS=1 rechaza los QR viejos (solo id_unico);
+        # ASISTENCIA_ANTIGUEDAD_CLAVE_QR_DIAS rechaza los QR firmados con una clave creada hace más
+        # días (el día de emisión del QR es el de la clave; ver firma_qr).
+        antiguedad = os.environ.get("ASISTENCIA_ANTIGUEDAD_CLAVE_QR_DIAS")
+        self.preparar_registro(procesador.ProcesadorEscaneos(
+            puerta=os.environ.get("ASISTENCIA_PUERTA", llegadas.PUERTA_POR_DEFECTO),
+            hora_inicio=self.HORA_INICIO_INGRESO,
+            hora_fin=self.HORA_FIN_INGRESO,
+            llavero=firma_qr.cargar_llavero(),
+            solo_firmados=os.environ.get("ASISTENCIA_SOLO_QR_FIRMADOS") == "1",
+            antiguedad_clave_dias=int(antiguedad) if antiguedad else None,
+            metricas_lector=self.metricas,
+            bitacora_lector=self.bitacora))
         
         # Configurar carpeta de reportes
         self.REPORTS_FOLDER = os.path.join(os.path.expanduser("~"), "Documents", "REPORTES_ASISTENCIA")
@@ -44,59 +103,94 @@ class SistemaAsistenciaQR:
         self.inicializar_db()
         
         self.setup_ui()
+        self.configurar_perfilado()
+
+        # Con la ventana ya visible, las librerías de visión se precargan en segundo plano para que
+        # "Iniciar Cámara" no tenga que esperarlas
+        self.root.after(500, lambda: threading.Thread(target=self.precargar_vision, daemon=True).start())
         
+    def preparar_registro(self, procesador_escaneos):
+        """Estado del registro de escaneos que no depende de los widgets: el hilo de la BD, los
+        escaneos pendientes de lote, el panel y las evidencias. Necesita root, metricas y bitacora.
+
+        benchmarks/bench_ui_bd.py arma el sistema sin ventana con este mismo método.
+        """
+        self.procesador = procesador_escaneos
+        # Las consultas e inserciones corren en un hilo con su propia conexión; a Tk solo vuelve
+        # el texto a mostrar
+        self.ejecutor_bd = procesador.EjecutorBD(procesador_escaneos)
+        # Al cerrar, lo que queda en el hilo de la BD se registra pero ya no toca la ventana, y no
+        # se le envía nada nuevo (se cambia con lock_pendientes tomado, ver process_qr_codes)
+        self.cerrando = False
+        self.resincronizacion = None   # after de resincronizar_estadisticas, se cancela al cerrar
+        # Escaneos esperando al hilo de la BD: los que llegan mientras está ocupado (o, con
+        # ASISTENCIA_VENTANA_LOTE_MS, dentro de esa ventana) se registran juntos en un lote
+        self.VENTANA_LOTE = float(os.environ.get("ASISTENCIA_VENTANA_LOTE_MS", "0")) / 1000
+        self.escaneos_pendientes = []
+        self.lote_agendado = False
+        self.lock_pendientes = threading.Lock()
+        # ASISTENCIA_EVIDENCIAS=1: foto del cuadro de cada registro, guardada en otro hilo y
+        # vinculada a su fila de asistencia (ver evidencias.almacen_del_entorno)
+        self.evidencias = evidencias.almacen_del_entorno(self.metricas, self.bitacora)
+        # Panel de información: los últimos escaneos y las estadísticas se guardan en memoria y se
+        # redibujan como mucho cada ASISTENCIA_REFRESCO_UI_MS (250 por defecto), aunque lleguen
+        # varios escaneos por segundo. ASISTENCIA_ULTIMOS_ESCANEOS fija cuántos se listan (5).
+        self.panel = panel_escaneos.PanelEscaneos(
+            self.root.after, self.pintar_panel,
+            ultimos=int(os.environ.get("ASISTENCIA_ULTIMOS_ESCANEOS", panel_escaneos.ULTIMOS_POR_DEFECTO)),
+            intervalo=float(os.environ.get("ASISTENCIA_REFRESCO_UI_MS", panel_escaneos.INTERVALO_POR_DEFECTO * 1000)) / 1000)
+
+    def publicar_metricas(self):
+        puerto = os.environ.get("ASISTENCIA_METRICAS_PUERTO")
+        archivo = os.environ.get("ASISTENCIA_METRICAS_ARCHIVO")
+        try:
+            if puerto:
+                metricas.servir_http(self.metricas, int(puerto))
+                print(f"📈 Métricas en http://127.0.0.1:{puerto}/metrics")
+            if archivo:
+                metricas.escribir_textfile_periodico(self.metricas, archivo)
+                print(f"📈 Métricas en {archivo}")
+        except (OSError, ValueError) as e:
+            print(f"❌ No se pudieron publicar las métricas: {e}")
+
+    def configurar_perfilado(self):
+        """Perfilado a pedido: Ctrl+Shift+P (o la señal SIGUSR1 fuera de Windows) prende y apaga
+        una sesión de ASISTENCIA_PERFIL_SEGUNDOS (30 por defecto). ASISTENCIA_PERFIL_MODO elige
+        muestreo (todos los hilos, por defecto) o cprofile (hilo de Tk). Los archivos quedan en
+        la carpeta de reportes, en 'perfiles'."""
+        try:
+            self.perfilador = perfilado.Perfilador(
+                os.path.join(self.REPORTS_FOLDER, "perfiles"),
+                modo=os.environ.get("ASISTENCIA_PERFIL_MODO", "muestreo"),
+                segundos=float(os.environ.get("ASISTENCIA_PERFIL_SEGUNDOS", "30")),
+                prefijo=f"perfil_{self.procesador.puerta}",
+                programar=self.root.after)
+        except ValueError as e:
+            print(f"❌ Perfilado deshabilitado: {e}")
+            return
+        self.root.bind_all('<Control-Shift-P>', lambda evento: self.perfilador.alternar())
+        if hasattr(signal, 'SIGUSR1'):
+            # El manejador corre en el hilo principal (el de Tk); se agenda para no cortar un callback
+            signal.signal(signal.SIGUSR1, lambda numero, marco: self.root.after(0, self.perfilador.alternar))
+
+    def precargar_vision(self):
+        try:
+            cargar_librerias_vision()
+        except ImportError:
+            pass  # El error se informa cuando se intenta usar la cámara o una imagen
+
     def inicializar_db(self):
         """Asegura que las tablas necesarias en la BD existan al iniciar."""
         try:
             with sqlite3.connect("asistencia.db") as conn:
-                cursor = conn.cursor()
-                
-                # Crear tabla de estudiantes si no existe
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='estudiantes'")
-                if not cursor.fetchone():
-                    cursor.execute("""
-                        CREATE TABLE estudiantes (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            nombre_y_apellido TEXT NOT NULL,
-                            id_unico_qr TEXT NOT NULL UNIQUE,
-                            curso TEXT,
-                            carrera TEXT,
-                            fecha_de_nacimiento TEXT,
-                            correo_electronico TEXT,
-                            genero TEXT
-                        )
-                    """)
+                # Estudiantes, asistencia y el histograma de llegadas por minuto
+                if procesador.crear_tablas(conn):
                     print("✅ Tabla 'estudiantes' creada.")
                 else:
                     print("✅ Tabla 'estudiantes' ya existe.")
                 
-                # Crear tabla de asistencia si no existe
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS asistencia (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        student_id INTEGER NOT NULL,
-                        fecha TEXT NOT NULL,
-                        hora_ingreso TEXT NOT NULL,
-                        FOREIGN KEY (student_id) REFERENCES estudiantes (id)
-                    )
-                """)
-                
-                # DIAGNÓSTICO: Verificar estructura de tablas
-                print("\n🔍 DIAGNÓSTICO DE BASE DE DATOS:")
-                cursor.execute("PRAGMA table_info(estudiantes)")
-                print("Estructura tabla 'estudiantes':", cursor.fetchall())
-                
-                cursor.execute("PRAGMA table_info(asistencia)")
-                print("Estructura tabla 'asistencia':", cursor.fetchall())
-                
-                # Mostrar datos existentes
-                cursor.execute("SELECT COUNT(*) FROM estudiantes")
-                total_estudiantes = cursor.fetchone()[0]
-                print(f"Total estudiantes registrados: {total_estudiantes}")
-                
-                cursor.execute("SELECT COUNT(*) FROM asistencia")
-                total_asistencias = cursor.fetchone()[0]
-                print(f"Total registros de asistencia: {total_asistencias}")
+                # El diagnóstico de tablas y conteos ya no corre al iniciar (recorría las tablas
+                # completas); queda disponible con el botón "Test DB"
                 
                 conn.commit()
                 print("✅ Base de datos inicializada correctamente.\n")
@@ -142,7 +236,7 @@ class SistemaAsistenciaQR:
         info_frame = tk.LabelFrame(main_frame, text="Información de Asistencia", font=('Arial', 12, 'bold'), bg='#ECF0F1', fg='#2C3E50')
         info_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=(10, 0))
 
-        self.info_text = tk.Text(info_frame, width=40, height=15, font=('Arial', 10), state=tk.DISABLED, relief=tk.FLAT)
+        self.info_text = tk.Text(info_frame, width=40, height=22, font=('Arial', 10), state=tk.DISABLED, relief=tk.FLAT)
         self.info_text.pack(padx=10, pady=10)
 
         stats_frame = tk.LabelFrame(info_frame, text="Estadísticas del Día", font=('Arial', 10, 'bold'), bg='#ECF0F1', fg='#2C3E50')
@@ -161,10 +255,13 @@ class SistemaAsistenciaQR:
         self.btn_generar_reporte = tk.Button(debug_frame, text="Generar Reporte", command=self.generar_reporte_excel, bg='#3498DB', fg='white', font=('Arial', 10, 'bold'), width=15)
         self.btn_generar_reporte.pack(side=tk.RIGHT, padx=2)
 
+        self.btn_exportar_historial = tk.Button(info_frame, text="Exportar Historial (CSV/Parquet/Arrow)", command=self.exportar_historial, bg='#16A085', fg='white', font=('Arial', 10, 'bold'))
+        self.btn_exportar_historial.pack(fill=tk.X, padx=10, pady=5)
+
         horario_info = tk.Label(self.root, text=f"Horario de ingreso: {self.HORA_INICIO_INGRESO.strftime('%H:%M')} - {self.HORA_FIN_INGRESO.strftime('%H:%M')}", font=('Arial', 9), bg='#ECF0F1', fg='#7F8C8D')
         horario_info.pack(side=tk.BOTTOM, pady=5)
 
-        self.update_stats()
+        self.resincronizar_estadisticas()
 
     def test_database(self):
         """Función de diagnóstico para probar la base de datos."""
@@ -198,29 +295,55 @@ class SistemaAsistenciaQR:
             self.update_info_text(f"❌ Error en diagnóstico: {e}")
 
     def start_camera(self):
+        """Abre la fuente en un hilo aparte: probar los índices y aplicar el perfil puede tardar
+        varios segundos y la ventana no se congela mientras tanto."""
+        self.btn_start_camera.configure(state=tk.DISABLED)
+        self.update_info_text("Buscando la cámara...")
+        self.abriendo_camara = True
+        threading.Thread(target=self.abrir_camara_en_segundo_plano, daemon=True, name="apertura_camara").start()
+
+    def abrir_camara_en_segundo_plano(self):
         try:
-            self.camera = cv2.VideoCapture(0)
-            if not self.camera.isOpened():
-                self.camera = cv2.VideoCapture(1)
-                if not self.camera.isOpened():
-                    raise Exception("No se pudo acceder a la cámara")
-            
-            self.is_scanning = True
-            self.btn_start_camera.configure(state=tk.DISABLED)
-            self.btn_stop_camera.configure(state=tk.NORMAL)
-            
-            self.video_thread = threading.Thread(target=self.video_loop, daemon=True)
-            self.video_thread.start()
-            
-            self.update_info_text("Cámara iniciada. Acerca un código QR...")
-            
+            cargar_librerias_vision()
+            if self.rescate and not self.rescate.calibrados:
+                self.rescate.calibrar()   # fuera del ciclo de captura: no se descuenta de ningún cuadro
+            fuente = fuentes_video.abrir(self.FUENTE_VIDEO, maxima=self.FUENTE_MAXIMA)
         except Exception as e:
-            messagebox.showerror("Error de Cámara", f"No se pudo iniciar la cámara: {e}")
+            self.root.after(0, self.camara_fallida, e)
+            return
+        self.root.after(0, self.camara_lista, fuente)
+
+    def camara_lista(self, fuente):
+        if not self.abriendo_camara:
+            fuente.cerrar()  # se detuvo o se cerró la ventana mientras se abría
+            return
+        self.abriendo_camara = False
+        self.camera = fuente
+        self.is_scanning = True
+        self.btn_stop_camera.configure(state=tk.NORMAL)
+        
+        self.video_thread = threading.Thread(target=self.video_loop, daemon=True, name="captura")
+        self.video_thread.start()
+        
+        configuracion = getattr(fuente, 'configuracion', None)
+        detalle = (f"\nCámara {fuente.indice}: {configuracion['ancho']}x{configuracion['alto']} "
+                   f"{configuracion['fourcc'] or ''} {configuracion['fps']:g} fps" if configuracion else "")
+        self.update_info_text(f"Cámara iniciada. Acerca un código QR...{detalle}")
+
+    def camara_fallida(self, error):
+        self.abriendo_camara = False
+        self.btn_start_camera.configure(state=tk.NORMAL)
+        self.update_info_text("Cámara desactivada")
+        if isinstance(error, ImportError):
+            messagebox.showerror("Dependencias Faltantes", f"{MENSAJE_DEPENDENCIAS}\n\nDetalle: {error}")
+        else:
+            messagebox.showerror("Error de Cámara", f"No se pudo iniciar la cámara: {error}")
 
     def stop_camera(self):
         self.is_scanning = False
+        self.abriendo_camara = False
         if self.camera:
-            self.camera.release()
+            self.camera.cerrar()
             self.camera = None
         
         self.btn_start_camera.configure(state=tk.NORMAL)
@@ -232,31 +355,56 @@ class SistemaAsistenciaQR:
     def video_loop(self):
         while self.is_scanning and self.camera:
             try:
-                ret, frame = self.camera.read()
-                if not ret:
+                inicio_cuadro = time_module.perf_counter()
+                frame = self.camera.leer()
+                capturado = time_module.perf_counter()
+                if frame is None:
+                    if self.camera.agotada:
+                        # Fin de la grabación: se detiene como si se hubiera apretado "Detener Cámara"
+                        self.root.after(0, self.stop_camera)
+                        break
                     time_module.sleep(0.1)
                     continue
-
-                qr_codes = pyzbar.decode(frame)
-                
+                self.metricas.observar_etapa('captura', capturado - inicio_cuadro)
+
+                # Decodificación, contornos y vista previa (el mismo camino que mide bench_escaneo).
+                # procesar_cuadro marca los contornos sobre este mismo cuadro: es la foto de evidencia
+                cuadro = frame if self.evidencias else None
+                tiempos = {}
+                qr_codes, frame = escaneo.procesar_cuadro(frame, tiempos=tiempos, calidad=self.filtro_calidad,
+                                                          rescate=self.rescate)
+                self.metricas.observar_etapa('calidad', tiempos['calidad'])
+                self.metricas.observar_etapa('decodificacion', tiempos['decodificacion'])
+                if self.rescate:
+                    self.metricas.observar_etapa('rescate', tiempos['rescate'])
+                    if self.rescate.ultima_etapa:
+                        self.metricas.incrementar('rescates', "Cuadros leídos por la cascada de rescate, por etapa",
+                                                  etapa=self.rescate.ultima_etapa)
+                self.metricas.observar_etapa('vista_previa', tiempos['vista'])
+                self.metricas.incrementar('cuadros', "Cuadros leídos de la cámara")
+                if self.filtro_calidad and self.filtro_calidad.ultimo_motivo:
+                    self.metricas.incrementar('cuadros_descartados', "Cuadros sin decodificar por mala calidad",
+                                              motivo=self.filtro_calidad.ultimo_motivo)
+                elif qr_codes:
+                    # Sobre cuadros - cuadros_descartados da la tasa de lectura por cuadro decodificado
+                    self.metricas.incrementar('cuadros_con_codigos', "Cuadros decodificados con al menos un código")
+                if qr_codes:
+                    self.metricas.incrementar('codigos_detectados', "Códigos decodificados en los cuadros",
+                                              len(qr_codes))
+                
+                admitidos = []
                 for qr_code in qr_codes:
+                    inicio_dedupe = time_module.perf_counter()
                     qr_data = qr_code.data.decode('utf-8')
                     
-                    current_time = time_module.time()
-                    if (qr_data == self.last_qr_code and current_time - self.last_scan_time < self.scan_cooldown):
-                        continue
-                    
-                    self.last_qr_code = qr_data
-                    self.last_scan_time = current_time
-                    self.root.after(0, self.process_qr_code, qr_data)
-                    
-                    points = qr_code.polygon
-                    if len(points) == 4:
-                        pts = [(point.x, point.y) for point in points]
-                        cv2.polylines(frame, [np.array(pts, np.int32)], True, (0, 255, 0), 3)
+                    # Tiempo de la fuente: reloj de pared en vivo, tiempo del video en una grabación
+                    if self.filtro_repetidos.admitir(qr_data, self.camera.marca_tiempo):
+                        admitidos.append(qr_data)
+                    self.metricas.observar_etapa('deduplicacion', time_module.perf_counter() - inicio_dedupe)
+                # Todos los códigos del cuadro van juntos (un grupo en el molinete: un solo lote)
+                if admitidos:
+                    self.process_qr_codes(admitidos, capturado, cuadro)
 
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame = cv2.resize(frame, (400, 300))
                 image = Image.fromarray(frame)
                 photo = ImageTk.PhotoImage(image)
                 
@@ -279,28 +427,28 @@ class SistemaAsistenciaQR:
             return
 
         try:
+            cargar_librerias_vision()
             frame = cv2.imread(file_path)
             if frame is None:
                 messagebox.showerror("Error", f"No se pudo cargar la imagen desde:\n{file_path}")
                 return
 
             self.display_static_image(frame)
-            qr_codes = pyzbar.decode(frame)
+            qr_codes = escaneo.decodificar(frame)
 
             if not qr_codes:
                 self.update_info_text("No se encontraron códigos QR en la imagen seleccionada.")
                 return
 
-            qr_data = qr_codes[0].data.decode('utf-8')
-            self.process_qr_code(qr_data)
+            self.process_qr_codes([qr_code.data.decode('utf-8') for qr_code in qr_codes])
 
+        except ImportError as e:
+            messagebox.showerror("Dependencias Faltantes", f"{MENSAJE_DEPENDENCIAS}\n\nDetalle: {e}")
         except Exception as e:
             messagebox.showerror("Error al Procesar", f"Ocurrió un error al procesar la imagen: {e}")
 
     def display_static_image(self, frame):
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        resized_frame = cv2.resize(frame_rgb, (400, 300))
-        image = Image.fromarray(resized_frame)
+        image = Image.fromarray(escaneo.preparar_vista(frame))
         photo = ImageTk.PhotoImage(image)
         if self.video_label:
             self.video_label.configure(image=photo, text='')
@@ -311,156 +459,116 @@ class SistemaAsistenciaQR:
             self.video_label.configure(image=photo, text='')
             self.video_label.image = photo
 
-    def process_qr_code(self, qr_data):
-        """Procesar código QR con diagnósticos detallados."""
-        try:
-            print(f"\n🔍 PROCESANDO QR: {qr_data}")
-            
-            # Verificar horario (más permisivo para debugging)
-            hora_actual = datetime.now().time()
-            print(f"⏰ Hora actual: {hora_actual}")
-            print(f"⏰ Horario permitido: {self.HORA_INICIO_INGRESO} - {self.HORA_FIN_INGRESO}")
-            
-            if not (self.HORA_INICIO_INGRESO <= hora_actual <= self.HORA_FIN_INGRESO):
-                mensaje = f"🚫 FUERA DE HORARIO 🚫\n\nHora actual: {hora_actual.strftime('%H:%M:%S')}\nHorario permitido: {self.HORA_INICIO_INGRESO.strftime('%H:%M')} - {self.HORA_FIN_INGRESO.strftime('%H:%M')}"
-                self.update_info_text(mensaje)
-                print("❌ Fuera de horario")
-                return
-
-            # Buscar estudiante
-            estudiante = self.buscar_estudiante(qr_data)
-            print(f"👤 Estudiante encontrado: {estudiante}")
-            
-            if not estudiante:
-                mensaje = f"❌ QR NO RECONOCIDO ❌\n\nCódigo: {qr_data}\n\nEste código no está registrado en la base de datos."
-                self.update_info_text(mensaje)
-                print("❌ Estudiante no encontrado")
-                return
-
-            # Verificar si ya marcó asistencia hoy
-            ya_marco = self.ya_marco_asistencia_hoy(estudiante[0])
-            print(f"📅 Ya marcó hoy: {ya_marco}")
-            
-            if ya_marco:
-                mensaje = f"⚠️ YA REGISTRADO HOY ⚠️\n\nNombre: {estudiante[1]}\nID: {estudiante[2]}\n\nEste estudiante ya marcó su asistencia hoy."
-                self.update_info_text(mensaje)
-                print("⚠️ Ya registrado hoy")
+    def process_qr_code(self, qr_data, capturado=None):
+        """Encola un código QR leído para procesarlo en el hilo de la BD (se puede llamar desde
+        cualquier hilo); el resultado se muestra después en el hilo de Tk.
+
+        capturado es el perf_counter() de la lectura del cuadro (video_loop), para medir la espera
+        en la cola de la BD y el tiempo total hasta el registro.
+        """
+        self.process_qr_codes([qr_data], capturado)
+
+    def process_qr_codes(self, contenidos, capturado=None, cuadro=None):
+        """Encola varios códigos leídos juntos. Si el hilo de la BD todavía no tomó los anteriores,
+        se suman al mismo lote (una sola consulta y una sola transacción). cuadro es la foto de
+        evidencia de los que queden registrados. Al cerrar la ventana se descartan."""
+        with self.lock_pendientes:
+            # El hilo de captura puede seguir leyendo mientras on_closing cierra el hilo de la BD:
+            # con el lock tomado, o cerrando ya está puesto o el envío entra antes del cierre
+            if self.cerrando:
                 return
-
-            # Registrar asistencia
-            print("✅ Procediendo a registrar asistencia...")
-            resultado_registro = self.registrar_asistencia(estudiante[0])
-            
-            if not resultado_registro:
-                self.update_info_text("❌ ERROR AL REGISTRAR ASISTENCIA")
-                print("❌ Error en el registro")
+            self.escaneos_pendientes.extend((contenido, capturado, cuadro) for contenido in contenidos)
+            if self.lote_agendado:
                 return
-            
-            # Mostrar información completa
-            nombre = estudiante[1] or "No especificado"
-            id_qr = estudiante[2] or "N/A"
-            curso = estudiante[3] or "No especificado"
-            carrera = estudiante[4] or "No especificado"
-            nacimiento = estudiante[5] or "No especificado"
-            correo = estudiante[6] or "No especificado"
-            genero = self.format_genero(estudiante[7])
-            
-            fecha_actual = datetime.now().strftime('%d/%m/%Y')
-            hora_actual_str = datetime.now().strftime('%H:%M:%S')
-            
-            info = (f"✅ ASISTENCIA REGISTRADA ✅\n\n"
-                    f"Nombre: {nombre}\n"
-                    f"ID: {id_qr}\n"
-                    f"Carrera: {carrera}\n"
-                    f"Curso: {curso}\n"
-                    f"----------------------------------\n"
-                    f"Correo: {correo}\n"
-                    f"Nacimiento: {nacimiento}\n"
-                    f"Género: {genero}\n"
-                    f"----------------------------------\n"
-                    f"Hora de Ingreso: {hora_actual_str}\n"
-                    f"Fecha: {fecha_actual}")
-            
-            self.update_info_text(info)
-            self.update_stats()
-            print("✅ Asistencia registrada exitosamente")
-            
-        except Exception as e:
-            error_msg = f"ERROR AL PROCESAR QR\n{str(e)}"
-            self.update_info_text(error_msg)
-            print(f"❌ Error en process_qr_code: {e}")
-
-    def buscar_estudiante(self, id_qr):
-        try:
-            with sqlite3.connect("asistencia.db") as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, nombre_y_apellido, id_unico_qr, curso, carrera, 
-                           fecha_de_nacimiento, correo_electronico, genero
-                    FROM estudiantes WHERE id_unico_qr = ?
-                """, (id_qr,))
-                resultado = cursor.fetchone()
-                print(f"🔍 Búsqueda estudiante con QR '{id_qr}': {resultado}")
-                return resultado
-        except sqlite3.Error as e:
-            print(f"❌ Error al buscar estudiante: {e}")
-            return None
-
-    def ya_marco_asistencia_hoy(self, student_id):
-        try:
-            with sqlite3.connect("asistencia.db") as conn:
-                cursor = conn.cursor()
-                fecha_hoy_str = str(datetime.now().date())
-                print(f"🔍 Verificando asistencia para student_id {student_id} en fecha {fecha_hoy_str}")
-                cursor.execute("SELECT id FROM asistencia WHERE student_id = ? AND fecha = ?", (student_id, fecha_hoy_str))
-                resultado = cursor.fetchone()
-                print(f"📋 Resultado verificación: {resultado}")
-                return resultado is not None
-        except sqlite3.Error as e:
-            print(f"❌ Error al verificar asistencia: {e}")
-            return False
-
-    def registrar_asistencia(self, student_id):
-        """Registrar asistencia con diagnósticos detallados."""
-        try:
-            print(f"📝 Iniciando registro de asistencia para student_id: {student_id}")
-            
-            with sqlite3.connect("asistencia.db") as conn:
-                cursor = conn.cursor()
-                
-                fecha_hoy_str = str(datetime.now().date())
-                hora_actual_str = datetime.now().time().strftime('%H:%M:%S')
-                
-                print(f"📅 Fecha: {fecha_hoy_str}")
-                print(f"⏰ Hora: {hora_actual_str}")
-                
-                # Insertar registro de asistencia
-                cursor.execute("""
-                    INSERT INTO asistencia (student_id, fecha, hora_ingreso) 
-                    VALUES (?, ?, ?)
-                """, (student_id, fecha_hoy_str, hora_actual_str))
-                
-                conn.commit()
-                
-                # Verificar que se insertó correctamente
-                cursor.execute("SELECT * FROM asistencia WHERE student_id = ? AND fecha = ?", (student_id, fecha_hoy_str))
-                registro_insertado = cursor.fetchone()
-                print(f"✅ Registro insertado: {registro_insertado}")
-                
-                if registro_insertado:
-                    print("✅ Asistencia registrada exitosamente en la base de datos")
-                    return True
-                else:
-                    print("❌ No se pudo verificar la inserción")
-                    return False
-                
-        except sqlite3.Error as e:
-            print(f"❌ Error SQLite al registrar asistencia: {e}")
-            messagebox.showerror("Error de Base de Datos", f"No se pudo registrar la asistencia: {e}")
-            return False
-        except Exception as e:
-            print(f"❌ Error general al registrar asistencia: {e}")
-            return False
+            self.lote_agendado = True
+            self.ejecutor_bd.enviar(self.procesar_en_segundo_plano)
+
+    def procesar_en_segundo_plano(self):
+        """Corre en el hilo de la BD: registra los escaneos pendientes en un lote y los pasa al panel
+        en el orden en que se leyeron."""
+        if self.VENTANA_LOTE:
+            time_module.sleep(self.VENTANA_LOTE)
+        with self.lock_pendientes:
+            pendientes, self.escaneos_pendientes = self.escaneos_pendientes, []
+            self.lote_agendado = False
+        ahora = time_module.perf_counter()
+        for _, capturado, _ in pendientes:
+            if capturado is not None:
+                self.metricas.observar_etapa('espera_bd', ahora - capturado)
+        resultados = self.procesador.procesar_lote([contenido for contenido, _, _ in pendientes],
+                                                   [capturado for _, capturado, _ in pendientes])
+        if not self.cerrando:
+            for (qr_data, _, _), resultado in zip(pendientes, resultados):
+                self.panel.agregar(self.resumen_resultado(qr_data, resultado), self.mensaje_resultado(qr_data, resultado),
+                                   registrado=resultado.estado == 'registrado')
+            errores = {resultado.detalle for resultado in resultados if resultado.estado == 'error_registro' and resultado.detalle}
+            if errores:
+                self.root.after(0, lambda: messagebox.showerror(
+                    "Error de Base de Datos", f"No se pudo registrar la asistencia: {'; '.join(errores)}"))
+        # Después del panel: las fotos no atrasan lo que se muestra
+        registrados = [(resultado.estudiante[0], cuadro) for (_, _, cuadro), resultado in zip(pendientes, resultados)
+                       if resultado.estado == 'registrado' and cuadro is not None]
+        if registrados:
+            self.evidencias.vincular(self.procesador.conectar(), registrados)
+
+    def pintar_panel(self, instantanea):
+        """En el hilo de Tk, agendado por el panel: últimos escaneos, detalle del último y estadísticas."""
+        self.metricas.observar_etapa('espera_ui', instantanea.espera)
+        with self.metricas.medir('actualizacion_ui'):
+            if instantanea.ultimos:
+                self.update_info_text("Últimos escaneos:\n" + "\n".join(instantanea.ultimos) +
+                                      "\n----------------------------------\n" + instantanea.detalle)
+            if instantanea.estadisticas:
+                self.mostrar_estadisticas(instantanea.estadisticas)
+
+    def resumen_resultado(self, qr_data, resultado):
+        """Línea de la lista de últimos escaneos: hora, estado y nombre (o el código leído)."""
+        icono = {'registrado': "✅", 'ya_registrado': "⚠️", 'invalido': "🚫", 'fuera_de_horario': "🚫"}.get(resultado.estado, "❌")
+        quien = resultado.estudiante[1] if resultado.estudiante else qr_data[:28]
+        return f"{datetime.now().strftime('%H:%M:%S')} {icono} {quien}"
+
+    def mensaje_resultado(self, qr_data, resultado):
+        """Texto del panel de información para el resultado de un escaneo."""
+        estado, estudiante = resultado.estado, resultado.estudiante
+        if estado == 'fuera_de_horario':
+            return (f"🚫 FUERA DE HORARIO 🚫\n\nHora actual: {resultado.detalle.strftime('%H:%M:%S')}\n"
+                    f"Horario permitido: {self.HORA_INICIO_INGRESO.strftime('%H:%M')} - {self.HORA_FIN_INGRESO.strftime('%H:%M')}")
+        if estado == 'invalido':
+            return f"🚫 QR INVÁLIDO 🚫\n\nMotivo: {resultado.detalle}\n\nEste código no fue emitido por el sistema."
+        if estado == 'no_encontrado':
+            return f"❌ QR NO RECONOCIDO ❌\n\nCódigo: {qr_data}\n\nEste código no está registrado en la base de datos."
+        if estado == 'ya_registrado':
+            return (f"⚠️ YA REGISTRADO HOY ⚠️\n\nNombre: {estudiante[1]}\nID: {estudiante[2]}\n\n"
+                    f"Este estudiante ya marcó su asistencia hoy.")
+        if estado == 'error_registro':
+            return "❌ ERROR AL REGISTRAR ASISTENCIA"
+        if estado == 'error':
+            return f"ERROR AL PROCESAR QR\n{resultado.detalle}"
+
+        # Mostrar información completa
+        nombre = estudiante[1] or "No especificado"
+        id_qr = estudiante[2] or "N/A"
+        curso = estudiante[3] or "No especificado"
+        carrera = estudiante[4] or "No especificado"
+        nacimiento = estudiante[5] or "No especificado"
+        correo = estudiante[6] or "No especificado"
+        genero = self.format_genero(estudiante[7])
+        
+        fecha_actual = datetime.now().strftime('%d/%m/%Y')
+        hora_actual_str = datetime.now().strftime('%H:%M:%S')
+        
+        return (f"✅ ASISTENCIA REGISTRADA ✅\n\n"
+                f"Nombre: {nombre}\n"
+                f"ID: {id_qr}\n"
+                f"Carrera: {carrera}\n"
+                f"Curso: {curso}\n"
+                f"----------------------------------\n"
+                f"Correo: {correo}\n"
+                f"Nacimiento: {nacimiento}\n"
+                f"Género: {genero}\n"
+                f"----------------------------------\n"
+                f"Hora de Ingreso: {hora_actual_str}\n"
+                f"Fecha: {fecha_actual}")
 
     def format_genero(self, genero):
         """Formatear el género para mostrar de forma amigable."""
@@ -479,31 +587,46 @@ class SistemaAsistenciaQR:
             print(f"Error al actualizar info_text: {e}")
 
     def update_stats(self):
-        """Actualiza las estadísticas del día."""
+        """Vuelve a leer las estadísticas del día de la BD (los COUNT corren en el hilo de la BD).
+
+        Entre lecturas, el panel suma en memoria los registros de esta estación.
+        """
+        if self.cerrando:
+            return
+        self.ejecutor_bd.enviar(self.estadisticas_en_segundo_plano)
+
+    def estadisticas_en_segundo_plano(self):
+        estadisticas = self.consultar_estadisticas()
+        if not self.cerrando:
+            self.panel.fijar_estadisticas(estadisticas)
+
+    def resincronizar_estadisticas(self):
+        """Al iniciar y cada minuto: suma los registros de otras estaciones y el cambio de día."""
+        self.update_stats()
+        self.resincronizacion = self.root.after(60000, self.resincronizar_estadisticas)
+
+    def consultar_estadisticas(self):
+        """En el hilo de la BD. Devuelve (presentes, total, fecha) o el mensaje de error."""
         try:
-            with sqlite3.connect("asistencia.db") as conn:
-                cursor = conn.cursor()
-                
-                # Contar estudiantes presentes hoy
-                fecha_hoy = str(datetime.now().date())
-                cursor.execute("SELECT COUNT(*) FROM asistencia WHERE fecha = ?", (fecha_hoy,))
-                presentes_hoy = cursor.fetchone()[0]
-                
-                # Contar total de estudiantes
-                cursor.execute("SELECT COUNT(*) FROM estudiantes")
-                total_estudiantes = cursor.fetchone()[0]
-                
-                # Actualizar la etiqueta de estadísticas
-                stats_text = f"Presentes hoy: {presentes_hoy}\nTotal estudiantes: {total_estudiantes}\nFecha: {fecha_hoy}"
-                self.stats_label.configure(text=stats_text)
-                print(f"📊 Stats actualizadas - Presentes: {presentes_hoy}, Total: {total_estudiantes}")
-                
+            return self.procesador.estadisticas_del_dia()
         except sqlite3.Error as e:
-            print(f"Error al actualizar estadísticas: {e}")
-            self.stats_label.configure(text="Error al cargar estadísticas")
+            self.bitacora.error("error_estadisticas", error=str(e))
+            return "Error al cargar estadísticas"
+
+    def mostrar_estadisticas(self, estadisticas):
+        if isinstance(estadisticas, str):
+            self.stats_label.configure(text=estadisticas)
+            return
+        presentes_hoy, total_estudiantes, fecha_hoy = estadisticas
+        self.stats_label.configure(text=f"Presentes hoy: {presentes_hoy}\nTotal estudiantes: {total_estudiantes}\nFecha: {fecha_hoy}")
 
     def generar_reporte_excel(self):
         """Generar reporte de asistencia en Excel con más detalles."""
+        try:
+            import pandas as pd
+        except ImportError as e:
+            messagebox.showerror("Dependencias Faltantes", f"{MENSAJE_DEPENDENCIAS}\n\nDetalle: {e}")
+            return
         try:
             with sqlite3.connect("asistencia.db") as conn:
                 # Consulta para obtener datos completos de asistencia
@@ -569,6 +692,34 @@ class SistemaAsistenciaQR:
             print(f"❌ Error al generar reporte: {e}")
             messagebox.showerror("Error", f"No se pudo generar el reporte: {e}")
 
+    def exportar_historial(self):
+        """Exportar el historial completo en CSV, Parquet o Arrow (formato según la extensión elegida)."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ruta = filedialog.asksaveasfilename(
+            title="Exportar historial de asistencia",
+            initialdir=self.REPORTS_FOLDER,
+            initialfile=f"Historial_Asistencia_{timestamp}.parquet",
+            filetypes=[("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow"), ("CSV", "*.csv")]
+        )
+        if not ruta:
+            return
+
+        formato = reportes.formato_desde_ruta(ruta)
+        if not formato:
+            messagebox.showerror("Formato no soportado", "Use una extensión .csv, .parquet o .arrow")
+            return
+
+        try:
+            inicio = time_module.time()
+            ruta, total = reportes.exportar_historial(formato, ruta)
+            segundos = time_module.time() - inicio
+            print(f"✅ Historial exportado: {ruta} ({total} registros, {segundos:.2f} s)")
+            messagebox.showinfo("Historial Exportado",
+                              f"Historial exportado exitosamente:\n{ruta}\n\nRegistros: {total}\nTiempo: {segundos:.2f} s")
+        except Exception as e:
+            print(f"❌ Error al exportar historial: {e}")
+            messagebox.showerror("Error", f"No se pudo exportar el historial: {e}")
+
     def run(self):
         """Iniciar la aplicación."""
         try:
@@ -582,8 +733,22 @@ class SistemaAsistenciaQR:
 
     def on_closing(self):
         """Manejar el cierre de la aplicación."""
-        if self.is_scanning:
+        with self.lock_pendientes:
+            self.cerrando = True
+        if self.resincronizacion is not None:
+            self.root.after_cancel(self.resincronizacion)
+        if self.is_scanning or self.abriendo_camara:
             self.stop_camera()
+        # Los escaneos encolados se terminan de registrar. Mientras tanto se siguen atendiendo
+        # los eventos: si el hilo de la BD ya estaba llamando a Tk (root.after desde otro hilo
+        # espera al hilo de Tk), bloquear acá lo dejaría colgado para siempre
+        self.root.withdraw()
+        cerrado = self.ejecutor_bd.cerrar(esperar=False)
+        while not cerrado.done():
+            self.root.update()
+            time_module.sleep(0.01)
+        if self.evidencias:
+            self.evidencias.cerrar()
         self.root.destroy()
 
 # Ejecutar la aplicación
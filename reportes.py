@@ -0,0 +1,186 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# --- 1. CONFIGURACIÓN ---
+
+REPORTS_FOLDER = os.path.join(os.path.expanduser("~"), "Documents", "REPORTES_ASISTENCIA")
+
+# Cantidad de filas que se leen del cursor por cada lote (CSV) o record batch (Parquet/Arrow)
+TAMANO_LOTE = 50_000
+
+COLUMNAS_HISTORIAL = [
+    'nombre_y_apellido',
+    'id_unico_qr',
+    'carrera',
+    'curso',
+    'correo_electronico',
+    'fecha',
+    'hora_ingreso',
+]
+
+FORMATOS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+def consulta_historial(desde=None, hasta=None):
+    """Arma la consulta del historial de asistencia con los filtros de fecha en SQL."""
+    sql = ("SELECT e.nombre_y_apellido, e.id_unico_qr, e.carrera, e.curso, e.correo_electronico, "
+           "a.fecha, a.hora_ingreso "
+           "FROM asistencia a JOIN estudiantes e ON e.id = a.student_id")
+    condiciones = []
+    params = []
+    if desde:
+        condiciones.append("a.fecha >= ?")
+        params.append(str(desde))
+    if hasta:
+        condiciones.append("a.fecha <= ?")
+        params.append(str(hasta))
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY a.fecha, a.hora_ingreso"
+    return sql, params
+
+def leer_lotes(conn, desde=None, hasta=None, tamano_lote=TAMANO_LOTE):
+    """Itera el historial en lotes de filas sin cargar toda la tabla en memoria."""
+    sql, params = consulta_historial(desde, hasta)
+    cursor = conn.cursor()
+    cursor.arraysize = tamano_lote
+    cursor.execute(sql, params)
+    while True:
+        filas = cursor.fetchmany()
+        if not filas:
+            break
+        yield filas
+
+# --- 2. EXPORTACIÓN CSV (STREAMING) ---
+
+def exportar_csv(conn, ruta, desde=None, hasta=None):
+    """Escribe el historial en CSV directamente desde el cursor. Devuelve la cantidad de filas."""
+    total = 0
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        writer = csv.writer(archivo)
+        writer.writerow(COLUMNAS_HISTORIAL)
+        for filas in leer_lotes(conn, desde, hasta):
+            writer.writerows(filas)
+            total += len(filas)
+    return total
+
+# --- 3. EXPORTACIÓN COLUMNAR (PARQUET / ARROW) ---
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        return pyarrow
+    except ImportError as e:
+        raise ImportError(f"Para exportar a Parquet/Arrow instala pyarrow:\npip install pyarrow\nDetalle: {e}")
+
+def esquema_historial(pa):
+    """Esquema tipado del historial: fecha como date32 y hora como time32[s]."""
+    return pa.schema([
+        ('nombre_y_apellido', pa.string()),
+        ('id_unico_qr', pa.string()),
+        ('carrera', pa.string()),
+        ('curso', pa.string()),
+        ('correo_electronico', pa.string()),
+        ('fecha', pa.date32()),
+        ('hora_ingreso', pa.time32('s')),
+    ])
+
+def _lote_a_record_batch(pa, filas, esquema):
+    """Convierte un lote de filas en un RecordBatch, tipando fecha y hora con pyarrow.compute."""
+    pc = pa.compute
+    columnas = list(zip(*filas))
+    arrays = [pa.array(columnas[i], type=pa.string()) for i in range(5)]
+
+    fechas = pa.array(columnas[5], type=pa.string())
+    fechas = pc.cast(pc.strptime(fechas, format='%Y-%m-%d', unit='s'), pa.date32())
+
+    # hora_ingreso se guarda como 'HH:MM:SS'; se convierte a segundos desde medianoche
+    horas = pa.array(columnas[6], type=pa.string())
+    h = pc.cast(pc.utf8_slice_codeunits(horas, 0, 2), pa.int32())
+    m = pc.cast(pc.utf8_slice_codeunits(horas, 3, 5), pa.int32())
+    s = pc.cast(pc.utf8_slice_codeunits(horas, 6, 8), pa.int32())
+    segundos = pc.add(pc.add(pc.multiply(h, 3600), pc.multiply(m, 60)), s)
+    horas = pc.cast(pc.cast(segundos, pa.int32()), pa.time32('s'))
+
+    return pa.RecordBatch.from_arrays(arrays + [fechas, horas], schema=esquema)
+
+def exportar_columnar(conn, ruta, formato='parquet', desde=None, hasta=None):
+    """Escribe el historial en Parquet o Arrow IPC por record batches. Devuelve la cantidad de filas."""
+    pa = _importar_pyarrow()
+    esquema = esquema_historial(pa)
+
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(ruta, esquema, compression='zstd')
+    elif formato == 'arrow':
+        import pyarrow.ipc
+        writer = pa.ipc.new_file(ruta, esquema)
+    else:
+        raise ValueError(f"Formato columnar no soportado: {formato}")
+
+    total = 0
+    try:
+        for filas in leer_lotes(conn, desde, hasta):
+            writer.write_batch(_lote_a_record_batch(pa, filas, esquema))
+            total += len(filas)
+    finally:
+        writer.close()
+    return total
+
+def exportar_historial(formato, ruta=None, desde=None, hasta=None, db_path="asistencia.db"):
+    """Exporta el historial completo en el formato pedido. Devuelve (ruta, filas)."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {', '.join(FORMATOS)}")
+
+    if not ruta:
+        os.makedirs(REPORTS_FOLDER, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ruta = os.path.join(REPORTS_FOLDER, f"Historial_Asistencia_{timestamp}{FORMATOS[formato]}")
+
+    with sqlite3.connect(db_path) as conn:
+        if formato == 'csv':
+            total = exportar_csv(conn, ruta, desde, hasta)
+        else:
+            total = exportar_columnar(conn, ruta, formato, desde, hasta)
+    return ruta, total
+
+def formato_desde_ruta(ruta):
+    """Deduce el formato de exportación a partir de la extensión del archivo."""
+    extension = os.path.splitext(ruta)[1].lower()
+    for formato, ext in FORMATOS.items():
+        if extension == ext or (formato == 'arrow' and extension in ('.feather', '.ipc')):
+            return formato
+    return None
+
+# --- 4. MODO CMD ---
+
+def main(argv=None):
+    """Exporta el historial desde la línea de comandos."""
+    parser = argparse.ArgumentParser(prog="export", description="Exportar el historial de asistencia.")
+    parser.add_argument('formato', choices=list(FORMATOS), help="Formato de salida")
+    parser.add_argument('-o', '--salida', help="Archivo de salida (por defecto en REPORTES_ASISTENCIA)")
+    parser.add_argument('--desde', help="Fecha inicial YYYY-MM-DD (inclusive)")
+    parser.add_argument('--hasta', help="Fecha final YYYY-MM-DD (inclusive)")
+    args = parser.parse_args(argv)
+
+    try:
+        inicio = datetime.now()
+        ruta, total = exportar_historial(args.formato, args.salida, args.desde, args.hasta)
+        segundos = (datetime.now() - inicio).total_seconds()
+        print(f"Historial exportado en: {ruta}")
+        print(f"Registros: {total} ({segundos:.2f} s)")
+        return 0
+    except (ImportError, ValueError, sqlite3.Error, OSError) as e:
+        print(f"Error al exportar: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
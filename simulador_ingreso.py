@@ -0,0 +1,311 @@
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+
+import firma_qr
+import metricas
+import procesador
+
+# --- 1. EVENTOS DE ESCANEO ---
+#
+# Un ingreso simulado es una lista de escaneos (segundo desde la apertura, carril, contenido del
+# QR). Se generan a partir de un roster sintético o se leen de un registro de una jornada real,
+# y se disparan contra procesador.ProcesadorEscaneos (la misma lógica del lector) sobre una BD
+# de prueba. Cada carril es un proceso aparte con sus propias conexiones, como una estación más
+# escribiendo en el mismo archivo.
+
+# tipo: primero (primera pasada), repetido (el mismo QR otra vez), desconocido o registro (reproducción)
+Evento = namedtuple('Evento', 'segundo carril contenido tipo')
+
+def generar_eventos(contenidos, minutos, carriles, repetidos, desconocidos, rng):
+    """Llegadas de todo el roster dentro de la ventana, con el pico antes de la mitad.
+
+    repetidos es la fracción de estudiantes que vuelve a escanear (a veces en otro carril, al
+    mismo tiempo que en el primero) y desconocidos la proporción de códigos que no están en la BD.
+    """
+    ventana = minutos * 60.0
+    eventos = []
+    for contenido in contenidos:
+        llegada = rng.betavariate(2.0, 2.5) * ventana
+        carril = rng.randrange(carriles)
+        eventos.append(Evento(llegada, carril, contenido, 'primero'))
+        if rng.random() < repetidos:
+            # No vio la confirmación y vuelve a mostrar el teléfono, o lo muestra en el carril de al lado
+            otro = rng.randrange(carriles) if rng.random() < 0.3 else carril
+            eventos.append(Evento(llegada + rng.uniform(0.2, 8.0), otro, contenido, 'repetido'))
+    for _ in range(int(round(len(contenidos) * desconocidos))):
+        eventos.append(Evento(rng.betavariate(2.0, 2.5) * ventana, rng.randrange(carriles),
+                              f"DESCONOCIDO-{rng.randrange(10 ** 8):08d}", 'desconocido'))
+    eventos.sort()
+    return eventos
+
+def guardar_eventos(eventos, ruta):
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(('segundo', 'carril', 'contenido', 'tipo'))
+        for evento in eventos:
+            escritor.writerow((f"{evento.segundo:.3f}", evento.carril, evento.contenido, evento.tipo))
+
+def cargar_eventos(ruta):
+    """Lee un registro de escaneos para reproducirlo.
+
+    Acepta el CSV de --guardar-eventos (segundo, carril, contenido[, tipo]) o la bitácora del
+    lector en formato JSON (ASISTENCIA_LOG_FORMATO=json), de la que toma los eventos qr_leido
+    con su fecha y su puerta; los códigos que el lector no reconoció quedan como desconocidos.
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        lineas = [linea for linea in archivo if linea.strip()]
+    if not lineas:
+        return []
+    if not lineas[0].lstrip().startswith('{'):
+        return sorted(Evento(float(fila['segundo']), int(fila.get('carril') or 0), fila['contenido'],
+                             fila.get('tipo') or 'registro')
+                      for fila in csv.DictReader(lineas))
+
+    leidos, no_reconocidos = [], set()
+    for linea in lineas:
+        entrada = json.loads(linea)
+        if entrada.get('evento') == 'qr_leido':
+            leidos.append((datetime.fromisoformat(entrada['fecha']), entrada.get('puerta', ''), entrada['contenido']))
+        elif entrada.get('evento') == 'qr_no_reconocido':
+            no_reconocidos.add(entrada.get('id_qr'))
+    if not leidos:
+        return []
+    inicio = min(fecha for fecha, _, _ in leidos)
+    puertas = {puerta: i for i, puerta in enumerate(sorted({puerta for _, puerta, _ in leidos}))}
+    return sorted(Evento((fecha - inicio).total_seconds(), puertas[puerta], contenido,
+                         'desconocido' if contenido in no_reconocidos else 'registro')
+                  for fecha, puerta, contenido in leidos)
+
+# --- 2. BD DE PRUEBA ---
+
+def preparar_bd(db_path, ids, base=None):
+    """Crea la BD de prueba: copia de 'base' sin la asistencia de hoy, o un roster sintético con ids."""
+    if base:
+        shutil.copyfile(base, db_path)
+        with sqlite3.connect(db_path) as conn:
+            procesador.crear_tablas(conn)
+            conn.execute("DELETE FROM asistencia WHERE fecha = ?", (str(datetime.now().date()),))
+        return
+    with sqlite3.connect(db_path) as conn:
+        procesador.crear_tablas(conn)
+        conn.executemany(
+            "INSERT OR IGNORE INTO estudiantes (nombre_y_apellido, id_unico_qr, curso, carrera) VALUES (?, ?, ?, ?)",
+            ((f"Estudiante {i:05d}", id_unico, f"{1 + i % 6}° año", "Simulación") for i, id_unico in enumerate(ids)))
+
+def registros_dobles(db_path):
+    """Estudiantes con más de un registro hoy (dos carriles que pasaron la verificación a la vez)."""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT student_id FROM asistencia WHERE fecha = ? GROUP BY student_id HAVING COUNT(*) > 1
+            )
+        """, (str(datetime.now().date()),)).fetchone()[0]
+
+# --- 3. CARRILES ---
+
+def atender_carril(tarea):
+    """Dispara los escaneos de un carril a su hora (en un proceso aparte).
+
+    Devuelve (resultados, histogramas por etapa). Cada resultado es (tipo, estado, bloqueo,
+    latencia, servicio): la latencia va desde la llegada programada hasta el resultado (incluye la
+    espera detrás del estudiante anterior), el servicio solo el procesamiento.
+    """
+    db_path, carril, eventos, inicio_reloj, acelerar, llavero, timeout_bd = tarea
+    proc = procesador.ProcesadorEscaneos(db_path, puerta=f"carril-{carril + 1}", llavero=llavero,
+                                         timeout_bd=timeout_bd)
+    # Todos los carriles arrancan en el mismo instante de reloj; de ahí en más se usa perf_counter
+    cero = time.perf_counter() + (inicio_reloj - time.time())
+    time.sleep(max(cero - time.perf_counter(), 0))
+    resultados = []
+    for evento in eventos:
+        llegada = cero + evento.segundo / acelerar if acelerar else time.perf_counter()
+        espera = llegada - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        inicio = time.perf_counter()
+        resultado = proc.procesar(evento.contenido)
+        fin = time.perf_counter()
+        bloqueo = resultado.estado.startswith('error') and 'locked' in str(resultado.detalle)
+        resultados.append((evento.tipo, resultado.estado, bloqueo, fin - llegada, fin - inicio))
+    return resultados, proc.metricas.histogramas('etapa_segundos')
+
+def simular(db_path, eventos, carriles, acelerar, llavero=None, timeout_bd=5.0):
+    """Corre los carriles en paralelo. Devuelve (resultados, {etapa: Histograma}, segundos)."""
+    from concurrent.futures import ProcessPoolExecutor
+    por_carril = [[] for _ in range(carriles)]
+    for evento in eventos:
+        por_carril[evento.carril % carriles].append(evento)
+    inicio_reloj = time.time() + 1.0  # margen para que arranquen todos los procesos
+    tareas = [(db_path, i, lista, inicio_reloj, acelerar, llavero, timeout_bd) for i, lista in enumerate(por_carril)]
+
+    resultados, etapas = [], {}
+    with ProcessPoolExecutor(max_workers=carriles) as ejecutor:
+        for resultados_carril, histogramas in ejecutor.map(atender_carril, tareas):
+            resultados.extend(resultados_carril)
+            for etiquetas, histograma in histogramas.items():
+                etapa = dict(etiquetas)['etapa']
+                if etapa in etapas:
+                    etapas[etapa].sumar(histograma)
+                else:
+                    etapas[etapa] = histograma
+    return resultados, etapas, time.time() - inicio_reloj
+
+# --- 4. INFORME ---
+
+def resumir(resultados, etapas, duracion, dobles):
+    estados = Counter(estado for _, estado, _, _, _ in resultados)
+    tipos = Counter(tipo for tipo, _, _, _, _ in resultados)
+    latencias = [latencia for _, _, _, latencia, _ in resultados]
+    servicios = [servicio for _, _, _, _, servicio in resultados]
+    return {
+        'escaneos': len(resultados),
+        'duracion_s': duracion,
+        'escaneos_por_s': len(resultados) / duracion if duracion else 0.0,
+        'registros_por_s': estados['registrado'] / duracion if duracion else 0.0,
+        'latencia_ms': {f"p{p}": metricas.percentil(latencias, p) * 1000 for p in (50, 95, 99)} | {'max': max(latencias, default=0) * 1000},
+        'servicio_ms': {f"p{p}": metricas.percentil(servicios, p) * 1000 for p in (50, 95, 99)},
+        'etapas_ms': {etapa: {'p50': h.percentil(50) * 1000, 'p99': h.percentil(99) * 1000, 'cantidad': h.cantidad}
+                      for etapa, h in sorted(etapas.items())},
+        'tipos': dict(tipos),
+        'resultados': dict(estados),
+        'bloqueos': sum(bloqueo for _, _, bloqueo, _, _ in resultados),
+        'registros_dobles': dobles,
+    }
+
+def imprimir_informe(r, acelerar):
+    print(f"\n=== Resultados: {r['escaneos']} escaneos en {r['duracion_s']:.1f} s ===")
+    print(f"Rendimiento: {r['escaneos_por_s']:.1f} escaneos/s, {r['registros_por_s']:.1f} registros/s"
+          + ("" if acelerar else " (a máxima velocidad: capacidad del sistema)"))
+    lat, srv = r['latencia_ms'], r['servicio_ms']
+    print(f"Latencia llegada -> resultado: p50 {lat['p50']:.1f} ms, p95 {lat['p95']:.1f} ms, "
+          f"p99 {lat['p99']:.1f} ms, máx {lat['max']:.1f} ms")
+    print(f"Servicio (solo procesamiento): p50 {srv['p50']:.1f} ms, p95 {srv['p95']:.1f} ms, p99 {srv['p99']:.1f} ms")
+    print("\nPor etapa (estimado del histograma):")
+    for etapa, e in r['etapas_ms'].items():
+        print(f"  {etapa:<24} p50 {e['p50']:>7.2f} ms   p99 {e['p99']:>7.2f} ms   ({e['cantidad']})")
+    print("\nResultados:")
+    for estado, cantidad in sorted(r['resultados'].items(), key=lambda x: -x[1]):
+        print(f"  {estado:<18} {cantidad:>6}")
+    tipos, estados = r['tipos'], r['resultados']
+    print("\nContención y duplicados:")
+    print(f"  'database is locked':       {r['bloqueos']}")
+    if 'repetido' in tipos:
+        print(f"  Repetidos enviados:         {tipos['repetido']}  -> ya registrados: {estados.get('ya_registrado', 0)}")
+    if 'desconocido' in tipos:
+        print(f"  Desconocidos enviados:      {tipos['desconocido']}  -> no encontrados: {estados.get('no_encontrado', 0)}")
+    print(f"  Registros dobles en la BD:  {r['registros_dobles']}"
+          + ("  (dos carriles pasaron la verificación de duplicado a la vez)" if r['registros_dobles'] else ""))
+
+# --- 5. MODO CMD ---
+
+def main(argv=None):
+    """Simula (o reproduce) un ingreso masivo contra una BD de prueba e informa la capacidad."""
+    parser = argparse.ArgumentParser(prog="simular-ingreso",
+                                     description="Simulador de carga del ingreso con una BD de prueba.")
+    parser.add_argument('--estudiantes', type=int, default=800, help="Tamaño del roster sintético")
+    parser.add_argument('--minutos', type=float, default=10.0, help="Duración de la ventana de llegadas")
+    parser.add_argument('--carriles', type=int, default=4, help="Estaciones escaneando en paralelo")
+    parser.add_argument('--repetidos', type=float, default=0.08, help="Fracción de estudiantes que escanea dos veces")
+    parser.add_argument('--desconocidos', type=float, default=0.02, help="Proporción de códigos que no están en la BD")
+    parser.add_argument('--acelerar', type=float, default=10.0,
+                        help="Comprime el tiempo (10 = diez veces más llegadas por segundo); 0 = a máxima velocidad")
+    parser.add_argument('--firmados', action='store_true', help="QR firmados con una clave de prueba (incluye la verificación)")
+    parser.add_argument('--timeout-bd', type=float, default=5.0, help="Espera máxima de SQLite por un bloqueo (segundos)")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--reproducir', metavar='REGISTRO', help="CSV de eventos o bitácora JSON del lector a reproducir")
+    parser.add_argument('--base', help="BD con el roster real (se copia; nunca se modifica)")
+    parser.add_argument('--llavero', help="Llavero para verificar los QR firmados de un registro reproducido")
+    parser.add_argument('--db', help="Ruta de la BD de prueba (no debe existir; por defecto, una carpeta temporal)")
+    parser.add_argument('--conservar', action='store_true', help="No borrar la BD de prueba al terminar")
+    parser.add_argument('--guardar-eventos', metavar='CSV', help="Guardar los eventos generados para reproducirlos")
+    parser.add_argument('--json', metavar='RUTA', help="Guardar el informe en JSON")
+    args = parser.parse_args(argv)
+
+    if args.carriles < 1:
+        print("Error: --carriles debe ser al menos 1.")
+        return 1
+    if args.db and os.path.exists(args.db):
+        print(f"Error: {args.db} ya existe. La simulación solo escribe en una BD nueva.")
+        return 1
+    carpeta = tempfile.mkdtemp(prefix="simulacion_ingreso_")
+    db_path = os.path.abspath(args.db or os.path.join(carpeta, "asistencia.db"))
+    rng = random.Random(args.semilla)
+
+    try:
+        llavero = firma_qr.cargar_llavero(args.llavero) if args.llavero else None
+        if args.reproducir:
+            eventos = cargar_eventos(args.reproducir)
+            if not eventos:
+                print(f"Error: no hay escaneos para reproducir en {args.reproducir}.")
+                return 1
+            if llavero is None and any(firma_qr.es_firmado(evento.contenido) for evento in eventos):
+                print(f"Error: {args.reproducir} tiene QR firmados; indique el llavero con --llavero "
+                      f"(--firmados --guardar-eventos lo guarda junto al CSV).")
+                return 1
+            ids = set()
+            for evento in eventos:
+                if evento.tipo == 'desconocido':
+                    continue  # generado a propósito fuera del roster
+                id_unico, motivo = (firma_qr.verificar(evento.contenido, llavero) if firma_qr.es_firmado(evento.contenido)
+                                    else (evento.contenido, None))
+                if not motivo:
+                    ids.add(id_unico)
+            carriles = max(args.carriles, max(evento.carril for evento in eventos) + 1)
+            origen = f"reproducción de {args.reproducir}"
+        else:
+            ids = [f"SIM-{i:06d}" for i in range(args.estudiantes)]
+            contenidos = ids
+            if args.firmados:
+                ruta_llavero = os.path.join(carpeta, "claves_qr.json")
+                firma_qr.rotar_clave(ruta_llavero)
+                llavero = firma_qr.cargar_llavero(ruta_llavero)
+                contenidos = [firma_qr.firmar(id_unico, llavero) for id_unico in ids]
+            eventos = generar_eventos(contenidos, args.minutos, args.carriles, args.repetidos, args.desconocidos, rng)
+            carriles = args.carriles
+            origen = f"{args.estudiantes} estudiantes en {args.minutos:g} minutos"
+            if args.guardar_eventos:
+                guardar_eventos(eventos, args.guardar_eventos)
+                print(f"Eventos guardados en {args.guardar_eventos}")
+                if args.firmados:
+                    # El llavero de prueba vive en la carpeta temporal: sin esta copia el CSV no se
+                    # podría reproducir
+                    ruta_llavero = os.path.splitext(args.guardar_eventos)[0] + "_llavero.json"
+                    firma_qr.guardar_llavero(llavero, ruta_llavero)
+                    print(f"Llavero de los QR firmados en {ruta_llavero} (reproducir con --llavero {ruta_llavero})")
+
+        preparar_bd(db_path, sorted(ids), args.base)
+        ventana = max(evento.segundo for evento in eventos)
+        tasa = len(eventos) / ventana if ventana else float('inf')
+        print(f"=== Simulación de ingreso: {origen}, {carriles} carriles ===")
+        print(f"{len(eventos)} escaneos; tasa media de llegada {tasa:.2f}/s"
+              + (f", x{args.acelerar:g} = {tasa * args.acelerar:.1f}/s" if args.acelerar else ", a máxima velocidad"))
+        print(f"BD de prueba: {db_path}")
+
+        resultados, etapas, duracion = simular(db_path, eventos, carriles, args.acelerar, llavero, args.timeout_bd)
+        informe = resumir(resultados, etapas, duracion, registros_dobles(db_path))
+        imprimir_informe(informe, args.acelerar)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+            print(f"\nInforme guardado en {args.json}")
+        return 0
+    finally:
+        if args.conservar:
+            print(f"\nBD de prueba conservada en {db_path}")
+        else:
+            if args.db and os.path.exists(db_path):
+                os.remove(db_path)
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
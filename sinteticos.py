@@ -0,0 +1,157 @@
+import lote_qr
+
+# --- 1. CUADROS SINTÉTICOS DE CÁMARA ---
+#
+# Arma cuadros como los que ve la cámara del ingreso: un QR (en la pantalla de un teléfono o
+# impreso) ubicado en un cuadro de 640x480 con escala, inclinación, desenfoque, reflejo y
+# ruido controlados. Todo es reproducible con un random.Random y no hace falta una cámara.
+
+ALTO_CUADRO = 480
+ANCHO_CUADRO = 640
+
+def imagen_qr(contenido, parametros=None):
+    """QR dibujado con lote_qr (el mismo renderizado que los PNG) como arreglo en grises."""
+    import numpy as np
+    imagen = lote_qr.crear_imagen_qr(contenido, parametros).get_image().convert('L')
+    return np.asarray(imagen, dtype=np.uint8)
+
+def modulos_qr(contenido, parametros=None):
+    """Cantidad de módulos por lado (sin el borde) del QR para ese contenido y parámetros."""
+    return lote_qr.crear_imagen_qr(contenido, parametros).width
+
+def fondo(rng, alto=ALTO_CUADRO, ancho=ANCHO_CUADRO):
+    """Fondo de escena: gris medio con un gradiente suave de iluminación."""
+    import numpy as np
+    base = rng.uniform(70, 150)
+    gradiente = np.linspace(-rng.uniform(0, 40), rng.uniform(0, 40), ancho, dtype=np.float32)
+    return np.clip(base + gradiente[None, :] + np.zeros((alto, 1), np.float32), 0, 255)
+
+def colocar(cuadro, qr, ancho_px, centro, angulo=0.0, inclinacion=0.0, rng=None):
+    """Proyecta el QR sobre el cuadro con un ancho aproximado de ancho_px píxeles.
+
+    angulo es la rotación en grados; inclinacion (0 a ~0.4) acorta un lado para simular que el
+    teléfono no está paralelo a la cámara. Devuelve las 4 esquinas destino.
+    """
+    import cv2
+    import numpy as np
+    if ancho_px < qr.shape[1]:
+        # Reducción previa con INTER_AREA, como la pantalla al mostrar la imagen achicada
+        lado_px = max(int(round(ancho_px)), 1)
+        qr = cv2.resize(qr, (lado_px, lado_px), interpolation=cv2.INTER_AREA)
+    alto_qr, ancho_qr = qr.shape
+    mitad = ancho_px / 2.0
+    esquinas = np.array([[-mitad, -mitad], [mitad, -mitad], [mitad, mitad], [-mitad, mitad]], np.float32)
+    if inclinacion:
+        lado = (rng.randrange(4) if rng else 0)
+        # Achica el lado elegido hacia el centro (perspectiva de un plano inclinado)
+        for i in (lado, (lado + 1) % 4):
+            esquinas[i] *= (1.0 - inclinacion)
+    rad = np.deg2rad(angulo)
+    rotacion = np.array([[np.cos(rad), -np.sin(rad)], [np.sin(rad), np.cos(rad)]], np.float32)
+    destino = esquinas @ rotacion.T + np.asarray(centro, np.float32)
+
+    origen = np.array([[0, 0], [ancho_qr, 0], [ancho_qr, alto_qr], [0, alto_qr]], np.float32)
+    matriz = cv2.getPerspectiveTransform(origen, destino)
+    alto, ancho = cuadro.shape[:2]
+    proyectado = cv2.warpPerspective(qr.astype(np.float32), matriz, (ancho, alto), flags=cv2.INTER_LINEAR)
+    mascara = cv2.warpPerspective(np.ones_like(qr, np.float32), matriz, (ancho, alto), flags=cv2.INTER_LINEAR)
+    cuadro[:] = cuadro * (1.0 - mascara) + proyectado * mascara
+    return destino
+
+def desenfocar(cuadro, sigma):
+    """Desenfoque gaussiano (foco o movimiento leve)."""
+    import cv2
+    if sigma <= 0:
+        return cuadro
+    return cv2.GaussianBlur(cuadro, (0, 0), sigma)
+
+def movimiento(cuadro, largo, angulo=0.0):
+    """Desenfoque de movimiento: el teléfono se desplaza 'largo' píxeles durante la exposición."""
+    import cv2
+    import numpy as np
+    largo = int(round(largo))
+    if largo <= 1:
+        return cuadro
+    nucleo = np.zeros((largo, largo), np.float32)
+    nucleo[largo // 2, :] = 1.0
+    giro = cv2.getRotationMatrix2D(((largo - 1) / 2.0, (largo - 1) / 2.0), angulo, 1.0)
+    nucleo = cv2.warpAffine(nucleo, giro, (largo, largo))
+    return cv2.filter2D(cuadro, -1, nucleo / nucleo.sum())
+
+def exposicion(cuadro, ganancia, piso=0.0):
+    """Sub o sobreexposición: multiplica la luz y levanta el negro (se recorta al pasar a 8 bits)."""
+    if ganancia == 1.0 and not piso:
+        return cuadro
+    return cuadro * ganancia + piso
+
+def rajaduras(cuadro, rng, centro, radio, cantidad=4):
+    """Líneas finas oscuras o claras que cruzan el código, como una pantalla rajada."""
+    import cv2
+    import numpy as np
+    for _ in range(cantidad):
+        angulo = rng.uniform(0, np.pi)
+        cx = centro[0] + rng.uniform(-0.5, 0.5) * radio
+        cy = centro[1] + rng.uniform(-0.5, 0.5) * radio
+        dx, dy = np.cos(angulo) * radio, np.sin(angulo) * radio
+        cv2.line(cuadro, (int(cx - dx), int(cy - dy)), (int(cx + dx), int(cy + dy)),
+                 float(rng.choice((30, 220))), rng.choice((1, 1, 2)))
+    return cuadro
+
+def reflejo(cuadro, rng, intensidad, centro=None, radio=None):
+    """Mancha de luz (reflejo sobre la pantalla) que lava el contraste en una zona."""
+    import numpy as np
+    if intensidad <= 0:
+        return cuadro
+    alto, ancho = cuadro.shape[:2]
+    cx, cy = centro if centro is not None else (rng.uniform(0, ancho), rng.uniform(0, alto))
+    radio = radio or rng.uniform(40, 120)
+    y, x = np.ogrid[:alto, :ancho]
+    mancha = np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2.0 * radio ** 2)).astype(np.float32)
+    return cuadro + intensidad * mancha
+
+def ruido(cuadro, rng, sigma):
+    """Ruido de sensor gaussiano (reproducible con la semilla de rng)."""
+    import numpy as np
+    if sigma <= 0:
+        return cuadro
+    generador = np.random.default_rng(rng.randrange(2 ** 32))
+    return cuadro + generador.normal(0.0, sigma, cuadro.shape).astype(np.float32)
+
+def a_bgr(cuadro):
+    """Cuadro final de 8 bits y 3 canales, como lo entrega cv2.VideoCapture."""
+    import cv2
+    import numpy as np
+    return cv2.cvtColor(np.clip(cuadro, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+def cuadro_con_qr(qr, rng, ancho_px, angulo=0.0, inclinacion=0.0, desenfoque=0.0, brillo_reflejo=0.0,
+                  sigma_ruido=0.0):
+    """Un cuadro BGR con un QR degradado según los parámetros (centro al azar dentro del cuadro)."""
+    cuadro = fondo(rng)
+    margen = min(ancho_px * 0.75, ALTO_CUADRO / 2)
+    centro = (rng.uniform(margen, ANCHO_CUADRO - margen), rng.uniform(margen, ALTO_CUADRO - margen))
+    colocar(cuadro, qr, ancho_px, centro, angulo, inclinacion, rng)
+    cuadro = desenfocar(cuadro, desenfoque)
+    # El reflejo cae sobre el código (si no, no afecta la lectura)
+    cuadro = reflejo(cuadro, rng, brillo_reflejo,
+                     centro=(centro[0] + rng.uniform(-0.4, 0.4) * ancho_px, centro[1] + rng.uniform(-0.4, 0.4) * ancho_px),
+                     radio=ancho_px * rng.uniform(0.15, 0.35))
+    cuadro = ruido(cuadro, rng, sigma_ruido)
+    return a_bgr(cuadro)
+
+def cuadro_con_varios(qrs, rng, alto=ALTO_CUADRO, ancho=ANCHO_CUADRO, escala=0.3, angulo=0.0, desenfoque=0.0,
+                      sigma_ruido=0.0):
+    """Cuadro BGR de alto x ancho con 0, 1 o varios QR, uno por celda de una fila horizontal.
+
+    escala es el ancho de cada código relativo al alto del cuadro (limitado por su celda).
+    """
+    cuadro = fondo(rng, alto, ancho)
+    if qrs:
+        celda = ancho / len(qrs)
+        ancho_px = min(escala * alto, celda * 0.7)
+        for i, qr in enumerate(qrs):
+            centro = (celda * (i + 0.5) + rng.uniform(-0.1, 0.1) * celda,
+                      alto / 2 + rng.uniform(-0.5, 0.5) * (alto - ancho_px * 1.5) / 2)
+            colocar(cuadro, qr, ancho_px, centro, angulo + rng.uniform(-5, 5))
+    cuadro = desenfocar(cuadro, desenfoque)
+    cuadro = ruido(cuadro, rng, sigma_ruido)
+    return a_bgr(cuadro)
@@ -1,12 +1,15 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sqlite3
-import qrcode
 import os
 import sys
 import re
+import threading
 from datetime import datetime
 
+import firma_qr
+import lote_qr
+
 # --- 1. CONFIGURACIÓN DE RUTAS Y BASE DE DATOS SQLite ---
 
 # RUTA QR (No cambia)
@@ -21,8 +24,39 @@ def check_qr_dir():
         print(f"Error al crear la carpeta QR: {e}")
         messagebox.showerror("Error de Carpeta", "No se pudo crear la carpeta 'QR ASISTENCIA'. Revise los permisos.")
 
-def init_db():
-    """Crea la tabla estudiantes si no existe usando la nueva estructura."""
+# Búsqueda de texto completo: tabla FTS5 de contenido externo sobre estudiantes. Los triggers la
+# mantienen al día con cualquier INSERT/UPDATE/DELETE; 'remove_diacritics' hace que "gomez"
+# encuentre "Gómez" y los índices de prefijo aceleran la búsqueda mientras se escribe.
+SQL_BUSQUEDA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS estudiantes_fts USING fts5(
+        nombre_y_apellido, correo_electronico, curso, carrera,
+        content='estudiantes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS estudiantes_fts_ai AFTER INSERT ON estudiantes BEGIN
+        INSERT INTO estudiantes_fts (rowid, nombre_y_apellido, correo_electronico, curso, carrera)
+        VALUES (new.id, new.nombre_y_apellido, new.correo_electronico, new.curso, new.carrera);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS estudiantes_fts_ad AFTER DELETE ON estudiantes BEGIN
+        INSERT INTO estudiantes_fts (estudiantes_fts, rowid, nombre_y_apellido, correo_electronico, curso, carrera)
+        VALUES ('delete', old.id, old.nombre_y_apellido, old.correo_electronico, old.curso, old.carrera);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS estudiantes_fts_au AFTER UPDATE ON estudiantes BEGIN
+        INSERT INTO estudiantes_fts (estudiantes_fts, rowid, nombre_y_apellido, correo_electronico, curso, carrera)
+        VALUES ('delete', old.id, old.nombre_y_apellido, old.correo_electronico, old.curso, old.carrera);
+        INSERT INTO estudiantes_fts (rowid, nombre_y_apellido, correo_electronico, curso, carrera)
+        VALUES (new.id, new.nombre_y_apellido, new.correo_electronico, new.curso, new.carrera);
+    END;
+"""
+
+def init_db(silencioso=False):
+    """Crea la tabla estudiantes si no existe usando la nueva estructura.
+
+    Con silencioso=True no imprime el mensaje de éxito (para salidas CSV/JSONL por stdout).
+    """
     try:
         # Se conecta o crea el archivo 'asistencia.db'
         with sqlite3.connect("asistencia.db") as conn:
@@ -40,29 +74,41 @@ def init_db():
                     genero TEXT
                 )
             """)
+            # Índices para ordenar y paginar la lista de estudiantes por keyset (el id va implícito)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_nombre ON estudiantes(nombre_y_apellido)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_curso ON estudiantes(curso)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_carrera ON estudiantes(carrera)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_nacimiento ON estudiantes(COALESCE(fecha_de_nacimiento, ''))")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_correo ON estudiantes(COALESCE(correo_electronico, ''))")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_genero ON estudiantes(COALESCE(genero, ''))")
+            # Índice de texto completo (FTS5) sincronizado con estudiantes mediante triggers
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='estudiantes_fts'")
+            fts_existia = cursor.fetchone() is not None
+            cursor.executescript(SQL_BUSQUEDA)
+            if not fts_existia:
+                cursor.execute("INSERT INTO estudiantes_fts(estudiantes_fts) VALUES ('rebuild')")
             conn.commit()
-            print("Base de datos SQLite inicializada con nueva estructura.")
+            if not silencioso:
+                print("Base de datos SQLite inicializada con nueva estructura.")
     except Exception as e:
         print(f"Error al inicializar la BD SQLite: {e}")
         messagebox.showerror("Error BD", f"Error al inicializar la base de datos: {e}")
 
-# Ejecutar las comprobaciones al inicio del programa
-init_db()
-check_qr_dir()
-
 # --- 2. GENERACIÓN DE QR ---
 
 def generar_qr(id_unico, nombre_y_apellido=""):
-    """Genera un código QR con el ID único y lo guarda."""
-    # Sanitizamos el nombre para el archivo (reemplazamos espacios y caracteres especiales)
-    nombre_archivo = f"QR_{id_unico}_{nombre_y_apellido.replace(' ', '_').replace('/', '_').replace('\\', '_')}.png"
-    ruta_completa = os.path.join(QR_FOLDER, nombre_archivo)
+    """Genera un código QR con el ID único y lo guarda (si ya existe sin cambios no se reescribe)."""
+    # El nombre del archivo se sanitiza en lote_qr (espacios y caracteres especiales)
+    ruta_completa = os.path.join(QR_FOLDER, lote_qr.nombre_archivo_qr(id_unico, nombre_y_apellido))
     
     try:
-        # El contenido del QR es el id_unico
-        img = qrcode.make(id_unico)
-        img.save(ruta_completa)
-        print(f"\n--- QR GUARDADO EXITOSAMENTE en: {ruta_completa} ---")
+        # El contenido del QR es el id_unico (firmado si hay llavero de claves); se escribe de forma atómica
+        payload = firma_qr.contenido_qr(id_unico)
+        ruta_completa, generado = lote_qr.generar_qr_archivo(QR_FOLDER, id_unico, nombre_y_apellido, payload)
+        if generado:
+            print(f"\n--- QR GUARDADO EXITOSAMENTE en: {ruta_completa} ---")
+        else:
+            print(f"\n--- QR SIN CAMBIOS (no se reescribe): {ruta_completa} ---")
         return True
     except Exception as e:
         messagebox.showerror("ERROR DE PERMISOS/GUARDADO", 
@@ -70,6 +116,13 @@ def generar_qr(id_unico, nombre_y_apellido=""):
         print(f"!!! FALLA DE GUARDADO. ERROR: {e}")
         return False
 
+def con_contenido_qr(estudiantes):
+    """Agrega a cada (id_unico, nombre_y_apellido) el contenido firmado del QR, si hay llavero de claves."""
+    llavero = firma_qr.cargar_llavero()
+    if not llavero:
+        return estudiantes
+    return [(id_unico, nombre, firma_qr.firmar(id_unico, llavero)) for id_unico, nombre, *_ in estudiantes]
+
 # --- 3. VALIDACIONES AUXILIARES ---
 
 def validar_email(correo):
@@ -265,21 +318,322 @@ def gestion_usuarios(root):
 
     entry_nombre_apellido.focus()
 
-def obtener_estudiantes():
-    """Recupera todos los estudiantes de la base de datos SQLite con la nueva estructura."""
+TAMANO_LOTE_CMD = 1000   # filas por fetchmany al listar desde la línea de comandos
+
+def iterar_estudiantes(curso=None, carrera=None, limite=None, desplazamiento=0, tamano_lote=TAMANO_LOTE_CMD):
+    """Recorre los estudiantes ordenados por nombre, de a lotes, sin cargar la tabla completa.
+
+    Los filtros, el límite y el desplazamiento se resuelven en SQL. Genera listas de filas
+    (id, nombre_y_apellido, id_unico_qr, curso, carrera, fecha_de_nacimiento, correo_electronico, genero).
+    """
+    sql = f"SELECT id, {', '.join(CAMPOS_ESTUDIANTE)} FROM estudiantes"
+    condiciones, params = [], []
+    if curso:
+        condiciones.append("curso = ?")
+        params.append(curso)
+    if carrera:
+        condiciones.append("carrera = ?")
+        params.append(carrera)
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    # LIMIT -1 = sin límite en SQLite
+    sql += " ORDER BY nombre_y_apellido, id LIMIT ? OFFSET ?"
+    params += [-1 if limite is None else limite, desplazamiento]
+
+    conn = sqlite3.connect("asistencia.db")
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            yield lote
+    finally:
+        conn.close()
+
+# Columnas de la lista: (encabezado, expresión SQL de orden, ancho, alineación).
+# Las columnas opcionales se ordenan con COALESCE para que el keyset no tenga que tratar NULL.
+COLUMNAS_LISTA = [
+    ('ID', 'id', 50, tk.CENTER),
+    ('Nombre y Apellido', 'nombre_y_apellido', 200, tk.W),
+    ('ID QR', 'id_unico_qr', 150, tk.W),
+    ('Curso', 'curso', 100, tk.W),
+    ('Carrera', 'carrera', 150, tk.W),
+    ('Fecha Nacimiento', "COALESCE(fecha_de_nacimiento, '')", 120, tk.W),
+    ('Correo Electrónico', "COALESCE(correo_electronico, '')", 200, tk.W),
+    ('Género', "COALESCE(genero, '')", 80, tk.CENTER),
+]
+ORDEN_POR_COLUMNA = {encabezado: expresion for encabezado, expresion, _, _ in COLUMNAS_LISTA}
+
+GENERO_MAP = {'M': 'Masculino', 'F': 'Femenino', 'O': 'Otro'}
+GENERO_ABREVIADO = {'M': 'Masc.', 'F': 'Fem.', 'O': 'Otro'}
+
+TAMANO_PAGINA = 200          # filas por consulta
+MAX_FILAS_CARGADAS = 1000    # filas que se mantienen en el Treeview
+
+def obtener_pagina_estudiantes(orden='nombre_y_apellido', desde=None, descendente=False, limite=TAMANO_PAGINA):
+    """Página de estudiantes con paginación por keyset sobre (orden, id).
+
+    'desde' es la clave (valor_orden, id) de la última fila ya cargada; la página empieza
+    inmediatamente después de ella en el sentido indicado. Cada fila trae su clave al principio.
+    """
+    if orden not in ORDEN_POR_COLUMNA.values():
+        raise ValueError(f"Orden no permitido: {orden}")
+    direccion = "DESC" if descendente else "ASC"
+    comparar = "<" if descendente else ">"
+
+    sql = (f"SELECT {orden}, id, id, nombre_y_apellido, id_unico_qr, curso, carrera, "
+           f"fecha_de_nacimiento, correo_electronico, genero FROM estudiantes")
+    params = []
+    if desde is not None:
+        if orden == 'id':
+            sql += f" WHERE id {comparar} ?"
+            params = [desde[1]]
+        else:
+            # Forma equivalente a (orden, id) > (?, ?) que SQLite resuelve con búsqueda en el índice
+            sql += f" WHERE {orden} {comparar}= ? AND ({orden} {comparar} ? OR id {comparar} ?)"
+            params = [desde[0], desde[0], desde[1]]
+    sql += f" ORDER BY {orden} {direccion}, id {direccion} LIMIT ?"
+    params.append(limite)
+
     try:
         with sqlite3.connect("asistencia.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre_y_apellido, id_unico_qr, curso, carrera, fecha_de_nacimiento, correo_electronico, genero FROM estudiantes ORDER BY nombre_y_apellido")
-            return cursor.fetchall()
+            return conn.execute(sql, params).fetchall()
     except sqlite3.Error as e:
         messagebox.showerror("Error de BD", f"Error al leer los datos: {e}")
         return []
 
+class ListaEstudiantes:
+    """Treeview que carga los estudiantes por páginas a medida que se desplaza la lista.
+
+    Solo se mantienen MAX_FILAS_CARGADAS filas: al bajar se descartan las de arriba y al
+    subir se vuelven a pedir a la base con el keyset invertido.
+    """
+
+    def __init__(self, tree, etiqueta_estado):
+        self.tree = tree
+        self.etiqueta_estado = etiqueta_estado
+        self.columna_orden = 'Nombre y Apellido'
+        self.descendente = False
+        self.claves = {}            # item del Treeview -> (valor_orden, id)
+        self.hay_anteriores = False
+        self.hay_siguientes = True
+        self._cargando = False
+        self.total = 0
+
+    @property
+    def orden(self):
+        return ORDEN_POR_COLUMNA[self.columna_orden]
+
+    def _valores(self, est):
+        genero_display = GENERO_MAP.get(est[9], est[9] or '-')
+        return (est[2], est[3] or '-', est[4] or '-', est[5] or '-', est[6] or '-',
+                est[7] or '-', est[8] or '-', genero_display)
+
+    def recargar(self):
+        """Vacía la lista y carga la primera página con el orden actual."""
+        self.tree.delete(*self.tree.get_children())
+        self.claves.clear()
+        self.hay_anteriores = False
+        self.hay_siguientes = True
+        self._cargando = False
+        try:
+            with sqlite3.connect("asistencia.db") as conn:
+                self.total = conn.execute("SELECT COUNT(*) FROM estudiantes").fetchone()[0]
+        except sqlite3.Error:
+            self.total = 0
+        for encabezado, _, _, _ in COLUMNAS_LISTA:
+            flecha = (' ▼' if self.descendente else ' ▲') if encabezado == self.columna_orden else ''
+            self.tree.heading(encabezado, text=encabezado + flecha)
+        self.cargar_siguientes()
+        self.tree.yview_moveto(0)
+        if not self.claves:
+            self.tree.insert('', tk.END, values=('', 'No hay estudiantes registrados.', '', '', '', '', '', ''))
+
+    def mostrar_resultados(self, texto, filas):
+        """Reemplaza la lista por los resultados de una búsqueda (sin paginación)."""
+        self.tree.delete(*self.tree.get_children())
+        self.claves.clear()
+        self.hay_anteriores = False
+        self.hay_siguientes = False
+        for est in filas:
+            item = self.tree.insert('', tk.END, values=self._valores(est))
+            self.claves[item] = (est[0], est[1])
+        if not filas:
+            self.tree.insert('', tk.END, values=('', f"Sin resultados para '{texto}'.", '', '', '', '', '', ''))
+        self.tree.yview_moveto(0)
+        limite = " (se muestran los más relevantes)" if len(filas) >= LIMITE_BUSQUEDA else ""
+        self.etiqueta_estado.configure(text=f"Búsqueda '{texto}': {len(filas)} resultados{limite}")
+
+    def ordenar_por(self, columna):
+        """Ordena en SQL por la columna clickeada (un segundo click invierte el sentido)."""
+        if columna == self.columna_orden:
+            self.descendente = not self.descendente
+        else:
+            self.columna_orden = columna
+            self.descendente = False
+        self.recargar()
+
+    def _fila_visible(self):
+        """Índice (fraccionario) de la primera fila visible."""
+        primero, _ = self.tree.yview()
+        return primero * len(self.tree.get_children())
+
+    def _mover_a_fila(self, fila):
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(fila, 0) / total)
+
+    def cargar_siguientes(self):
+        self._cargando = False
+        if not self.hay_siguientes:
+            return
+        items = self.tree.get_children()
+        visible = self._fila_visible()
+        desde = self.claves[items[-1]] if items else None
+        filas = obtener_pagina_estudiantes(self.orden, desde, self.descendente)
+        self.hay_siguientes = len(filas) == TAMANO_PAGINA
+        for est in filas:
+            item = self.tree.insert('', tk.END, values=self._valores(est))
+            self.claves[item] = (est[0], est[1])
+
+        # Se descartan filas de arriba; la vista se corre para que no salte
+        descartadas = self._recortar(desde_arriba=True)
+        if descartadas:
+            self.hay_anteriores = True
+            self._mover_a_fila(visible - descartadas)
+        self._actualizar_estado()
+
+    def cargar_anteriores(self):
+        self._cargando = False
+        items = self.tree.get_children()
+        if not self.hay_anteriores or not items:
+            return
+        visible = self._fila_visible()
+        filas = obtener_pagina_estudiantes(self.orden, self.claves[items[0]], not self.descendente)
+        self.hay_anteriores = len(filas) == TAMANO_PAGINA
+        # Vienen en orden inverso (de la más cercana a la más lejana): cada una se inserta arriba
+        for est in filas:
+            item = self.tree.insert('', 0, values=self._valores(est))
+            self.claves[item] = (est[0], est[1])
+
+        if self._recortar(desde_arriba=False):
+            self.hay_siguientes = True
+        self._mover_a_fila(visible + len(filas))
+        self._actualizar_estado()
+
+    def _recortar(self, desde_arriba):
+        """Descarta filas de un extremo para no superar MAX_FILAS_CARGADAS. Devuelve cuántas."""
+        items = self.tree.get_children()
+        sobrantes = len(items) - MAX_FILAS_CARGADAS
+        if sobrantes <= 0:
+            return 0
+        descartar = items[:sobrantes] if desde_arriba else items[-sobrantes:]
+        self.tree.delete(*descartar)
+        for item in descartar:
+            del self.claves[item]
+        return sobrantes
+
+    def _actualizar_estado(self):
+        self.etiqueta_estado.configure(
+            text=f"Total: {self.total} estudiantes — {len(self.tree.get_children())} filas cargadas")
+
+    def al_desplazar(self, primero, ultimo):
+        """yscrollcommand del Treeview: pide más filas cerca de los bordes (una carga por vez)."""
+        if self._cargando:
+            return
+        primero, ultimo = float(primero), float(ultimo)
+        if ultimo > 0.9 and self.hay_siguientes:
+            self._cargando = True
+            self.tree.after_idle(self.cargar_siguientes)
+        elif primero < 0.1 and self.hay_anteriores:
+            self._cargando = True
+            self.tree.after_idle(self.cargar_anteriores)
+
+# --- 4.2 BÚSQUEDA DE ESTUDIANTES (FTS5) ---
+
+LIMITE_BUSQUEDA = 200
+ESPERA_BUSQUEDA_MS = 200     # se busca cuando el usuario deja de escribir este tiempo
+
+def consulta_fts(texto):
+    """Convierte lo que escribió el usuario en una consulta FTS5 de prefijos ("ana" "gom" -> ana* AND gom*)."""
+    terminos = re.findall(r'\w+', texto or '')
+    return " ".join(f'"{termino}"*' for termino in terminos)
+
+def buscar_estudiantes(texto, limite=LIMITE_BUSQUEDA, conn=None):
+    """Busca estudiantes por nombre, correo, curso o carrera (prefijos, sin distinguir tildes).
+
+    Las filas tienen la misma forma que obtener_pagina_estudiantes y vienen ordenadas por relevancia.
+    """
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return []
+    sql = ("SELECT e.nombre_y_apellido, e.id, e.id, e.nombre_y_apellido, e.id_unico_qr, e.curso, e.carrera, "
+           "e.fecha_de_nacimiento, e.correo_electronico, e.genero "
+           "FROM estudiantes_fts JOIN estudiantes e ON e.id = estudiantes_fts.rowid "
+           "WHERE estudiantes_fts MATCH ? ORDER BY rank LIMIT ?")
+    if conn is not None:
+        return conn.execute(sql, (consulta, limite)).fetchall()
+    with sqlite3.connect("asistencia.db") as conn:
+        return conn.execute(sql, (consulta, limite)).fetchall()
+
+class BusquedaDiferida:
+    """Búsqueda mientras se escribe: espera una pausa al tipear y cancela la consulta anterior.
+
+    La consulta corre en un hilo aparte con su propia conexión; si llega una tecla nueva se
+    interrumpe (sqlite3.Connection.interrupt) y su resultado se descarta.
+    """
+
+    def __init__(self, widget, al_terminar):
+        self.widget = widget
+        self.al_terminar = al_terminar
+        self.pendiente = None
+        self.generacion = 0
+        self.conn_activa = None
+        self.lock = threading.Lock()
+
+    def solicitar(self, texto):
+        """Llamar en cada tecla: reprograma la búsqueda y cancela la que esté en curso."""
+        self.cancelar()
+        generacion = self.generacion
+        self.pendiente = self.widget.after(ESPERA_BUSQUEDA_MS, lambda: self._lanzar(texto, generacion))
+
+    def cancelar(self):
+        """Descarta la búsqueda programada y la que esté en curso, sin programar otra."""
+        self.generacion += 1
+        if self.pendiente:
+            self.widget.after_cancel(self.pendiente)
+            self.pendiente = None
+        with self.lock:
+            if self.conn_activa is not None:
+                self.conn_activa.interrupt()
+
+    def _lanzar(self, texto, generacion):
+        self.pendiente = None
+        threading.Thread(target=self._buscar, args=(texto, generacion), daemon=True).start()
+
+    def _buscar(self, texto, generacion):
+        conn = sqlite3.connect("asistencia.db", check_same_thread=False)
+        with self.lock:
+            self.conn_activa = conn
+        try:
+            filas = buscar_estudiantes(texto, conn=conn)
+        except sqlite3.OperationalError:
+            filas = None  # interrumpida por una tecla nueva
+        finally:
+            with self.lock:
+                if self.conn_activa is conn:
+                    self.conn_activa = None
+            conn.close()
+        if filas is not None and generacion == self.generacion:
+            self.widget.after(0, lambda: self._entregar(texto, filas, generacion))
+
+    def _entregar(self, texto, filas, generacion):
+        if generacion == self.generacion:
+            self.al_terminar(texto, filas)
+
 def mostrar_usuarios(root):
-    """Crea una nueva ventana para mostrar la lista de estudiantes usando Treeview."""
-    estudiantes = obtener_estudiantes()
-    
+    """Crea una nueva ventana para mostrar la lista de estudiantes usando Treeview (carga por páginas)."""
     ventana_lista = tk.Toplevel(root)
     ventana_lista.title("Lista de Estudiantes")
     ventana_lista.geometry("1200x600")
@@ -292,59 +646,252 @@ def mostrar_usuarios(root):
 
     tk.Label(frame, text="Estudiantes Registrados", font=('Arial', 14, 'bold')).pack(pady=10)
 
+    # Búsqueda mientras se escribe (nombre, correo, curso o carrera)
+    frame_busqueda = tk.Frame(frame)
+    frame_busqueda.pack(fill=tk.X, pady=(0, 5))
+    tk.Label(frame_busqueda, text="Buscar:", font=('Arial', 10)).pack(side=tk.LEFT)
+    entry_busqueda = tk.Entry(frame_busqueda, width=50, font=('Arial', 10))
+    entry_busqueda.pack(side=tk.LEFT, padx=5)
+
+    estado = tk.Label(frame, text="", font=('Arial', 9), fg='#7F8C8D')
+    estado.pack(side=tk.BOTTOM, anchor=tk.W)
+
     # Treeview para tabla
-    columns = ('ID', 'Nombre y Apellido', 'ID QR', 'Curso', 'Carrera', 'Fecha Nacimiento', 'Correo Electrónico', 'Género')
+    columns = tuple(encabezado for encabezado, _, _, _ in COLUMNAS_LISTA)
     tree = ttk.Treeview(frame, columns=columns, show='headings', height=20)
+    lista = ListaEstudiantes(tree, estado)
 
-    # Configurar encabezados y anchos
-    tree.heading('ID', text='ID')
-    tree.heading('Nombre y Apellido', text='Nombre y Apellido')
-    tree.heading('ID QR', text='ID QR')
-    tree.heading('Curso', text='Curso')
-    tree.heading('Carrera', text='Carrera')
-    tree.heading('Fecha Nacimiento', text='Fecha Nacimiento')
-    tree.heading('Correo Electrónico', text='Correo Electrónico')
-    tree.heading('Género', text='Género')
-
-    # Anchos de columnas
-    tree.column('ID', width=50, anchor=tk.CENTER)
-    tree.column('Nombre y Apellido', width=200)
-    tree.column('ID QR', width=150)
-    tree.column('Curso', width=100)
-    tree.column('Carrera', width=150)
-    tree.column('Fecha Nacimiento', width=120)
-    tree.column('Correo Electrónico', width=200)
-    tree.column('Género', width=80, anchor=tk.CENTER)
-
-    # Scrollbars
+    # Configurar encabezados (click = ordenar en SQL) y anchos
+    for encabezado, _, ancho, alineacion in COLUMNAS_LISTA:
+        tree.heading(encabezado, text=encabezado, command=lambda c=encabezado: lista.ordenar_por(c))
+        tree.column(encabezado, width=ancho, anchor=alineacion)
+
+    # Scrollbars: además de mover la barra, el desplazamiento dispara la carga de páginas
     scrollbar_y = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
     scrollbar_x = ttk.Scrollbar(frame, orient=tk.HORIZONTAL, command=tree.xview)
-    tree.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+
+    def al_desplazar(primero, ultimo):
+        scrollbar_y.set(primero, ultimo)
+        lista.al_desplazar(primero, ultimo)
+
+    tree.configure(yscrollcommand=al_desplazar, xscrollcommand=scrollbar_x.set)
 
     tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
     scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
 
-    # Insertar datos
-    if estudiantes:
-        for est in estudiantes:
-            # Mapear género: M->Masculino, F->Femenino, O->Otro
-            genero_map = {'M': 'Masculino', 'F': 'Femenino', 'O': 'Otro'}
-            genero_display = genero_map.get(est[7], est[7] or '-')
-            
-            tree.insert('', tk.END, values=(
-                est[0],
-                est[1] or '-',
-                est[2] or '-',
-                est[3] or '-',
-                est[4] or '-',
-                est[5] or '-',
-                est[6] or '-',
-                genero_display
-            ))
+    def al_terminar_busqueda(texto, filas):
+        # Con la caja vacía la lista completa ya se recargó: un resultado vacío no la pisa
+        if texto and entry_busqueda.get().strip() == texto:
+            lista.mostrar_resultados(texto, filas)
+
+    busqueda = BusquedaDiferida(ventana_lista, al_terminar_busqueda)
+    texto_anterior = ''
+
+    def al_escribir(event=None):
+        nonlocal texto_anterior
+        texto = entry_busqueda.get().strip()
+        if texto == texto_anterior:
+            return  # Shift, flechas, etc.: el texto no cambió
+        texto_anterior = texto
+        if texto:
+            busqueda.solicitar(texto)
+        else:
+            busqueda.cancelar()
+            lista.recargar()
+
+    entry_busqueda.bind('<KeyRelease>', al_escribir)
+    entry_busqueda.focus()
+
+    lista.recargar()
+
+# --- 4.1 IMPORTACIÓN MASIVA (CSV / Excel) ---
+
+CAMPOS_ESTUDIANTE = ['nombre_y_apellido', 'id_unico_qr', 'curso', 'carrera',
+                     'fecha_de_nacimiento', 'correo_electronico', 'genero']
+
+# Encabezados aceptados en el archivo (normalizados a minúsculas, sin tildes ni espacios extra)
+ALIAS_COLUMNAS = {
+    'nombre_y_apellido': 'nombre_y_apellido', 'nombre y apellido': 'nombre_y_apellido', 'nombre': 'nombre_y_apellido',
+    'id_unico_qr': 'id_unico_qr', 'id unico qr': 'id_unico_qr', 'id unico': 'id_unico_qr', 'id qr': 'id_unico_qr',
+    'curso': 'curso',
+    'carrera': 'carrera',
+    'fecha_de_nacimiento': 'fecha_de_nacimiento', 'fecha de nacimiento': 'fecha_de_nacimiento',
+    'fecha nacimiento': 'fecha_de_nacimiento',
+    'correo_electronico': 'correo_electronico', 'correo electronico': 'correo_electronico', 'correo': 'correo_electronico',
+    'email': 'correo_electronico',
+    'genero': 'genero',
+}
+
+def _normalizar_encabezado(texto):
+    texto = str(texto or '').strip().lower()
+    for con_tilde, sin_tilde in (('á', 'a'), ('é', 'e'), ('í', 'i'), ('ó', 'o'), ('ú', 'u')):
+        texto = texto.replace(con_tilde, sin_tilde)
+    return ' '.join(texto.split())
+
+def _celda_a_texto(valor):
+    """Convierte el valor de una celda (CSV o Excel) a texto limpio."""
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+def leer_filas_roster(ruta):
+    """Itera las filas de un archivo CSV o XLSX como diccionarios con los campos de estudiantes.
+
+    Devuelve (numero_de_fila, datos) leyendo el archivo en streaming.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        import openpyxl
+        libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            yield from _filas_con_encabezado(filas)
+        finally:
+            libro.close()
+    elif extension == '.csv':
+        import csv
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            muestra = archivo.read(4096)
+            archivo.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+            except csv.Error:
+                dialecto = csv.excel
+            yield from _filas_con_encabezado(csv.reader(archivo, dialecto))
     else:
-        # Mensaje si no hay datos
-        tree.insert('', tk.END, values=('', 'No hay estudiantes registrados.', '', '', '', '', '', ''))
+        raise ValueError(f"Formato no soportado: '{extension}'. Use un archivo .csv o .xlsx")
+
+def _filas_con_encabezado(filas):
+    encabezado = next(filas, None)
+    if encabezado is None:
+        return
+    columnas = [ALIAS_COLUMNAS.get(_normalizar_encabezado(c)) for c in encabezado]
+    faltantes = {'nombre_y_apellido', 'id_unico_qr', 'curso', 'carrera'} - set(columnas)
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias en el archivo: {', '.join(sorted(faltantes))}")
+
+    for numero, fila in enumerate(filas, start=2):
+        if not any(_celda_a_texto(v) for v in fila):
+            continue  # fila vacía
+        datos = {campo: '' for campo in CAMPOS_ESTUDIANTE}
+        for campo, valor in zip(columnas, fila):
+            if campo:
+                datos[campo] = _celda_a_texto(valor)
+        yield numero, datos
+
+def validar_fila_estudiante(datos, ids_existentes, correos_existentes):
+    """Valida una fila importada. Devuelve el mensaje de error o None si es válida."""
+    if not (datos['nombre_y_apellido'] and datos['id_unico_qr'] and datos['curso'] and datos['carrera']):
+        return "Los campos Nombre/Apellido, ID Único, Curso y Carrera son obligatorios."
+    if datos['correo_electronico'] and not validar_email(datos['correo_electronico']):
+        return f"Correo electrónico inválido: {datos['correo_electronico']}"
+    if datos['fecha_de_nacimiento'] and not validar_fecha(datos['fecha_de_nacimiento']):
+        return f"Fecha de nacimiento inválida (YYYY-MM-DD): {datos['fecha_de_nacimiento']}"
+    if datos['id_unico_qr'] in ids_existentes:
+        return f"El ID Único '{datos['id_unico_qr']}' ya existe."
+    if datos['correo_electronico'] and datos['correo_electronico'] in correos_existentes:
+        return f"El correo '{datos['correo_electronico']}' ya existe."
+    return None
+
+def importar_estudiantes(ruta, generar_qrs=True):
+    """Importa estudiantes desde CSV/XLSX en una única transacción.
+
+    Los duplicados se detectan contra los valores ya cargados (y contra las filas previas
+    del mismo archivo) antes de insertar. Devuelve (insertados, errores) donde errores es
+    una lista de (numero_de_fila, mensaje).
+    """
+    errores = []
+    insertados = []
+
+    with sqlite3.connect("asistencia.db") as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id_unico_qr, correo_electronico FROM estudiantes")
+        ids_existentes = set()
+        correos_existentes = set()
+        for id_qr, correo in cursor:
+            ids_existentes.add(id_qr)
+            if correo:
+                correos_existentes.add(correo)
+
+        def filas_validas():
+            for numero, datos in leer_filas_roster(ruta):
+                error = validar_fila_estudiante(datos, ids_existentes, correos_existentes)
+                if error:
+                    errores.append((numero, error))
+                    continue
+                ids_existentes.add(datos['id_unico_qr'])
+                if datos['correo_electronico']:
+                    correos_existentes.add(datos['correo_electronico'])
+                genero = (datos['genero'] or 'O').upper()[:1]
+                insertados.append((datos['id_unico_qr'], datos['nombre_y_apellido']))
+                yield (
+                    datos['nombre_y_apellido'],
+                    datos['id_unico_qr'],
+                    datos['curso'],
+                    datos['carrera'],
+                    datos['fecha_de_nacimiento'] or None,
+                    datos['correo_electronico'] or None,
+                    genero if genero in ('M', 'F', 'O') else 'O'
+                )
+
+        sql = ("INSERT INTO estudiantes ("
+               "nombre_y_apellido, id_unico_qr, curso, carrera, fecha_de_nacimiento, correo_electronico, genero"
+               ") VALUES (?, ?, ?, ?, ?, ?, ?)")
+        # Todas las filas válidas se insertan en una sola transacción
+        cursor.executemany(sql, filas_validas())
+        conn.commit()
+
+    if generar_qrs and insertados:
+        resultado = lote_qr.generar_lote(QR_FOLDER, con_contenido_qr(insertados))
+        for ruta, error in resultado['errores']:
+            print(f"!!! FALLA DE GUARDADO en {ruta}. ERROR: {error}")
+
+    return len(insertados), errores
+
+def formatear_reporte_importacion(insertados, errores):
+    """Arma el reporte de importación con el detalle de errores por fila."""
+    lineas = [f"Estudiantes importados: {insertados}", f"Filas con errores: {len(errores)}"]
+    if errores:
+        lineas.append("")
+        lineas.append(f"{'Fila':<6} Error")
+        lineas.append("-" * 60)
+        lineas.extend(f"{numero:<6} {mensaje}" for numero, mensaje in errores)
+    return "\n".join(lineas)
+
+def importar_estudiantes_gui(root):
+    """Selecciona un archivo CSV/XLSX, lo importa y muestra el reporte por fila."""
+    from tkinter import filedialog
+
+    ruta = filedialog.askopenfilename(
+        title="Importar estudiantes",
+        filetypes=[("CSV o Excel", "*.csv *.xlsx"), ("Todos los archivos", "*.*")]
+    )
+    if not ruta:
+        return
+
+    try:
+        insertados, errores = importar_estudiantes(ruta)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        messagebox.showerror("Error de Importación", f"No se pudo importar el archivo: {e}")
+        return
+
+    ventana = tk.Toplevel(root)
+    ventana.title("Resultado de la Importación")
+    ventana.geometry("700x400")
+    ventana.grab_set()  # Modal
+
+    texto = tk.Text(ventana, font=('Courier', 10), wrap=tk.NONE)
+    scrollbar_y = ttk.Scrollbar(ventana, orient=tk.VERTICAL, command=texto.yview)
+    texto.configure(yscrollcommand=scrollbar_y.set)
+    scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+    texto.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    texto.insert(1.0, formatear_reporte_importacion(insertados, errores))
+    texto.configure(state=tk.DISABLED)
 
 # --- 5. MODO CMD ---
 
@@ -400,23 +947,166 @@ def cargar_usuario_cmd():
     except sqlite3.Error as e:
         print(f"Error de BD: {e}")
 
-def listar_usuarios_cmd():
-    """Lista todos los usuarios desde la línea de comandos."""
-    estudiantes = obtener_estudiantes()
-    
+def importar_usuarios_cmd(argv):
+    """Importa estudiantes desde un archivo CSV/XLSX e imprime el reporte por fila."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="import", description="Importar estudiantes desde CSV o Excel.")
+    parser.add_argument('archivo', help="Archivo .csv o .xlsx con encabezados")
+    parser.add_argument('--sin-qr', action='store_true', help="No generar los códigos QR de los importados")
+    args = parser.parse_args(argv)
+
+    print(f"=== Importando estudiantes desde {args.archivo} ===")
+    try:
+        inicio = datetime.now()
+        insertados, errores = importar_estudiantes(args.archivo, generar_qrs=not args.sin_qr)
+        segundos = (datetime.now() - inicio).total_seconds()
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(formatear_reporte_importacion(insertados, errores))
+    print(f"\nTiempo total: {segundos:.2f} s")
+    return 1 if errores else 0
+
+def generar_qrs_cmd(argv):
+    """Regenera en paralelo los QR de todos los estudiantes (o de un curso/carrera)."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="qr", description="Generar los códigos QR de una cohorte.")
+    parser.add_argument('--curso', help="Solo los estudiantes de este curso")
+    parser.add_argument('--carrera', help="Solo los estudiantes de esta carrera")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument('--forzar', action='store_true', help="Regenerar aunque el QR no haya cambiado")
+    parser.add_argument('--perfil', choices=list(lote_qr.PERFILES_QR), default=None,
+                        help="Perfil de generación (por defecto, ASISTENCIA_PERFIL_QR o 'predeterminado')")
+    args = parser.parse_args(argv)
+
+    sql = "SELECT id_unico_qr, nombre_y_apellido FROM estudiantes"
+    condiciones, params = [], []
+    if args.curso:
+        condiciones.append("curso = ?")
+        params.append(args.curso)
+    if args.carrera:
+        condiciones.append("carrera = ?")
+        params.append(args.carrera)
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+
+    try:
+        with sqlite3.connect("asistencia.db") as conn:
+            estudiantes = conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error de BD: {e}")
+        return 1
+
+    print(f"=== Generando QR de {len(estudiantes)} estudiantes en {QR_FOLDER} ===")
+    inicio = datetime.now()
+    resultado = lote_qr.generar_lote(QR_FOLDER, con_contenido_qr(estudiantes), lote_qr.parametros_perfil(args.perfil),
+                                     procesos=args.procesos, forzar=args.forzar)
+    segundos = (datetime.now() - inicio).total_seconds()
+
+    print(f"Generados: {resultado['generados']}  Sin cambios: {resultado['omitidos']}  "
+          f"Errores: {len(resultado['errores'])}  ({segundos:.2f} s)")
+    for ruta, error in resultado['errores']:
+        print(f"  {ruta}: {error}")
+    return 1 if resultado['errores'] else 0
+
+def buscar_usuarios_cmd(argv):
+    """Busca estudiantes por nombre, correo, curso o carrera desde la línea de comandos."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="search", description="Buscar estudiantes (búsqueda por prefijos).")
+    parser.add_argument('texto', nargs='+', help="Palabras a buscar, por ejemplo: ana gom")
+    parser.add_argument('--limite', type=int, default=50, help="Cantidad máxima de resultados")
+    args = parser.parse_args(argv)
+
+    texto = " ".join(args.texto)
+    try:
+        inicio = datetime.now()
+        estudiantes = buscar_estudiantes(texto, args.limite)
+        milisegundos = (datetime.now() - inicio).total_seconds() * 1000
+    except sqlite3.Error as e:
+        print(f"Error de BD: {e}")
+        return 1
+
     if not estudiantes:
-        print("No hay estudiantes registrados.")
-        return
-    
-    print("\n=== LISTA DE ESTUDIANTES ===")
-    print(f"{'ID':<5} {'Nombre y Apellido':<25} {'ID QR':<15} {'Curso':<12} {'Carrera':<20} {'Género':<8}")
-    print("-" * 90)
-    
+        print(f"Sin resultados para '{texto}'.")
+        return 0
+
+    print(f"\n=== {len(estudiantes)} resultados para '{texto}' ({milisegundos:.1f} ms) ===")
+    print(f"{'ID':<5} {'Nombre y Apellido':<25} {'ID QR':<15} {'Curso':<12} {'Carrera':<20} {'Correo':<25}")
+    print("-" * 105)
     for est in estudiantes:
-        genero_map = {'M': 'Masc.', 'F': 'Fem.', 'O': 'Otro'}
-        genero_display = genero_map.get(est[7], est[7] or '-')
-        
-        print(f"{est[0]:<5} {(est[1] or '-')[:24]:<25} {(est[2] or '-')[:14]:<15} {(est[3] or '-')[:11]:<12} {(est[4] or '-')[:19]:<20} {genero_display:<8}")
+        print(f"{est[2]:<5} {(est[3] or '-')[:24]:<25} {(est[4] or '-')[:14]:<15} {(est[5] or '-')[:11]:<12} "
+              f"{(est[6] or '-')[:19]:<20} {(est[8] or '-')[:24]:<25}")
+    return 0
+
+def _escribir_tabla(lotes, salida):
+    """Formato de ancho fijo para leer en la consola. Devuelve la cantidad de filas escritas."""
+    total = 0
+    for lote in lotes:
+        if not total:
+            salida.write("\n=== LISTA DE ESTUDIANTES ===\n")
+            salida.write(f"{'ID':<5} {'Nombre y Apellido':<25} {'ID QR':<15} {'Curso':<12} {'Carrera':<20} {'Género':<8}\n")
+            salida.write("-" * 90 + "\n")
+        salida.write("".join(
+            f"{est[0]:<5} {(est[1] or '-')[:24]:<25} {(est[2] or '-')[:14]:<15} {(est[3] or '-')[:11]:<12} "
+            f"{(est[4] or '-')[:19]:<20} {GENERO_ABREVIADO.get(est[7], est[7] or '-'):<8}\n"
+            for est in lote))
+        total += len(lote)
+    return total
+
+def _escribir_csv(lotes, salida):
+    """CSV con encabezado y los valores tal como están en la base."""
+    import csv
+    escritor = csv.writer(salida, lineterminator='\n')
+    escritor.writerow(['id'] + CAMPOS_ESTUDIANTE)
+    total = 0
+    for lote in lotes:
+        escritor.writerows(lote)
+        total += len(lote)
+    return total
+
+def _escribir_jsonl(lotes, salida):
+    """Un objeto JSON por línea, con las columnas de la tabla como claves."""
+    import json
+    columnas = ['id'] + CAMPOS_ESTUDIANTE
+    total = 0
+    for lote in lotes:
+        salida.write("".join(json.dumps(dict(zip(columnas, est)), ensure_ascii=False) + "\n" for est in lote))
+        total += len(lote)
+    return total
+
+FORMATOS_LISTA = {'table': _escribir_tabla, 'csv': _escribir_csv, 'jsonl': _escribir_jsonl}
+
+def listar_usuarios_cmd(argv=None):
+    """Lista los usuarios desde la línea de comandos (tabla, CSV o JSON Lines).
+
+    Las filas se leen y escriben de a lotes, así la memoria no depende del tamaño del padrón.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="list", description="Listar estudiantes.")
+    parser.add_argument('--format', '--formato', dest='formato', choices=list(FORMATOS_LISTA), default='table',
+                        help="Formato de salida (por defecto, tabla)")
+    parser.add_argument('--curso', help="Solo los estudiantes de este curso")
+    parser.add_argument('--carrera', help="Solo los estudiantes de esta carrera")
+    parser.add_argument('--limit', '--limite', dest='limite', type=int, default=None, help="Cantidad máxima de filas")
+    parser.add_argument('--offset', dest='desplazamiento', type=int, default=0, help="Filas a saltear")
+    args = parser.parse_args(argv or [])
+
+    lotes = iterar_estudiantes(args.curso, args.carrera, args.limite, args.desplazamiento)
+    try:
+        total = FORMATOS_LISTA[args.formato](lotes, sys.stdout)
+        sys.stdout.flush()
+    except sqlite3.Error as e:
+        print(f"Error de BD: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # La salida se cortó (por ejemplo '| head'): se descarta el resto sin mostrar un traceback
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+    if not total and args.formato == 'table':
+        print("No hay estudiantes registrados.")
+    return 0
 
 # --- 6. INTERFAZ GRÁFICA PRINCIPAL ---
 
@@ -424,7 +1114,7 @@ def crear_menu_principal():
     """Crea la ventana principal con los botones del menú."""
     root = tk.Tk()
     root.title("Sistema de Asistencia con QR")
-    root.geometry("600x400")
+    root.geometry("600x480")
     root.resizable(False, False)
     
     # Configurar el tema/color de fondo
@@ -467,6 +1157,18 @@ def crear_menu_principal():
                           pady=15)
     btn_lista.pack(pady=10)
     
+    # Botón: Importar Estudiantes
+    btn_importar = tk.Button(frame_botones,
+                             text="Importar Estudiantes",
+                             command=lambda: importar_estudiantes_gui(root),
+                             bg='#8E44AD',
+                             fg='white',
+                             activebackground='#7D3C98',
+                             font=('Arial', 14, 'bold'),
+                             width=25,
+                             pady=15)
+    btn_importar.pack(pady=10)
+    
     # Botón: Salir
     btn_salir = tk.Button(frame_botones,
                           text="Salir",
@@ -494,22 +1196,74 @@ def crear_menu_principal():
 def main():
     """Función principal que determina si usar GUI o CMD."""
     
-    # Si se ejecuta con argumentos de línea de comandos, usar modo CMD
+    # Si se ejecuta con argumentos de línea de comandos, usar modo CMD.
+    # La base y la carpeta QR se preparan acá y no al importar el módulo: cada subcomando
+    # hace solo lo que necesita (export y credenciales no tocan ninguna de las dos).
     if len(sys.argv) > 1:
         arg = sys.argv[1].lower()
         
         if arg == 'add' or arg == 'agregar':
+            init_db()
+            check_qr_dir()
             cargar_usuario_cmd()
         elif arg == 'list' or arg == 'listar':
-            listar_usuarios_cmd()
+            init_db(silencioso=True)
+            sys.exit(listar_usuarios_cmd(sys.argv[2:]))
+        elif arg == 'search' or arg == 'buscar':
+            init_db()
+            sys.exit(buscar_usuarios_cmd(sys.argv[2:]))
+        elif arg == 'import' or arg == 'importar':
+            init_db()
+            check_qr_dir()
+            sys.exit(importar_usuarios_cmd(sys.argv[2:]))
+        elif arg == 'qr':
+            init_db()
+            check_qr_dir()
+            sys.exit(generar_qrs_cmd(sys.argv[2:]))
+        elif arg == 'credenciales' or arg == 'badges':
+            import credenciales
+            sys.exit(credenciales.main(sys.argv[2:]))
+        elif arg == 'ajustar-qr':
+            import ajuste_qr
+            sys.exit(ajuste_qr.main(sys.argv[2:]))
+        elif arg == 'simular-ingreso':
+            import simulador_ingreso
+            sys.exit(simulador_ingreso.main(sys.argv[2:]))
+        elif arg == 'reproducir-video':
+            import fuentes_video
+            sys.exit(fuentes_video.main(sys.argv[2:]))
+        elif arg == 'probar-camara':
+            import fuentes_video
+            sys.exit(fuentes_video.probar_camara(sys.argv[2:]))
+        elif arg == 'evidencias':
+            import evidencias
+            sys.exit(evidencias.main(sys.argv[2:]))
+        elif arg == 'claves':
+            sys.exit(firma_qr.main(sys.argv[2:]))
+        elif arg == 'export' or arg == 'exportar':
+            import reportes
+            sys.exit(reportes.main(sys.argv[2:]))
         else:
-            print("Uso: python app_asistencia.py [add|list]")
+            print("Uso: python app_asistencia.py [add|list|search|import|qr|ajustar-qr|simular-ingreso|reproducir-video|probar-camara|evidencias|credenciales|claves|export]")
             print("  add/agregar: Agregar un nuevo estudiante desde CMD")
-            print("  list/listar: Listar estudiantes desde CMD")
+            print("  list/listar [--format table|csv|jsonl] [--curso C] [--carrera C] [--limit N] [--offset N]: Listar estudiantes desde CMD")
+            print("  search/buscar TEXTO [--limite N]: Buscar estudiantes por nombre, correo, curso o carrera")
+            print("  import/importar ARCHIVO [--sin-qr]: Importar estudiantes desde CSV/XLSX")
+            print("  qr [--curso C] [--carrera C] [--procesos N] [--forzar] [--perfil P]: Generar los QR de una cohorte")
+            print("  ajustar-qr [--pruebas N] [--decodificador pyzbar|opencv]: Comparar perfiles de QR por velocidad de lectura")
+            print("  simular-ingreso [--estudiantes N] [--minutos M] [--carriles N] [--acelerar X] [--reproducir REGISTRO]: Simular un ingreso masivo con una BD de prueba")
+            print("  reproducir-video FUENTE [--tiempo-real] [-o CSV]: Pasar una grabación por el camino de escaneo del lector")
+            print("  probar-camara [--indice N] [--perfil P] [--falsa] [--guardar]: Comparar perfiles de captura y medir el retraso de la cámara")
+            print("  evidencias ID_QR [--fecha AAAA-MM-DD]: Ingresos de un estudiante con la foto de cada uno")
+            print("  credenciales [--curso C] [--carrera C] [--formato pdf|png] [-o RUTA]: Hojas de credenciales para imprimir")
+            print("  claves {rotar|listar|retirar KID|verificar CONTENIDO}: Claves para firmar los QR")
+            print("  export/exportar {csv|parquet|arrow} [-o RUTA] [--desde F] [--hasta F]: Exportar historial de asistencia")
             print("  Sin argumentos: Abrir interfaz gráfica")
     else:
         # Modo GUI (por defecto)
         try:
+            init_db()
+            check_qr_dir()
             root = crear_menu_principal()
             root.mainloop()
         except KeyboardInterrupt: